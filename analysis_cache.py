@@ -0,0 +1,276 @@
+"""
+Persistent memo cache for the analysis functions
+
+@memoize(columns=[...], outputs=[...]) caches a function of the prepared
+frame on disk. The key combines
+
+  * a content hash of only the columns the function reads (plus the index),
+  * the other arguments,
+  * the source code the function depends on: its own, that of the functions
+    it calls in the same module and the whole file of every other project
+    module it reaches through its globals (so editing influence_diagnostics.py
+    invalidates predictive_analysis()), plus the values of the simple
+    constants it reads,
+  * an optional explicit version= salt, for changes the sources do not show
+    (a library upgrade, a data fix).
+
+Besides the return value the cache records what the function printed and
+the files it wrote (plots), and replays both on a hit, so a cached run is
+indistinguishable from a fresh one. Entries live in .analysis_cache/; the
+directory is kept under a size bound with least-recently-used eviction, and
+hit/miss/eviction counts are kept in stats.json.
+
+Set ANALYSIS_CACHE=0 to bypass the cache.
+
+    python analysis_cache.py --stats
+    python analysis_cache.py --clear
+"""
+import contextlib
+import functools
+import hashlib
+import inspect
+import io
+import json
+import os
+import pickle
+import sys
+import time
+
+import pandas as pd
+
+CACHE_DIR = '.analysis_cache'
+MAX_BYTES = 256 * 2**20
+FORMAT_VERSION = 1
+
+
+def frame_fingerprint(df, columns=None):
+    """Fast content hash of `df` (restricted to `columns`), including the index"""
+    h = hashlib.blake2b(digest_size=16)
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    h.update(repr(list(df.columns)).encode())
+    h.update(repr([str(t) for t in df.dtypes]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _argument_fingerprint(value, columns):
+    if isinstance(value, pd.DataFrame):
+        return ('frame', frame_fingerprint(value, columns))
+    return ('value', repr(value))
+
+
+def _code_names(code):
+    """Global names read by `code` and the functions nested in it"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _local_module(obj, root):
+    """The project module (a file directly in `root`) `obj` is or comes from, else None"""
+    module = obj if inspect.ismodule(obj) else sys.modules.get(getattr(obj, '__module__', None) or '')
+    path = getattr(module, '__file__', None)
+    if path and os.path.dirname(os.path.abspath(path)) == root:
+        return module
+    return None
+
+
+def code_version(func, version=None):
+    """Hash of the source `func` depends on (see the module docstring) and `version`"""
+    root = os.path.dirname(os.path.abspath(inspect.getfile(func)))
+    h = hashlib.blake2b(repr(version).encode(), digest_size=8)
+    seen, functions, modules = set(), [func], {}
+    while functions:
+        f = inspect.unwrap(functions.pop())
+        if f in seen:
+            continue
+        seen.add(f)
+        h.update(inspect.getsource(f).encode())
+        for name in sorted(_code_names(f.__code__)):
+            if name not in f.__globals__:
+                continue
+            obj = f.__globals__[name]
+            module = _local_module(obj, root)
+            if module is None:
+                if isinstance(obj, (str, int, float, bool, tuple, list, dict)):
+                    h.update(f"{name}={obj!r}".encode())
+            elif module.__name__ == f.__module__ and inspect.isfunction(inspect.unwrap(obj)):
+                functions.append(obj)
+            else:
+                modules[module.__name__] = module
+
+    # other project modules are hashed whole, along with the project modules they import
+    pending, files = list(modules.values()), set()
+    while pending:
+        module = pending.pop()
+        if module.__file__ in files:
+            continue
+        files.add(module.__file__)
+        pending.extend(m for m in (_local_module(v, root) for v in vars(module).values())
+                       if m is not None and m.__file__ not in files)
+    for path in sorted(files):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class _Tee(io.TextIOBase):
+    """Write to the real stream and keep a copy"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = io.StringIO()
+
+    def write(self, text):
+        self.buffer.write(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class CacheStats:
+    """Hit/miss/eviction counters persisted next to the entries"""
+
+    def __init__(self, cache_dir):
+        self.path = os.path.join(cache_dir, 'stats.json')
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def bump(self, func_name, field, n=1):
+        stats = self.load()
+        entry = stats.setdefault(func_name, {'hits': 0, 'misses': 0, 'evictions': 0, 'saved_seconds': 0.0})
+        entry[field] += n
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+        os.replace(self.path + '.tmp', self.path)
+
+
+def _entries(cache_dir):
+    """[(path, size, last access)] for every cache entry"""
+    out = []
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if name.endswith('.pkl'):
+                path = os.path.join(root, name)
+                st = os.stat(path)
+                out.append((path, st.st_size, st.st_mtime))
+    return out
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+    """Delete least-recently-used entries until the cache fits in `max_bytes`"""
+    entries = sorted(_entries(cache_dir), key=lambda e: e[2])
+    total = sum(size for _, size, _ in entries)
+    evicted = []
+    while entries and total > max_bytes:
+        path, size, _ = entries.pop(0)
+        os.remove(path)
+        total -= size
+        evicted.append(os.path.basename(os.path.dirname(path)))
+    return evicted
+
+
+def memoize(columns=None, outputs=(), cache_dir=CACHE_DIR, max_bytes=MAX_BYTES, version=None):
+    """Cache a function of a DataFrame on disk
+
+    columns: frame columns the function reads (None hashes the whole frame)
+    outputs: files the function writes; they are stored and restored on a hit
+    version: extra salt for the key; bump it to invalidate the entries by hand
+    """
+    def decorator(func):
+        # computed on the first call, once the module's later definitions exist
+        code_hash = functools.cache(lambda: code_version(func, version))
+        signature = inspect.signature(func)
+        stats = CacheStats(cache_dir)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if os.environ.get('ANALYSIS_CACHE', '1') == '0':
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key_parts = [FORMAT_VERSION, func.__qualname__, code_hash()]
+            key_parts += [(name, _argument_fingerprint(v, columns)) for name, v in bound.arguments.items()]
+            key = hashlib.blake2b(repr(key_parts).encode(), digest_size=16).hexdigest()
+            path = os.path.join(cache_dir, func.__name__, f"{key}.pkl")
+
+            if os.path.exists(path):
+                try:
+                    with open(path, 'rb') as f:
+                        entry = pickle.load(f)
+                except Exception:
+                    entry = None
+                if entry is not None:
+                    os.utime(path)  # LRU: a hit refreshes the entry's access time
+                    sys.stdout.write(entry['stdout'])
+                    for name, data in entry['files'].items():
+                        with open(name, 'wb') as f:
+                            f.write(data)
+                    stats.bump(func.__name__, 'hits')
+                    stats.bump(func.__name__, 'saved_seconds', entry['seconds'])
+                    return entry['result']
+
+            tee = _Tee(sys.stdout)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(tee):
+                result = func(*args, **kwargs)
+            seconds = time.perf_counter() - start
+            files = {}
+            for name in outputs:
+                if os.path.exists(name):
+                    with open(name, 'rb') as f:
+                        files[name] = f.read()
+            entry = {'result': result, 'stdout': tee.buffer.getvalue(), 'files': files, 'seconds': seconds}
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+            stats.bump(func.__name__, 'misses')
+            for name in evict(cache_dir, max_bytes):
+                stats.bump(name, 'evictions')
+            return result
+
+        wrapper.cache_dir = os.path.join(cache_dir, func.__name__)
+        return wrapper
+    return decorator
+
+
+def report(cache_dir=CACHE_DIR):
+    stats = CacheStats(cache_dir).load()
+    sizes = {}
+    for path, size, _ in _entries(cache_dir):
+        func = os.path.basename(os.path.dirname(path))
+        count, total = sizes.get(func, (0, 0))
+        sizes[func] = (count + 1, total + size)
+    print(f"{'Function':<30} | {'Entries':>7} | {'KB':>8} | {'Hits':>5} | {'Misses':>6} | "
+          f"{'Evicted':>7} | {'Saved (s)':>9}")
+    print("-" * 90)
+    for func in sorted(set(stats) | set(sizes)):
+        count, total = sizes.get(func, (0, 0))
+        s = stats.get(func, {})
+        print(f"{func:<30} | {count:>7} | {total / 1024:>8.1f} | {s.get('hits', 0):>5} | "
+              f"{s.get('misses', 0):>6} | {s.get('evictions', 0):>7} | {s.get('saved_seconds', 0):>9.2f}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import shutil
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the analysis memo cache")
+    parser.add_argument('--stats', action='store_true')
+    parser.add_argument('--clear', action='store_true')
+    args = parser.parse_args()
+    if args.clear:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        print(f"Removed {CACHE_DIR}")
+    else:
+        report()
@@ -0,0 +1,342 @@
+"""
+Incremental build runner for the IPO analysis deliverables
+
+Knows which script produces which files (processed data, charts, reports,
+presentation), fingerprints every input and output, and only re-runs the
+stages whose inputs changed. Independent stages run in parallel.
+
+Usage:
+    python build_pipeline.py                 # build everything that is stale
+    python build_pipeline.py --dry-run       # explain what would be rebuilt
+    python build_pipeline.py pdf_report      # build one stage (and its upstream)
+    python build_pipeline.py --force -j 4    # rebuild everything, 4 workers
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+STATE_FILE = '.build_state.json'
+
+DATA_FILES = [
+    'stock_ipos_20231004.csv',
+    'list_of_all_spacs.xlsx',
+    'sp500_202308.xlsx',
+    'russ_1000_202308.xlsx',
+]
+
+# Each stage lists the files it reads and the files it writes. Edges between
+# stages are derived from these lists, so a stage that reads a PNG depends on
+# whichever stage writes that PNG. Helper modules a script imports are listed
+# as inputs too, so editing them triggers a rebuild. Directory outputs (the
+# Parquet dataset, the return store) are fingerprinted file by file. 'stdout'
+# captures the console output of scripts whose printed tables are themselves
+# a deliverable.
+# generate_word_report.py writes the same .docx as the v2 script and is not a
+# stage; the v2 report (with charts) is the one we ship.
+STAGES = {
+    'analysis': {
+        'script': 'project1_analysis.py',
+        'inputs': DATA_FILES + ['analysis_cache.py', 'ipo_dates.py', 'data_validation.py',
+                                'influence_diagnostics.py', 'robust_regression.py', 'stat_tests.py',
+                                'processed_store.py', 'return_store.py'],
+        'outputs': ['stock_ipos_processed.csv', 'spac_counts_by_year.png',
+                    'scatter_22_252.png', 'influence_22_252.png', 'scatter_22_252_11month.png',
+                    'validation_report.json', 'robust_regressions.csv', 'two_sample_tests.csv',
+                    'stock_ipos_processed.parquet', 'ipo_return_store',
+                    'analysis_output.txt'],
+        'stdout': 'analysis_output.txt',
+    },
+    'questions_5_6': {
+        'script': 'questions_5_6.py',
+        'inputs': DATA_FILES + ['ipo_dates.py'],
+        'outputs': ['output_q5_q6.txt'],
+        'stdout': 'output_q5_q6.txt',
+    },
+    'charts': {
+        'script': 'generate_charts.py',
+        'inputs': DATA_FILES + ['ipo_dates.py'],
+        'outputs': ['day0_comparison.png', 'multiwindow_comparison.png',
+                    'volatility_comparison.png', 'sp500_performance.png',
+                    'russell1000_performance.png', 'index_comparison.png'],
+    },
+    'pdf_report': {
+        'script': 'generate_pdf_report.py',
+        'inputs': ['day0_comparison.png', 'multiwindow_comparison.png',
+                   'volatility_comparison.png', 'index_comparison.png',
+                   'report_assets.py'],
+        'outputs': ['IPO_Analysis_Report_Q5_Q6.pdf'],
+    },
+    'word_report': {
+        'script': 'generate_word_report_v2.py',
+        'inputs': ['day0_comparison.png', 'multiwindow_comparison.png',
+                   'sp500_performance.png', 'russell1000_performance.png',
+                   'report_assets.py'],
+        'outputs': ['IPO_Analysis_Report_Q5_Q6.docx'],
+    },
+    'appendix': {
+        'script': 'ipo_appendix_pdf.py',
+        'inputs': ['stock_ipos_processed.csv', 'ipo_dates.py'],
+        'outputs': ['IPO_Appendix_Fact_Sheets.pdf'],
+    },
+    'presentation': {
+        'script': 'create_presentation.py',
+        'inputs': ['day0_comparison.png', 'multiwindow_comparison.png',
+                   'volatility_comparison.png', 'report_assets.py'],
+        'outputs': ['IPO_Analysis_Q5_Q6.pptx'],
+    },
+}
+
+
+def file_digest(path, stat_cache):
+    """SHA-256 of a file, reusing the previous digest if size and mtime are unchanged
+
+    A directory's digest covers the relative path and digest of every file in it.
+    """
+    if not os.path.exists(path):
+        return None
+    if os.path.isdir(path):
+        h = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                h.update(f"{os.path.relpath(full, path)}\0{file_digest(full, stat_cache)}\n".encode())
+        return h.hexdigest()
+    st = os.stat(path)
+    cached = stat_cache.get(path)
+    if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+        return cached[2]
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    digest = h.hexdigest()
+    stat_cache[path] = [st.st_size, st.st_mtime_ns, digest]
+    return digest
+
+
+def build_graph(stages):
+    """Return {stage: set(upstream stages)} derived from inputs/outputs"""
+    producer = {}
+    for name, stage in stages.items():
+        for out in stage['outputs']:
+            if out in producer:
+                raise ValueError(f"{out} is produced by both {producer[out]} and {name}")
+            producer[out] = name
+    graph = {}
+    for name, stage in stages.items():
+        graph[name] = {producer[i] for i in stage['inputs'] if i in producer and producer[i] != name}
+    return graph
+
+
+def topo_order(graph):
+    """Topological order of the stage graph (raises on cycles)"""
+    order, state = [], {}
+
+    def visit(node):
+        if state.get(node) == 'done':
+            return
+        if state.get(node) == 'visiting':
+            raise ValueError(f"Dependency cycle through {node}")
+        state[node] = 'visiting'
+        for dep in sorted(graph[node]):
+            visit(dep)
+        state[node] = 'done'
+        order.append(node)
+
+    for node in sorted(graph):
+        visit(node)
+    return order
+
+
+def select_stages(graph, requested):
+    """Requested stages (by name or output file) plus everything upstream of them"""
+    if not requested:
+        return set(graph)
+    by_output = {out: name for name, s in STAGES.items() for out in s['outputs']}
+    wanted = set()
+    for r in requested:
+        if r in graph:
+            wanted.add(r)
+        elif r in by_output:
+            wanted.add(by_output[r])
+        else:
+            raise SystemExit(f"Unknown target: {r}")
+    todo = list(wanted)
+    while todo:
+        for dep in graph[todo.pop()]:
+            if dep not in wanted:
+                wanted.add(dep)
+                todo.append(dep)
+    return wanted
+
+
+def stale_reason(name, state, stat_cache):
+    """Why a stage must be rebuilt, or None if it is up to date"""
+    stage = STAGES[name]
+    record = state['stages'].get(name)
+    if record is None:
+        return "never built"
+    if file_digest(stage['script'], stat_cache) != record['script']:
+        return f"{stage['script']} changed"
+    for path in stage['inputs']:
+        digest = file_digest(path, stat_cache)
+        if digest is None:
+            return f"input {path} is missing"
+        if digest != record['inputs'].get(path):
+            return f"input {path} changed"
+    for path in stage['outputs']:
+        digest = file_digest(path, stat_cache)
+        if digest is None:
+            return f"output {path} is missing"
+        if digest != record['outputs'].get(path):
+            return f"output {path} was modified outside the build"
+    return None
+
+
+def run_stage(name):
+    """Run a stage's script in a subprocess; return (returncode, seconds, stderr tail)"""
+    stage = STAGES[name]
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, stage['script']], capture_output=True, text=True)
+    if proc.returncode == 0 and stage.get('stdout'):
+        with open(stage['stdout'], 'w', encoding='utf-8') as f:
+            f.write(proc.stdout)
+    return proc.returncode, time.perf_counter() - start, proc.stderr[-2000:]
+
+
+def record_stage(name, state, stat_cache):
+    stage = STAGES[name]
+    state['stages'][name] = {
+        'script': file_digest(stage['script'], stat_cache),
+        'inputs': {p: file_digest(p, stat_cache) for p in stage['inputs']},
+        'outputs': {p: file_digest(p, stat_cache) for p in stage['outputs']},
+        'built_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE, encoding='utf-8') as f:
+            state = json.load(f)
+        state.setdefault('stages', {})
+        state.setdefault('files', {})
+        return state
+    return {'stages': {}, 'files': {}}
+
+
+def save_state(state):
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def explain(selected, graph, state, force):
+    """Dry run: print what would be rebuilt and why, without running anything"""
+    stat_cache = state['files']
+    will_build = set()
+    print(f"{'Stage':<15} | {'Action':<8} | Reason")
+    print("-" * 80)
+    for name in topo_order(graph):
+        if name not in selected:
+            continue
+        reason = "forced" if force else stale_reason(name, state, stat_cache)
+        upstream = sorted(graph[name] & will_build)
+        if reason is None and upstream:
+            reason = f"upstream {', '.join(upstream)} will rebuild"
+        if reason:
+            will_build.add(name)
+        print(f"{name:<15} | {'build' if reason else 'skip':<8} | {reason or 'up to date'}")
+    print("-" * 80)
+    print(f"{len(will_build)} of {len(selected)} stage(s) would run")
+
+
+def build(selected, graph, state, jobs, force):
+    """Run stale stages in dependency order, independent stages in parallel"""
+    stat_cache = state['files']
+    pending = set(selected)
+    done, failed = set(), set()
+    running = {}
+    results = []
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in sorted(pending):
+                deps = graph[name] & selected
+                if deps & failed:
+                    pending.discard(name)
+                    failed.add(name)
+                    results.append((name, 'skipped', 0.0, 'upstream failed'))
+                    continue
+                if not deps <= done:
+                    continue
+                pending.discard(name)
+                reason = "forced" if force else stale_reason(name, state, stat_cache)
+                if reason is None:
+                    done.add(name)
+                    results.append((name, 'fresh', 0.0, 'up to date'))
+                    continue
+                print(f"[build] {name}: {reason}")
+                running[pool.submit(run_stage, name)] = name
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                code, seconds, err = fut.result()
+                if code == 0:
+                    record_stage(name, state, stat_cache)
+                    done.add(name)
+                    results.append((name, 'built', seconds, ''))
+                    print(f"[done]  {name} ({seconds:.1f}s)")
+                else:
+                    failed.add(name)
+                    results.append((name, 'FAILED', seconds, err.strip().splitlines()[-1] if err.strip() else f"exit {code}"))
+                    print(f"[fail]  {name} (exit {code})")
+            save_state(state)
+
+    save_state(state)
+    print("\n" + "=" * 80)
+    print("BUILD SUMMARY")
+    print("=" * 80)
+    for name, status, seconds, note in results:
+        print(f"{name:<15} | {status:<7} | {seconds:6.1f}s | {note}")
+    print(f"\nTotal wall time: {time.perf_counter() - start:.1f}s")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental build of the IPO analysis deliverables")
+    parser.add_argument('targets', nargs='*', help="stage names or output files (default: everything)")
+    parser.add_argument('--dry-run', action='store_true', help="explain what would be rebuilt and exit")
+    parser.add_argument('--force', action='store_true', help="rebuild selected stages even if up to date")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 2, help="parallel stages")
+    parser.add_argument('--list', action='store_true', help="list stages and their files")
+    args = parser.parse_args()
+
+    graph = build_graph(STAGES)
+    if args.list:
+        for name in topo_order(graph):
+            stage = STAGES[name]
+            print(f"{name}: {stage['script']}")
+            print(f"    after:   {', '.join(sorted(graph[name])) or '-'}")
+            print(f"    inputs:  {', '.join(stage['inputs'])}")
+            print(f"    outputs: {', '.join(stage['outputs'])}")
+        return
+
+    selected = select_stages(graph, args.targets)
+    state = load_state()
+    if args.dry_run:
+        explain(selected, graph, state, args.force)
+        return
+    if not build(selected, graph, state, max(1, args.jobs), args.force):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Build the PDF, Word and PowerPoint deliverables concurrently
+
+Chart images are decoded once and turned into per-format variants in the
+shared asset cache (report_assets), then each format is built in its own
+worker process. The builders are
+independent and CPU-bound, so the wall time is roughly that of the slowest one.
+
+Usage:
+    python build_reports.py                  # all formats in parallel
+    python build_reports.py pdf pptx         # a subset
+    python build_reports.py --serial         # one after another (for comparison)
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from report_assets import ENCODINGS, DEFAULT_ENCODING, prepare_variants
+
+# format -> (module, builder function)
+BUILDERS = {
+    'pdf': ('generate_pdf_report', 'create_comprehensive_pdf'),
+    'docx': ('generate_word_report_v2', 'create_report'),
+    'pptx': ('create_presentation', 'create_presentation'),
+}
+
+
+def run_builder(fmt, assets):
+    """Import and run one builder; return (format, output file, seconds)"""
+    module_name, func_name = BUILDERS[fmt]
+    start = time.perf_counter()
+    builder = getattr(importlib.import_module(module_name), func_name)
+    output_file = builder(assets=assets)
+    return fmt, output_file, time.perf_counter() - start
+
+
+def build_reports(formats=tuple(BUILDERS), serial=False, encoding=DEFAULT_ENCODING):
+    """Prepare assets once, then build the requested formats; return timing rows"""
+    start = time.perf_counter()
+    variants = prepare_variants(formats, encoding=encoding)
+    asset_seconds = time.perf_counter() - start
+    n_assets = sum(len(v) for v in variants.values())
+    print(f"Prepared {n_assets} image variants ({encoding}) in {asset_seconds:.2f}s")
+
+    timings = []
+    if serial or len(formats) == 1:
+        for fmt in formats:
+            timings.append(run_builder(fmt, variants[fmt]))
+    else:
+        with ProcessPoolExecutor(max_workers=len(formats)) as pool:
+            futures = [pool.submit(run_builder, fmt, variants[fmt]) for fmt in formats]
+            for fut in as_completed(futures):
+                timings.append(fut.result())
+
+    total = time.perf_counter() - start
+    print("\n" + "=" * 60)
+    print("REPORT BUILD TIMES")
+    print("=" * 60)
+    print(f"{'Format':<8} | {'Seconds':>8} | {'Size (KB)':>10} | File")
+    print("-" * 60)
+    print(f"{'assets':<8} | {asset_seconds:8.2f} | {'':>10} | {n_assets} variants")
+    for fmt, output_file, seconds in sorted(timings):
+        size_kb = os.path.getsize(output_file) / 1024
+        print(f"{fmt:<8} | {seconds:8.2f} | {size_kb:10.1f} | {output_file}")
+    print("-" * 60)
+    print(f"{'total':<8} | {total:8.2f} | {'':>10} | {'serial' if serial else 'parallel'}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build all report formats with shared image assets")
+    parser.add_argument('formats', nargs='*', help=f"formats to build: {', '.join(BUILDERS)} (default: all)")
+    parser.add_argument('--serial', action='store_true', help="build formats one after another")
+    parser.add_argument('--encoding', choices=ENCODINGS, default=DEFAULT_ENCODING,
+                        help="image encoding for embedded charts")
+    args = parser.parse_args()
+    unknown = set(args.formats) - set(BUILDERS)
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+    try:
+        build_reports(tuple(args.formats) or tuple(BUILDERS), serial=args.serial, encoding=args.encoding)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,13 @@
 from pptx import Presentation
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import difflib
+import hashlib
+import itertools
+import json
 import os
+import sys
 
 def analyze_presentation(pptx_path):
     """Analyze a PowerPoint presentation and return detailed information"""
@@ -46,108 +54,314 @@ def analyze_presentation(pptx_path):
     
     return info
 
-# Analyze both presentations
-print("=" * 80)
-print("POWERPOINT COMPARISON ANALYSIS")
-print("=" * 80)
-
-file1 = "IPO_Analysis_Q5_Q6.pptx"
-file2 = "Your paragraph text.pptx"
-
-print(f"\nAnalyzing: {file1}")
-print("-" * 80)
-info1 = analyze_presentation(file1)
-
-if isinstance(info1, dict):
-    print(f"Total Slides: {info1['total_slides']}")
-    print(f"\nSlide-by-slide breakdown:")
-    for slide in info1['slide_details']:
-        print(f"\n  Slide {slide['slide_number']}:")
-        print(f"    Layout: {slide['layout_name']}")
-        print(f"    Shapes: {slide['shapes_count']}")
-        print(f"    Images: {'Yes' if slide['has_images'] else 'No'}")
-        print(f"    Tables: {'Yes' if slide['has_tables'] else 'No'}")
-        print(f"    Charts: {'Yes' if slide['has_charts'] else 'No'}")
-        if slide['text_content']:
-            print(f"    First text: {slide['text_content'][0][:60]}...")
-else:
-    print(info1)
-
-print("\n" + "=" * 80)
-print(f"\nAnalyzing: {file2}")
-print("-" * 80)
-info2 = analyze_presentation(file2)
-
-if isinstance(info2, dict):
-    print(f"Total Slides: {info2['total_slides']}")
-    print(f"\nSlide-by-slide breakdown:")
-    for slide in info2['slide_details']:
-        print(f"\n  Slide {slide['slide_number']}:")
-        print(f"    Layout: {slide['layout_name']}")
-        print(f"    Shapes: {slide['shapes_count']}")
-        print(f"    Images: {'Yes' if slide['has_images'] else 'No'}")
-        print(f"    Tables: {'Yes' if slide['has_tables'] else 'No'}")
-        print(f"    Charts: {'Yes' if slide['has_charts'] else 'No'}")
-        if slide['text_content']:
-            print(f"    First text: {slide['text_content'][0][:60]}...")
-else:
-    print(info2)
-
-# Comparison summary
-print("\n" + "=" * 80)
-print("COMPARISON SUMMARY")
-print("=" * 80)
-
-if isinstance(info1, dict) and isinstance(info2, dict):
-    print(f"\nSlide Count:")
-    print(f"  {file1}: {info1['total_slides']} slides")
-    print(f"  {file2}: {info2['total_slides']} slides")
-    print(f"  Difference: {abs(info1['total_slides'] - info2['total_slides'])} slides")
-    
-    print(f"\nVisual Elements:")
-    images1 = sum(1 for s in info1['slide_details'] if s['has_images'])
-    images2 = sum(1 for s in info2['slide_details'] if s['has_images'])
-    print(f"  {file1}: {images1} slides with images")
-    print(f"  {file2}: {images2} slides with images")
-    
-    tables1 = sum(1 for s in info1['slide_details'] if s['has_tables'])
-    tables2 = sum(1 for s in info2['slide_details'] if s['has_tables'])
-    print(f"  {file1}: {tables1} slides with tables")
-    print(f"  {file2}: {tables2} slides with tables")
-    
-    print(f"\nAverage shapes per slide:")
-    avg_shapes1 = sum(s['shapes_count'] for s in info1['slide_details']) / len(info1['slide_details'])
-    avg_shapes2 = sum(s['shapes_count'] for s in info2['slide_details']) / len(info2['slide_details'])
-    print(f"  {file1}: {avg_shapes1:.1f}")
-    print(f"  {file2}: {avg_shapes2:.1f}")
-    
-    print("\n" + "=" * 80)
-    print("KEY DIFFERENCES")
+# ---------------------------------------------------------------------------
+# Structural deck diff
+#
+# Each slide is reduced to a fingerprint (full text per shape, shape types,
+# image hashes, table contents). The slides of two decks are aligned with a
+# Needleman-Wunsch global alignment on slide similarity, so inserted or
+# deleted slides do not shift every later comparison, and aligned pairs are
+# compared field by field to produce a change list. Parsed decks are cached
+# by file hash, and many decks can be diffed against a baseline in parallel.
+# ---------------------------------------------------------------------------
+
+DECK_CACHE_DIR = '.deck_cache'
+GAP_PENALTY = -0.5
+
+PICTURE, TABLE = 13, 19
+
+
+def file_hash(path):
+    """SHA-256 of a file"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def slide_fingerprint(slide):
+    """Reduce a slide to the fields the diff compares"""
+    texts, shape_types, images, tables = [], [], [], []
+    for shape in slide.shapes:
+        shape_types.append(int(shape.shape_type) if shape.shape_type is not None else 0)
+        if getattr(shape, 'has_table', False):
+            tables.append([[cell.text for cell in row.cells] for row in shape.table.rows])
+        elif hasattr(shape, "text") and shape.text.strip():
+            texts.append(shape.text.strip())
+        if shape.shape_type == PICTURE:
+            images.append(hashlib.sha1(shape.image.blob).hexdigest())
+    fp = {
+        'layout_name': slide.slide_layout.name,
+        'texts': texts,
+        'shape_types': shape_types,
+        'images': images,
+        'tables': tables,
+    }
+    fp['digest'] = hashlib.sha1(json.dumps(fp, sort_keys=True).encode('utf-8')).hexdigest()
+    return fp
+
+
+def parse_deck(pptx_path, cache_dir=DECK_CACHE_DIR):
+    """List of slide fingerprints, cached by the deck's file hash"""
+    digest = file_hash(pptx_path)
+    cached = os.path.join(cache_dir, f"{digest}.json")
+    if os.path.exists(cached):
+        with open(cached, encoding='utf-8') as f:
+            return json.load(f)
+    slides = [slide_fingerprint(s) for s in Presentation(pptx_path).slides]
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cached + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(slides, f)
+    os.replace(cached + '.tmp', cached)
+    return slides
+
+
+def _multiset_overlap(a, b):
+    """Share of items two lists have in common (1.0 if both are empty)"""
+    if not a and not b:
+        return 1.0
+    common = sum((Counter(a) & Counter(b)).values())
+    return 2 * common / (len(a) + len(b))
+
+
+def slide_similarity(a, b):
+    """Similarity in [0, 1] between two slide fingerprints"""
+    if a['digest'] == b['digest']:
+        return 1.0
+    text = difflib.SequenceMatcher(None, "\n".join(a['texts']), "\n".join(b['texts'])).ratio()
+    shapes = _multiset_overlap(a['shape_types'], b['shape_types'])
+    images = _multiset_overlap(a['images'], b['images'])
+    tables = _multiset_overlap([json.dumps(t) for t in a['tables']], [json.dumps(t) for t in b['tables']])
+    return 0.55 * text + 0.15 * shapes + 0.15 * images + 0.15 * tables
+
+
+def align_slides(a, b, gap=GAP_PENALTY):
+    """Global alignment of two slide lists; returns [(i or None, j or None, similarity)]"""
+    n, m = len(a), len(b)
+    sim = [[slide_similarity(a[i], b[j]) for j in range(m)] for i in range(n)]
+    score = [[0.0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        score[i][0] = i * gap
+    for j in range(1, m + 1):
+        score[0][j] = j * gap
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            score[i][j] = max(score[i - 1][j - 1] + 2 * sim[i - 1][j - 1] - 1,
+                              score[i - 1][j] + gap,
+                              score[i][j - 1] + gap)
+    pairs = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and score[i][j] == score[i - 1][j - 1] + 2 * sim[i - 1][j - 1] - 1:
+            pairs.append((i - 1, j - 1, sim[i - 1][j - 1]))
+            i, j = i - 1, j - 1
+        elif i > 0 and score[i][j] == score[i - 1][j] + gap:
+            pairs.append((i - 1, None, 0.0))
+            i -= 1
+        else:
+            pairs.append((None, j - 1, 0.0))
+            j -= 1
+    return pairs[::-1]
+
+
+def _slide_changes(a, b):
+    """Field-by-field differences between two aligned slides"""
+    details = []
+    for line in difflib.unified_diff(a['texts'], b['texts'], lineterm='', n=0):
+        if line.startswith(('+', '-')) and not line.startswith(('+++', '---')):
+            details.append(f"text {line[0]} {line[1:][:100]!r}")
+    if a['layout_name'] != b['layout_name']:
+        details.append(f"layout {a['layout_name']!r} -> {b['layout_name']!r}")
+    if Counter(a['shape_types']) != Counter(b['shape_types']):
+        details.append(f"shape types {sorted(a['shape_types'])} -> {sorted(b['shape_types'])}")
+    removed = Counter(a['images']) - Counter(b['images'])
+    added = Counter(b['images']) - Counter(a['images'])
+    if removed or added:
+        details.append(f"images: {sum(removed.values())} removed, {sum(added.values())} added/changed")
+    for t, (ta, tb) in enumerate(itertools.zip_longest(a['tables'], b['tables']), 1):
+        if ta is None or tb is None:
+            details.append(f"table {t} {'added' if ta is None else 'removed'}")
+            continue
+        if len(ta) != len(tb) or any(len(ra) != len(rb) for ra, rb in zip(ta, tb)):
+            details.append(f"table {t} shape {len(ta)}x{len(ta[0]) if ta else 0} -> "
+                           f"{len(tb)}x{len(tb[0]) if tb else 0}")
+        for r, (ra, rb) in enumerate(zip(ta, tb)):
+            for c, (va, vb) in enumerate(zip(ra, rb)):
+                if va != vb:
+                    details.append(f"table {t} cell ({r}, {c}): {va!r} -> {vb!r}")
+    return details
+
+
+def diff_decks(path_a, path_b, cache_dir=DECK_CACHE_DIR):
+    """Change list turning deck A into deck B
+
+    Each change is a dict with 'kind' (added / removed / modified), the
+    1-based slide numbers in A and B, and a list of 'details'.
+    """
+    a, b = parse_deck(path_a, cache_dir), parse_deck(path_b, cache_dir)
+    changes = []
+    for i, j, similarity in align_slides(a, b):
+        if i is None:
+            changes.append({'kind': 'added', 'a': None, 'b': j + 1,
+                            'details': [f"title {(b[j]['texts'] or [''])[0][:80]!r}"]})
+        elif j is None:
+            changes.append({'kind': 'removed', 'a': i + 1, 'b': None,
+                            'details': [f"title {(a[i]['texts'] or [''])[0][:80]!r}"]})
+        elif a[i]['digest'] != b[j]['digest']:
+            changes.append({'kind': 'modified', 'a': i + 1, 'b': j + 1,
+                            'similarity': round(similarity, 3),
+                            'details': _slide_changes(a[i], b[j])})
+    return changes
+
+
+def diff_against_baseline(baseline, decks, workers=None, cache_dir=DECK_CACHE_DIR):
+    """Diff many decks against one baseline in parallel; returns {deck: changes}"""
+    parse_deck(baseline, cache_dir)  # parse the baseline once, before the workers start
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {deck: pool.submit(diff_decks, baseline, deck, cache_dir) for deck in decks}
+        return {deck: fut.result() for deck, fut in futures.items()}
+
+
+def print_changes(baseline, deck, changes):
+    print(f"\n{baseline} -> {deck}: {len(changes)} change(s)")
+    for ch in changes:
+        where = f"slide {ch['a'] or '-'} -> {ch['b'] or '-'}"
+        print(f"  [{ch['kind']}] {where}")
+        for detail in ch['details']:
+            print(f"      {detail}")
+
+
+def print_summary(file1, file2):
+    """Slide counts and visual elements of two decks (the original comparison report)"""
     print("=" * 80)
-    
-    if info1['total_slides'] > info2['total_slides']:
-        print(f"\n- {file1} has MORE slides ({info1['total_slides']} vs {info2['total_slides']})")
-    elif info1['total_slides'] < info2['total_slides']:
-        print(f"\n- {file2} has MORE slides ({info2['total_slides']} vs {info1['total_slides']})")
+    print("POWERPOINT COMPARISON ANALYSIS")
+    print("=" * 80)
+
+    print(f"\nAnalyzing: {file1}")
+    print("-" * 80)
+    info1 = analyze_presentation(file1)
+
+    if isinstance(info1, dict):
+        print(f"Total Slides: {info1['total_slides']}")
+        print(f"\nSlide-by-slide breakdown:")
+        for slide in info1['slide_details']:
+            print(f"\n  Slide {slide['slide_number']}:")
+            print(f"    Layout: {slide['layout_name']}")
+            print(f"    Shapes: {slide['shapes_count']}")
+            print(f"    Images: {'Yes' if slide['has_images'] else 'No'}")
+            print(f"    Tables: {'Yes' if slide['has_tables'] else 'No'}")
+            print(f"    Charts: {'Yes' if slide['has_charts'] else 'No'}")
+            if slide['text_content']:
+                print(f"    First text: {slide['text_content'][0][:60]}...")
     else:
-        print(f"\n- Both presentations have the SAME number of slides ({info1['total_slides']})")
-    
-    if images1 > images2:
-        print(f"- {file1} has MORE images ({images1} vs {images2})")
-    elif images1 < images2:
-        print(f"- {file2} has MORE images ({images2} vs {images1})")
-    
-    if tables1 > tables2:
-        print(f"- {file1} has MORE tables ({tables1} vs {tables2})")
-    elif tables1 < tables2:
-        print(f"- {file2} has MORE tables ({tables2} vs {tables1})")
+        print(info1)
+
+    print("\n" + "=" * 80)
+    print(f"\nAnalyzing: {file2}")
+    print("-" * 80)
+    info2 = analyze_presentation(file2)
+
+    if isinstance(info2, dict):
+        print(f"Total Slides: {info2['total_slides']}")
+        print(f"\nSlide-by-slide breakdown:")
+        for slide in info2['slide_details']:
+            print(f"\n  Slide {slide['slide_number']}:")
+            print(f"    Layout: {slide['layout_name']}")
+            print(f"    Shapes: {slide['shapes_count']}")
+            print(f"    Images: {'Yes' if slide['has_images'] else 'No'}")
+            print(f"    Tables: {'Yes' if slide['has_tables'] else 'No'}")
+            print(f"    Charts: {'Yes' if slide['has_charts'] else 'No'}")
+            if slide['text_content']:
+                print(f"    First text: {slide['text_content'][0][:60]}...")
+    else:
+        print(info2)
+
+    # Comparison summary
+    print("\n" + "=" * 80)
+    print("COMPARISON SUMMARY")
+    print("=" * 80)
+
+    if isinstance(info1, dict) and isinstance(info2, dict):
+        print(f"\nSlide Count:")
+        print(f"  {file1}: {info1['total_slides']} slides")
+        print(f"  {file2}: {info2['total_slides']} slides")
+        print(f"  Difference: {abs(info1['total_slides'] - info2['total_slides'])} slides")
+
+        print(f"\nVisual Elements:")
+        images1 = sum(1 for s in info1['slide_details'] if s['has_images'])
+        images2 = sum(1 for s in info2['slide_details'] if s['has_images'])
+        print(f"  {file1}: {images1} slides with images")
+        print(f"  {file2}: {images2} slides with images")
+
+        tables1 = sum(1 for s in info1['slide_details'] if s['has_tables'])
+        tables2 = sum(1 for s in info2['slide_details'] if s['has_tables'])
+        print(f"  {file1}: {tables1} slides with tables")
+        print(f"  {file2}: {tables2} slides with tables")
+
+        print(f"\nAverage shapes per slide:")
+        avg_shapes1 = sum(s['shapes_count'] for s in info1['slide_details']) / len(info1['slide_details'])
+        avg_shapes2 = sum(s['shapes_count'] for s in info2['slide_details']) / len(info2['slide_details'])
+        print(f"  {file1}: {avg_shapes1:.1f}")
+        print(f"  {file2}: {avg_shapes2:.1f}")
+
+        print("\n" + "=" * 80)
+        print("KEY DIFFERENCES")
+        print("=" * 80)
+
+        if info1['total_slides'] > info2['total_slides']:
+            print(f"\n- {file1} has MORE slides ({info1['total_slides']} vs {info2['total_slides']})")
+        elif info1['total_slides'] < info2['total_slides']:
+            print(f"\n- {file2} has MORE slides ({info2['total_slides']} vs {info1['total_slides']})")
+        else:
+            print(f"\n- Both presentations have the SAME number of slides ({info1['total_slides']})")
+
+        if images1 > images2:
+            print(f"- {file1} has MORE images ({images1} vs {images2})")
+        elif images1 < images2:
+            print(f"- {file2} has MORE images ({images2} vs {images1})")
+
+        if tables1 > tables2:
+            print(f"- {file1} has MORE tables ({tables1} vs {tables2})")
+        elif tables1 < tables2:
+            print(f"- {file2} has MORE tables ({tables2} vs {tables1})")
+
+    print("\n" + "=" * 80)
+
+    # Save to file
+    with open('comparison_report.txt', 'w', encoding='utf-8') as f:
+        f.write("POWERPOINT COMPARISON COMPLETE\n")
+        f.write(f"{file1}: {info1['total_slides'] if isinstance(info1, dict) else 'N/A'} slides\n")
+        f.write(f"{file2}: {info2['total_slides'] if isinstance(info2, dict) else 'N/A'} slides\n")
+
+    print("Report saved to: comparison_report.txt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PowerPoint decks")
+    parser.add_argument('baseline', nargs='?', help="approved baseline deck")
+    parser.add_argument('decks', nargs='*', help="decks to diff against the baseline")
+    parser.add_argument('--json', metavar='FILE', help="write the change lists as JSON")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if not args.baseline:
+        file1 = "IPO_Analysis_Q5_Q6.pptx"
+        file2 = "Your paragraph text.pptx"
+        print_summary(file1, file2)
+        if os.path.exists(file1) and os.path.exists(file2):
+            print_changes(file1, file2, diff_decks(file1, file2))
+        return
 
-print("\n" + "=" * 80)
+    results = diff_against_baseline(args.baseline, args.decks, args.workers)
+    for deck, changes in results.items():
+        print_changes(args.baseline, deck, changes)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    # non-zero exit when any deck differs from the baseline (for CI)
+    sys.exit(1 if any(results.values()) else 0)
 
-# Save to file
-with open('comparison_report.txt', 'w', encoding='utf-8') as f:
-    f.write("POWERPOINT COMPARISON COMPLETE\n")
-    f.write(f"{file1}: {info1['total_slides'] if isinstance(info1, dict) else 'N/A'} slides\n")
-    f.write(f"{file2}: {info2['total_slides'] if isinstance(info2, dict) else 'N/A'} slides\n")
 
-print("Report saved to: comparison_report.txt")
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,7 @@ from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
 import os
 
-# Create presentation
-prs = Presentation()
-prs.slide_width = Inches(10)
-prs.slide_height = Inches(7.5)
+from report_assets import asset_path, target_assets
 
 def add_title_slide(prs, title, subtitle):
     """Add a title slide"""
@@ -153,25 +150,35 @@ def add_table_slide(prs, title, data, headers):
     
     return slide
 
-# Slide 1: Title Slide
-add_title_slide(prs, "IPO Analysis: Questions 5 & 6", 
-                "SPAC vs Non-SPAC Returns and Index Inclusion Performance")
+def create_presentation(assets=None):
+    """Build the Q5/Q6 deck; assets optionally maps chart names to prepared files"""
+    if assets is None:
+        assets = target_assets('pptx')
 
-# Slide 2: Overview
-add_content_slide(prs, "Analysis Overview", [
-    "Question 5: Examining SPAC vs Non-SPAC IPO Returns",
-    "  • Day 0 return analysis with abnormal return flagging",
-    "  • Multi-window return comparison (5-day, 22-day, 91-day, 252-day)",
-    "",
-    "Question 6: Index Inclusion Performance Analysis",
-    "  • S&P 500 inclusion impact on 1-year returns",
-    "  • Russell 1000 inclusion impact on 1-year returns",
-    "",
-    "Dataset: 3,681 IPOs (251 SPACs, 3,430 Non-SPACs)"
-])
+    # Create presentation
+    prs = Presentation()
+    prs.slide_width = Inches(10)
+    prs.slide_height = Inches(7.5)
 
-# Slide 3: Question 5(i) - Code
-code_q5i = """# Flag abnormal returns (>= 100%)
+    # Slide 1: Title Slide
+    add_title_slide(prs, "IPO Analysis: Questions 5 & 6", 
+                    "SPAC vs Non-SPAC Returns and Index Inclusion Performance")
+
+    # Slide 2: Overview
+    add_content_slide(prs, "Analysis Overview", [
+        "Question 5: Examining SPAC vs Non-SPAC IPO Returns",
+        "  • Day 0 return analysis with abnormal return flagging",
+        "  • Multi-window return comparison (5-day, 22-day, 91-day, 252-day)",
+        "",
+        "Question 6: Index Inclusion Performance Analysis",
+        "  • S&P 500 inclusion impact on 1-year returns",
+        "  • Russell 1000 inclusion impact on 1-year returns",
+        "",
+        "Dataset: 3,681 IPOs (251 SPACs, 3,430 Non-SPACs)"
+    ])
+
+    # Slide 3: Question 5(i) - Code
+    code_q5i = """# Flag abnormal returns (>= 100%)
 stock_ipos['day0_lvl'] = np.where(
     stock_ipos['sym_day0_OTC'] < 1, 
     'normal', 
@@ -185,40 +192,40 @@ day0_summary = stock_ipos.groupby(
     'mean', 'median', 'std', 'count', 'min', 'max'
 ])"""
 
-add_code_slide(prs, "Question 5(i): Day 0 Return Analysis - Code", code_q5i)
+    add_code_slide(prs, "Question 5(i): Day 0 Return Analysis - Code", code_q5i)
 
-# Slide 4: Question 5(i) - Results Table
-q5i_data = [
-    ["Abnormal, Non-SPAC", "2.918", "2.245", "3.010", "30"],
-    ["Normal, Non-SPAC", "-0.005", "0.000", "0.127", "3,400"],
-    ["Normal, SPAC", "-0.009", "0.000", "0.070", "251"]
-]
-add_table_slide(prs, "Question 5(i): Day 0 Return Statistics", 
-                q5i_data, 
-                ["Category", "Mean", "Median", "Std Dev", "Count"])
+    # Slide 4: Question 5(i) - Results Table
+    q5i_data = [
+        ["Abnormal, Non-SPAC", "2.918", "2.245", "3.010", "30"],
+        ["Normal, Non-SPAC", "-0.005", "0.000", "0.127", "3,400"],
+        ["Normal, SPAC", "-0.009", "0.000", "0.070", "251"]
+    ]
+    add_table_slide(prs, "Question 5(i): Day 0 Return Statistics", 
+                    q5i_data, 
+                    ["Category", "Mean", "Median", "Std Dev", "Count"])
 
-# Slide 5: Question 5(i) - Visualization
-add_image_slide(prs, "Question 5(i): Day 0 Returns - Visual Comparison", 
-                "day0_comparison.png",
-                "SPACs show lower but more stable Day 0 returns compared to Non-SPACs")
+    # Slide 5: Question 5(i) - Visualization
+    add_image_slide(prs, "Question 5(i): Day 0 Returns - Visual Comparison", 
+                    asset_path(assets, "day0_comparison.png"),
+                    "SPACs show lower but more stable Day 0 returns compared to Non-SPACs")
 
-# Slide 6: Question 5(i) - Key Findings
-add_content_slide(prs, "Question 5(i): Key Findings", [
-    "SPACs have lower and negative mean Day 0 returns:",
-    "  • SPACs: -0.88% vs Non-SPACs: +2.09%",
-    "",
-    "SPACs show significantly lower volatility:",
-    "  • SPAC std dev: 0.070 vs Non-SPAC: 0.408",
-    "",
-    "Abnormal returns (≥100%) only occur in Non-SPACs:",
-    "  • 30 cases with mean return of 292%",
-    "",
-    "Both groups have median returns of 0%:",
-    "  • Suggests many IPOs trade at offer price on Day 0"
-])
+    # Slide 6: Question 5(i) - Key Findings
+    add_content_slide(prs, "Question 5(i): Key Findings", [
+        "SPACs have lower and negative mean Day 0 returns:",
+        "  • SPACs: -0.88% vs Non-SPACs: +2.09%",
+        "",
+        "SPACs show significantly lower volatility:",
+        "  • SPAC std dev: 0.070 vs Non-SPAC: 0.408",
+        "",
+        "Abnormal returns (≥100%) only occur in Non-SPACs:",
+        "  • 30 cases with mean return of 292%",
+        "",
+        "Both groups have median returns of 0%:",
+        "  • Suggests many IPOs trade at offer price on Day 0"
+    ])
 
-# Slide 7: Question 5(ii) - Code
-code_q5ii = """# Analyze returns across multiple windows
+    # Slide 7: Question 5(ii) - Code
+    code_q5ii = """# Analyze returns across multiple windows
 windows = ['sym_5day_ret', 'sym_22day_ret', 
            'sym_91day_ret', 'sym_252day_ret']
 
@@ -229,31 +236,31 @@ for window in windows:
     print(f"{window} Statistics:")
     print(summary)"""
 
-add_code_slide(prs, "Question 5(ii): Multi-Window Analysis - Code", code_q5ii)
+    add_code_slide(prs, "Question 5(ii): Multi-Window Analysis - Code", code_q5ii)
 
-# Slide 8: Question 5(ii) - Results Table
-q5ii_data = [
-    ["5-day", "0.034", "0.021", "1.252", "0.276"],
-    ["22-day", "0.047", "0.030", "1.344", "0.377"],
-    ["91-day", "0.061", "0.030", "2.007", "0.477"],
-    ["252-day", "0.043", "0.013", "2.968", "0.157"]
-]
-add_table_slide(prs, "Question 5(ii): Mean Returns & Volatility by Window", 
-                q5ii_data,
-                ["Window", "Non-SPAC Mean", "SPAC Mean", "Non-SPAC Std", "SPAC Std"])
+    # Slide 8: Question 5(ii) - Results Table
+    q5ii_data = [
+        ["5-day", "0.034", "0.021", "1.252", "0.276"],
+        ["22-day", "0.047", "0.030", "1.344", "0.377"],
+        ["91-day", "0.061", "0.030", "2.007", "0.477"],
+        ["252-day", "0.043", "0.013", "2.968", "0.157"]
+    ]
+    add_table_slide(prs, "Question 5(ii): Mean Returns & Volatility by Window", 
+                    q5ii_data,
+                    ["Window", "Non-SPAC Mean", "SPAC Mean", "Non-SPAC Std", "SPAC Std"])
 
-# Slide 9: Question 5(ii) - Mean Returns Chart
-add_image_slide(prs, "Question 5(ii): Mean Returns Across Time Windows", 
-                "multiwindow_comparison.png",
-                "Non-SPACs consistently outperform SPACs across all time horizons")
+    # Slide 9: Question 5(ii) - Mean Returns Chart
+    add_image_slide(prs, "Question 5(ii): Mean Returns Across Time Windows", 
+                    asset_path(assets, "multiwindow_comparison.png"),
+                    "Non-SPACs consistently outperform SPACs across all time horizons")
 
-# Slide 10: Question 5(ii) - Volatility Chart
-add_image_slide(prs, "Question 5(ii): Return Volatility Comparison", 
-                "volatility_comparison.png",
-                "SPACs demonstrate consistently lower volatility than Non-SPACs")
+    # Slide 10: Question 5(ii) - Volatility Chart
+    add_image_slide(prs, "Question 5(ii): Return Volatility Comparison", 
+                    asset_path(assets, "volatility_comparison.png"),
+                    "SPACs demonstrate consistently lower volatility than Non-SPACs")
 
-# Slide 11: Question 6 - Code
-code_q6 = """# S&P 500 inclusion performance
+    # Slide 11: Question 6 - Code
+    code_q6 = """# S&P 500 inclusion performance
 sp_performance = stock_ipos.groupby('sp')[
     'sym_252day_ret'
 ].agg(['mean', 'median', 'std', 'count'])
@@ -263,35 +270,40 @@ russell_performance = stock_ipos.groupby('russell')[
     'sym_252day_ret'
 ].agg(['mean', 'median', 'std', 'count'])"""
 
-add_code_slide(prs, "Question 6: Index Inclusion Analysis - Code", code_q6)
+    add_code_slide(prs, "Question 6: Index Inclusion Analysis - Code", code_q6)
+
+    # Slide 12: Question 6 - Results & Visualizations
+    q6_data = [
+        ["Not in S&P 500", "0.037", "0.000", "3,630"],
+        ["In S&P 500", "0.293", "0.171", "51"],
+        ["Not in Russell 1000", "0.031", "-0.001", "3,538"],
+        ["In Russell 1000", "0.282", "0.134", "143"]
+    ]
+    add_table_slide(prs, "Question 6: Index Inclusion Performance (1-Year Returns)", 
+                    q6_data,
+                    ["Category", "Mean Return", "Median Return", "Count"])
 
-# Slide 12: Question 6 - Results & Visualizations
-q6_data = [
-    ["Not in S&P 500", "0.037", "0.000", "3,630"],
-    ["In S&P 500", "0.293", "0.171", "51"],
-    ["Not in Russell 1000", "0.031", "-0.001", "3,538"],
-    ["In Russell 1000", "0.282", "0.134", "143"]
-]
-add_table_slide(prs, "Question 6: Index Inclusion Performance (1-Year Returns)", 
-                q6_data,
-                ["Category", "Mean Return", "Median Return", "Count"])
+    # Slide 13: Conclusion
+    add_content_slide(prs, "Key Conclusions", [
+        "Question 5 - SPAC vs Non-SPAC Performance:",
+        "  • SPACs underperform across all time horizons",
+        "  • SPACs offer lower volatility and more stable returns",
+        "  • Non-SPACs have extreme outliers (both positive and negative)",
+        "",
+        "Question 6 - Index Inclusion Impact:",
+        "  • Index inclusion strongly predicts superior performance",
+        "  • S&P 500 included: 29.3% vs 3.7% mean 1-year return",
+        "  • Russell 1000 included: 28.2% vs 3.1% mean 1-year return",
+        "  • Included stocks show lower volatility despite higher returns",
+        "  • Very selective: only 1.4% achieve S&P 500, 3.9% Russell 1000"
+    ])
 
-# Slide 13: Conclusion
-add_content_slide(prs, "Key Conclusions", [
-    "Question 5 - SPAC vs Non-SPAC Performance:",
-    "  • SPACs underperform across all time horizons",
-    "  • SPACs offer lower volatility and more stable returns",
-    "  • Non-SPACs have extreme outliers (both positive and negative)",
-    "",
-    "Question 6 - Index Inclusion Impact:",
-    "  • Index inclusion strongly predicts superior performance",
-    "  • S&P 500 included: 29.3% vs 3.7% mean 1-year return",
-    "  • Russell 1000 included: 28.2% vs 3.1% mean 1-year return",
-    "  • Included stocks show lower volatility despite higher returns",
-    "  • Very selective: only 1.4% achieve S&P 500, 3.9% Russell 1000"
-])
+    # Save presentation
+    output_file = 'IPO_Analysis_Q5_Q6.pptx'
+    prs.save(output_file)
+    print(f"PowerPoint presentation created successfully: {output_file}")
+    print(f"Total slides: {len(prs.slides)}")
+    return output_file
 
-# Save presentation
-prs.save('IPO_Analysis_Q5_Q6.pptx')
-print("PowerPoint presentation created successfully: IPO_Analysis_Q5_Q6.pptx")
-print(f"Total slides: {len(prs.slides)}")
+if __name__ == "__main__":
+    create_presentation()
@@ -0,0 +1,396 @@
+"""
+Schema and data-quality validation for the raw IPO file
+
+validate() runs every check as a vectorized pass over the raw frame (as read
+by load_and_prep_data(), before any cleaning) and returns a ValidationReport:
+per check, its severity, the number of violating rows and their row indices,
+stored compactly as ranges. Rows failing an 'error' check can be moved to a
+quarantine file; 'warning' checks are only reported.
+
+Checks:
+  schema           required columns present, return columns numeric
+  missing_date     ipo_date is null                                  (error)
+  bad_date         ipo_date is not a valid date in a format
+                   parse_ipo_dates() reads (ipo_dates.DATE_FORMATS)  (error)
+  mixed_dates      ipo_date uses a minority format (m/d/yy vs ISO)   (warning)
+  missing_symbol   symbol is null                                    (error)
+  duplicate_symbol symbol appears more than once                     (warning)
+  duplicate_row    row is an exact duplicate of an earlier one       (error)
+  impossible_return a sym_/iwv_ return is below -100%                (error)
+  window_mismatch  sym_ window present but the iwv_ one missing, or
+                   vice versa                                        (warning)
+  index_range      an iwv_ (Russell 3000 ETF) return beyond +/-100%  (warning)
+
+Date strings are checked once per distinct value, so the cost does not grow
+with the number of rows sharing a date. Repeated symbols are found by
+sorting: symbols of up to 8 bytes are read straight from the Arrow string
+buffer as one uint64 each, so the check is a machine-word sort plus a lookup
+of the few repeated values, not a hash table over every symbol string.
+
+    python data_validation.py                    # validate stock_ipos_20231004.csv
+    python data_validation.py --benchmark 100    # overhead vs load time at 100x scale
+    python data_validation.py --check            # quarantined loads of ISO / bad dates
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from ipo_dates import DATE_FORMATS, clear_cache, parse_ipo_dates
+
+RAW_FILE = 'stock_ipos_20231004.csv'
+REPORT_FILE = 'validation_report.json'
+QUARANTINE_FILE = 'stock_ipos_quarantine.csv'
+
+WINDOWS = ['day0_OTC', '1day_ret', '5day_ret', '22day_ret', '91day_ret', '252day_ret']
+RETURN_COLUMNS = [f'{p}_{w}' for p in ('sym', 'iwv') for w in WINDOWS]
+REQUIRED_COLUMNS = ['symbol', 'sector', 'industry', 'ipo_date'] + RETURN_COLUMNS
+
+MAX_LISTED_ROWS = 10_000
+
+
+def _ranges(indices):
+    """Compress sorted row indices to [[start, stop], ...] (stop inclusive)"""
+    if len(indices) == 0:
+        return []
+    idx = np.asarray(indices, dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(idx) != 1)
+    starts = np.concatenate(([idx[0]], idx[breaks + 1]))
+    stops = np.concatenate((idx[breaks], [idx[-1]]))
+    return np.column_stack((starts, stops)).tolist()
+
+
+class ValidationReport:
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+        self.checks = {}  # name -> (severity, mask or None, message)
+
+    def add(self, name, severity, mask, message=''):
+        self.checks[name] = (severity, mask, message)
+
+    def rows(self, name):
+        mask = self.checks[name][1]
+        return np.flatnonzero(mask) if mask is not None else np.array([], dtype=np.int64)
+
+    def error_mask(self):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for severity, m, _ in self.checks.values():
+            if severity == 'error' and m is not None:
+                mask |= m
+        return mask
+
+    def to_dict(self):
+        out = {'rows': self.n_rows, 'checks': {}}
+        for name, (severity, mask, message) in self.checks.items():
+            idx = self.rows(name)
+            out['checks'][name] = {
+                'severity': severity,
+                'count': int(len(idx)) if mask is not None else None,
+                'message': message,
+                'rows': _ranges(idx[:MAX_LISTED_ROWS]),
+            }
+        return out
+
+    def summary(self):
+        parts = []
+        for name, (severity, mask, message) in self.checks.items():
+            if mask is None:
+                parts.append(f"{name}: {message}")
+            elif mask.any():
+                parts.append(f"{name}: {int(mask.sum())} {severity}{'s' if mask.sum() != 1 else ''}")
+        return "; ".join(parts) if parts else "all checks passed"
+
+    def write(self, path=REPORT_FILE):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+
+# little-endian masks keeping the first k bytes of a uint64, k = 0..8
+_BYTE_MASKS = np.array([(1 << (8 * k)) - 1 for k in range(8)] + [2**64 - 1], dtype=np.uint64)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _word_keys(values):
+    """One uint64 per value holding its UTF-8 bytes (0 where missing), for
+    Arrow-backed strings of at most 8 bytes without NULs; otherwise None"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    if not hasattr(values.array, '__arrow_array__') or len(values) == 0:
+        return None
+    arr = values.array.__arrow_array__()
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    if not (pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type)):
+        return None
+    offsets_type = np.dtype(np.int64 if pa.types.is_large_string(arr.type) else np.int32)
+    _, offsets, data = arr.buffers()
+    offsets = np.frombuffer(offsets, dtype=offsets_type, count=len(arr) + 1,
+                            offset=arr.offset * offsets_type.itemsize).astype(np.int64)
+    lengths = np.diff(offsets)
+    data = np.frombuffer(data, dtype=np.uint8)[offsets[0]:offsets[-1]] if data is not None else np.zeros(0, np.uint8)
+    if lengths.max() > 8 or not data.all():
+        return None  # too long, or an embedded NUL that would compare equal to padding
+    # an overlapping uint64 window at every byte offset: one unaligned load per value
+    padded = np.zeros(len(data) + 8, dtype=np.uint8)
+    padded[:len(data)] = data
+    windows = np.ndarray(shape=(len(data) + 1,), dtype='<u8', buffer=padded, strides=(1,))
+    return windows[offsets[:-1] - offsets[0]] & _BYTE_MASKS[lengths]
+
+
+def _repeated(values, missing):
+    """(rows whose non-missing value occurs more than once, the uint64 keys from
+    _word_keys or None)
+
+    With word keys this is a sort of (32-bit key hash, row) pairs; only rows
+    sharing a hash get the exact comparison.
+    """
+    keys = _word_keys(values)
+    if keys is None or len(values) >= 2**32:
+        codes, uniques = pd.factorize(values.array)
+        repeated = np.bincount(codes[~missing], minlength=max(len(uniques), 1)) > 1
+        return ~missing & repeated[np.where(missing, 0, codes)], None
+    rows = np.flatnonzero(~missing).astype(np.uint64)
+    pairs = np.sort(((keys[rows] * _MIX) >> np.uint64(32) << np.uint64(32)) | rows)
+    same = (pairs[1:] >> np.uint64(32)) == (pairs[:-1] >> np.uint64(32))
+    shared = np.zeros(len(pairs), dtype=bool)
+    shared[1:] |= same
+    shared[:-1] |= same
+    candidates = (pairs[shared] & np.uint64(0xFFFFFFFF)).astype(np.int64)
+    out = np.zeros(len(values), dtype=bool)
+    out[candidates] = pd.Series(keys[candidates], copy=False).duplicated(keep=False).to_numpy()
+    return out, keys
+
+
+def _row_hash(columns, rows):
+    """Cheap uint64 mix of the given uint64 / float64 columns at `rows`; equal rows hash equal"""
+    h = np.zeros(len(rows), dtype=np.uint64)
+    for values in columns:
+        values = values[rows]
+        if values.dtype == np.float64:
+            values = np.where(np.isnan(values), np.nan, values).view(np.uint64)  # one NaN bit pattern
+        h = (h ^ values.astype(np.uint64, copy=False)) * _MIX
+    return h
+
+
+def _check_dates(values, report, factorized=None):
+    """missing_date, bad_date and mixed_dates, evaluated once per distinct string
+
+    factorized: pd.factorize(values) if the caller already has it. Returns the
+    date codes (-1 = missing).
+    """
+    codes, uniques = factorized if factorized is not None else pd.factorize(values)
+    missing = codes < 0
+    report.add('missing_date', 'error', missing)
+    if len(uniques) == 0:
+        return codes
+    text = pd.Series(uniques, dtype=str)
+    fmt_of_unique = np.full(len(uniques), -1, dtype=np.int8)
+    valid_unique = np.zeros(len(uniques), dtype=bool)
+    names = list(DATE_FORMATS)
+    for f, name in enumerate(names):
+        pattern, strptime_format = DATE_FORMATS[name]
+        matches = text.str.match(pattern).to_numpy(dtype=bool) & (fmt_of_unique < 0)
+        fmt_of_unique[matches] = f
+        parsed = pd.to_datetime(text[matches], format=strptime_format, errors='coerce')
+        valid_unique[matches] = parsed.notna().to_numpy()
+    # code -1 (missing) indexes the extra last slot of each lookup table
+    report.add('bad_date', 'error', ~np.append(valid_unique, True)[codes])
+
+    rows_per_unique = np.bincount(codes[~missing], minlength=len(uniques))
+    known = fmt_of_unique >= 0
+    counts = np.bincount(fmt_of_unique[known], weights=rows_per_unique[known], minlength=len(names))
+    if (counts > 0).sum() > 1:
+        majority = int(counts.argmax())
+        minority = known & (fmt_of_unique != majority)
+        report.add('mixed_dates', 'warning', np.append(minority, False)[codes],
+                   f"majority format {names[majority]}")
+    else:
+        report.add('mixed_dates', 'warning', np.zeros(len(values), dtype=bool))
+    return codes
+
+
+def validate(raw, dates=None):
+    """ValidationReport for a raw IPO frame
+
+    dates: pd.factorize(raw['ipo_date']), when the loader has it anyway for
+    parse_ipo_dates(); the date checks then reuse it.
+    """
+    n = len(raw)
+    report = ValidationReport(n)
+
+    missing_cols = [c for c in REQUIRED_COLUMNS if c not in raw.columns]
+    non_numeric = [c for c in RETURN_COLUMNS if c in raw.columns and not pd.api.types.is_numeric_dtype(raw[c])]
+    if missing_cols or non_numeric:
+        msg = ", ".join(filter(None, [missing_cols and f"missing columns {missing_cols}",
+                                      non_numeric and f"non-numeric columns {non_numeric}"]))
+        report.add('schema', 'error', None, msg)
+    else:
+        report.add('schema', 'error', np.zeros(n, dtype=bool))
+
+    date_codes = _check_dates(raw['ipo_date'], report, dates) if 'ipo_date' in raw.columns else None
+
+    present = [c for c in RETURN_COLUMNS if c in raw.columns and c not in non_numeric]
+    columns = {c: raw[c].to_numpy(dtype=float) for c in present}
+
+    if 'symbol' in raw.columns:
+        missing = raw['symbol'].isna().to_numpy()
+        dup_symbol, symbol_keys = _repeated(raw['symbol'], missing)
+        report.add('missing_symbol', 'error', missing)
+        report.add('duplicate_symbol', 'warning', dup_symbol)
+        # an exact duplicate row necessarily repeats its symbol, so only those
+        # rows are candidates; a hash of the symbol, date and returns narrows
+        # them down before the (expensive) whole-row comparison
+        dup_row = np.zeros(n, dtype=bool)
+        candidates = np.flatnonzero(dup_symbol)
+        if symbol_keys is not None and date_codes is not None:
+            h = _row_hash([symbol_keys, date_codes.astype(np.int64).view(np.uint64), *columns.values()], candidates)
+            candidates = candidates[pd.Series(h, copy=False).duplicated(keep=False).to_numpy()]
+        dup_row[candidates] = raw.iloc[candidates].duplicated(keep='first').to_numpy()
+        report.add('duplicate_row', 'error', dup_row)
+    else:
+        report.add('duplicate_row', 'error', raw.duplicated(keep='first').to_numpy())
+
+    if columns:
+        # one pass per column, accumulating into preallocated masks
+        impossible, out_of_range, mismatch = (np.zeros(n, dtype=bool) for _ in range(3))
+        a, b = np.empty(n, dtype=bool), np.empty(n, dtype=bool)
+        for col, values in columns.items():
+            np.less(values, -1, out=a)
+            impossible |= a
+            if col.startswith('iwv_'):
+                out_of_range |= a
+                out_of_range |= np.greater(values, 1, out=b)
+        pairs = [(columns[f'sym_{w}'], columns[f'iwv_{w}']) for w in WINDOWS
+                 if f'sym_{w}' in columns and f'iwv_{w}' in columns]
+        for sym, iwv in pairs:
+            mismatch |= np.not_equal(np.isnan(sym, out=a), np.isnan(iwv, out=b), out=a)
+        report.add('impossible_return', 'error', impossible)
+        if pairs:
+            report.add('window_mismatch', 'warning', mismatch)
+        if any(c.startswith('iwv_') for c in columns):
+            report.add('index_range', 'warning', out_of_range)
+    return report
+
+
+def quarantine(raw, report, path=QUARANTINE_FILE):
+    """Split off rows failing an error check; writes them to `path` and returns the clean frame"""
+    bad = report.error_mask()
+    if bad.any():
+        raw[bad].to_csv(path)
+    return raw[~bad]
+
+
+def benchmark(scale, repeat=5):
+    """Validation time against load time on `scale` copies of the raw file
+
+    Each copy gets its own symbols (suffix .1, .2, ...) so the scaled file has
+    the same duplicate structure as the real one. Load and validation are
+    timed `repeat` times (date cache cleared each time) and the medians compared.
+    """
+    raw = pd.read_csv(RAW_FILE)
+    copies = [raw]
+    for i in range(1, scale):
+        copy = raw.copy()
+        copy['symbol'] = copy['symbol'] + f'.{i}'
+        copies.append(copy)
+    path = f'stock_ipos_x{scale}.csv'
+    pd.concat(copies, ignore_index=True).to_csv(path, index=False)
+
+    loads, checks = [], []
+    try:
+        for _ in range(repeat):
+            clear_cache()
+            # as in load_and_prep_data(): the date factorization is part of the load
+            start = time.perf_counter()
+            frame = pd.read_csv(path)
+            codes, uniques = pd.factorize(frame['ipo_date'])
+            loaded = time.perf_counter()
+            report = validate(frame, dates=(codes, uniques))
+            validated = time.perf_counter()
+            frame = frame.dropna(subset=['ipo_date'])
+            frame['ipo_date'] = parse_ipo_dates(frame['ipo_date'], factorized=(codes[codes >= 0], uniques))
+            prepared = time.perf_counter()
+            loads.append((loaded - start) + (prepared - validated))
+            checks.append(validated - loaded)
+    finally:
+        os.remove(path)
+
+    load, check = np.median(loads), np.median(checks)
+    print(f"{len(frame):,} rows, median of {repeat}: load {load:.3f}s, validation {check:.3f}s "
+          f"({100 * check / load:.1f}% of load)")
+    print(report.summary())
+
+
+def check():
+    """Load edited copies of the raw file with quarantine on and compare with the original
+
+    Dates the validator accepts must load to the same rows and dates; dates it
+    flags must be quarantined rather than reach the parser. Raises AssertionError.
+    """
+    import tempfile
+    from contextlib import redirect_stdout
+    from io import StringIO
+    from project1_analysis import load_and_prep_data
+
+    raw = pd.read_csv(RAW_FILE)
+    dated = raw['ipo_date'].notna().to_numpy()
+    iso = pd.to_datetime(raw['ipo_date'], format=DATE_FORMATS['m/d/yy'][1]).dt.strftime(DATE_FORMATS['iso'][1])
+    first, second, third = np.flatnonzero(dated)[:3]
+    one_iso = raw.copy()
+    one_iso.loc[first, 'ipo_date'] = iso[first]
+    all_iso = raw.copy()
+    all_iso['ipo_date'] = iso
+    bad = one_iso.copy()
+    bad.loc[[second, third], 'ipo_date'] = ['2022-13-45', 'Sept 2022']
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # report and quarantine files land here
+        try:
+            def load(frame):
+                frame.to_csv('raw.csv', index=False)
+                clear_cache()
+                with redirect_stdout(StringIO()):
+                    return load_and_prep_data(quarantine_bad_rows=True, path='raw.csv'), validate(frame)
+
+            expected, _ = load(raw)
+            for label, frame, checks, dropped in (
+                    ("one ISO date", one_iso, {'mixed_dates': 1}, []),
+                    ("all ISO dates", all_iso, {}, []),
+                    ("invalid dates", bad, {'bad_date': 2, 'mixed_dates': 2}, [second, third])):
+                loaded, report = load(frame)
+                found = {name: len(report.rows(name)) for name in ('bad_date', 'mixed_dates')}
+                assert found == {'bad_date': 0, 'mixed_dates': 0, **checks}, (label, found)
+                pd.testing.assert_frame_equal(loaded, expected.drop(index=dropped))
+                print(f"{label:<14} {report.summary()}; {len(loaded):,} rows load as expected")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate the raw IPO file")
+    parser.add_argument('path', nargs='?', default=RAW_FILE)
+    parser.add_argument('--quarantine', action='store_true', help=f"write failing rows to {QUARANTINE_FILE}")
+    parser.add_argument('--benchmark', type=int, metavar='SCALE')
+    parser.add_argument('--check', action='store_true', help="load snapshots with ISO and invalid dates")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+    elif args.check:
+        check()
+    else:
+        raw = pd.read_csv(args.path)
+        report = validate(raw)
+        report.write()
+        print(report.summary())
+        print(f"Report written to {REPORT_FILE}")
+        if args.quarantine:
+            clean = quarantine(raw, report)
+            print(f"Quarantined {len(raw) - len(clean)} rows to {QUARANTINE_FILE}")
@@ -1,6 +1,22 @@
-from pptx import Presentation
 import os
 
+from compare_presentations import parse_deck, PICTURE, TABLE
+
+
+def _deck_lines(slides):
+    """Per-slide summary lines from cached slide fingerprints"""
+    lines = [f"Total Slides: {len(slides)}"]
+    for i, slide in enumerate(slides, 1):
+        texts = slide['texts']
+        lines.append(f"\n  SLIDE {i}:")
+        lines.append(f"    - Images: {'Yes' if PICTURE in slide['shape_types'] else 'No'}")
+        lines.append(f"    - Tables: {'Yes' if TABLE in slide['shape_types'] else 'No'}")
+        lines.append(f"    - Text elements: {len(texts)}")
+        if texts:
+            lines.append(f"    - Title/First text: {texts[0][:80]}")
+    return lines
+
+
 def get_detailed_comparison():
     """Create detailed comparison of both presentations"""
     
@@ -17,28 +33,8 @@ def get_detailed_comparison():
     output.append("-" * 100)
     
     if os.path.exists(file1):
-        prs1 = Presentation(file1)
-        output.append(f"Total Slides: {len(prs1.slides)}")
-        
-        for i, slide in enumerate(prs1.slides, 1):
-            output.append(f"\n  SLIDE {i}:")
-            texts = []
-            has_image = False
-            has_table = False
-            
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text.strip():
-                    texts.append(shape.text.strip())
-                if shape.shape_type == 13:
-                    has_image = True
-                if shape.shape_type == 19:
-                    has_table = True
-            
-            output.append(f"    - Images: {'Yes' if has_image else 'No'}")
-            output.append(f"    - Tables: {'Yes' if has_table else 'No'}")
-            output.append(f"    - Text elements: {len(texts)}")
-            if texts:
-                output.append(f"    - Title/First text: {texts[0][:80]}")
+        slides1 = parse_deck(file1)
+        output.extend(_deck_lines(slides1))
     else:
         output.append(f"  ERROR: File not found")
     
@@ -48,28 +44,8 @@ def get_detailed_comparison():
     output.append("-" * 100)
     
     if os.path.exists(file2):
-        prs2 = Presentation(file2)
-        output.append(f"Total Slides: {len(prs2.slides)}")
-        
-        for i, slide in enumerate(prs2.slides, 1):
-            output.append(f"\n  SLIDE {i}:")
-            texts = []
-            has_image = False
-            has_table = False
-            
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text.strip():
-                    texts.append(shape.text.strip())
-                if shape.shape_type == 13:
-                    has_image = True
-                if shape.shape_type == 19:
-                    has_table = True
-            
-            output.append(f"    - Images: {'Yes' if has_image else 'No'}")
-            output.append(f"    - Tables: {'Yes' if has_table else 'No'}")
-            output.append(f"    - Text elements: {len(texts)}")
-            if texts:
-                output.append(f"    - Title/First text: {texts[0][:80]}")
+        slides2 = parse_deck(file2)
+        output.extend(_deck_lines(slides2))
     else:
         output.append(f"  ERROR: File not found")
     
@@ -79,27 +55,24 @@ def get_detailed_comparison():
     output.append("=" * 100)
     
     if os.path.exists(file1) and os.path.exists(file2):
-        prs1 = Presentation(file1)
-        prs2 = Presentation(file2)
-        
         output.append(f"\nSlide Count:")
-        output.append(f"  - {file1}: {len(prs1.slides)} slides")
-        output.append(f"  - {file2}: {len(prs2.slides)} slides")
-        output.append(f"  - Difference: {abs(len(prs1.slides) - len(prs2.slides))} slides")
+        output.append(f"  - {file1}: {len(slides1)} slides")
+        output.append(f"  - {file2}: {len(slides2)} slides")
+        output.append(f"  - Difference: {abs(len(slides1) - len(slides2))} slides")
         
         # Count visual elements
-        images1 = sum(1 for slide in prs1.slides for shape in slide.shapes if shape.shape_type == 13)
-        images2 = sum(1 for slide in prs2.slides for shape in slide.shapes if shape.shape_type == 13)
+        images1 = sum(slide['shape_types'].count(PICTURE) for slide in slides1)
+        images2 = sum(slide['shape_types'].count(PICTURE) for slide in slides2)
         
-        tables1 = sum(1 for slide in prs1.slides for shape in slide.shapes if shape.shape_type == 19)
-        tables2 = sum(1 for slide in prs2.slides for shape in slide.shapes if shape.shape_type == 19)
+        tables1 = sum(slide['shape_types'].count(TABLE) for slide in slides1)
+        tables2 = sum(slide['shape_types'].count(TABLE) for slide in slides2)
         
         output.append(f"\nVisual Elements:")
         output.append(f"  - {file1}: {images1} images, {tables1} tables")
         output.append(f"  - {file2}: {images2} images, {tables2} tables")
         
         output.append(f"\nKey Differences:")
-        if len(prs1.slides) < len(prs2.slides):
+        if len(slides1) < len(slides2):
             output.append(f"  - {file1} has FEWER slides (13 vs 15)")
             output.append(f"  - {file1} is more CONCISE and FOCUSED")
         
@@ -113,12 +86,13 @@ def get_detailed_comparison():
     
     return "\n".join(output)
 
-# Generate and save comparison
-comparison_text = get_detailed_comparison()
-print(comparison_text)
+if __name__ == "__main__":
+    # Generate and save comparison
+    comparison_text = get_detailed_comparison()
+    print(comparison_text)
 
-# Save to file
-with open('detailed_comparison.txt', 'w', encoding='utf-8') as f:
-    f.write(comparison_text)
+    # Save to file
+    with open('detailed_comparison.txt', 'w', encoding='utf-8') as f:
+        f.write(comparison_text)
 
-print("\n\nDetailed comparison saved to: detailed_comparison.txt")
+    print("\n\nDetailed comparison saved to: detailed_comparison.txt")
@@ -1,24 +1,207 @@
+import hashlib
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 try:
     from pypdf import PdfReader
 except ImportError:
     print("pypdf not installed.")
     sys.exit(1)
 
-def extract_text(pdf_path, output_path):
-    try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        
-        with open(output_path, "w", encoding="utf-8") as f:
+CACHE_DIR = '.pdf_text_cache'
+PAGES_PER_TASK = 8
+
+
+def pdf_hash(pdf_path):
+    """SHA-256 of a PDF file; keys the per-page cache"""
+    h = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_path(digest, page_no, cache_dir):
+    return os.path.join(cache_dir, digest, f"{page_no:06d}.txt")
+
+
+def _read_cached(digest, page_no, cache_dir):
+    path = _cache_path(digest, page_no, cache_dir)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    return None
+
+
+def _page_count(pdf_path, digest, cache_dir):
+    """Number of pages, cached alongside the page texts"""
+    path = os.path.join(cache_dir, digest, 'pages')
+    if os.path.exists(path):
+        with open(path) as f:
+            return int(f.read())
+    n_pages = len(PdfReader(pdf_path).pages)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(str(n_pages))
+    return n_pages
+
+
+def _extract_range(pdf_path, digest, page_numbers, cache_dir):
+    """Worker: extract the given pages, cache each one, return [(page_no, text)]"""
+    reader = PdfReader(pdf_path)
+    os.makedirs(os.path.join(cache_dir, digest), exist_ok=True)
+    results = []
+    for page_no in page_numbers:
+        text = reader.pages[page_no].extract_text()
+        path = _cache_path(digest, page_no, cache_dir)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
             f.write(text)
-        return "Text extracted to " + output_path
-    except Exception as e:
-        return str(e)
+        os.replace(path + '.tmp', path)
+        results.append((page_no, text))
+    return results
+
+
+class _OrderedWriter:
+    """Writes pages to the output in order as soon as they are available
+
+    The output is written to a temporary file, opened when the first page
+    arrives, and renamed into place after the last one, so a batch never
+    holds more open files than PDFs in progress and a failed PDF never
+    leaves a truncated output behind.
+    """
+
+    def __init__(self, output_path, n_pages):
+        self.output_path = output_path
+        self.tmp_path = output_path + '.tmp'
+        self.f = None
+        self.n_pages = n_pages
+        self.next_page = 0
+        self.pending = {}
+        if n_pages == 0:
+            self._finish()
+
+    def add(self, page_no, text):
+        self.pending[page_no] = text
+        while self.next_page in self.pending:
+            if self.f is None:
+                self.f = open(self.tmp_path, 'w', encoding='utf-8')
+            self.f.write(self.pending.pop(self.next_page) + "\n")
+            self.next_page += 1
+        if self.done:
+            self._finish()
+
+    def _finish(self):
+        if self.f is None:
+            self.f = open(self.tmp_path, 'w', encoding='utf-8')
+        self.f.close()
+        os.replace(self.tmp_path, self.output_path)
+
+    def discard(self):
+        """Close and remove the partial output"""
+        if self.f is not None and not self.f.closed:
+            self.f.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    @property
+    def done(self):
+        return self.next_page == self.n_pages
+
+
+def _error(exc):
+    return f"{type(exc).__name__}: {exc}"
+
+
+def extract_many(jobs, workers=None, cache_dir=CACHE_DIR, pages_per_task=PAGES_PER_TASK):
+    """Extract several PDFs in one process pool; jobs is [(pdf_path, output_path)]
+
+    A PDF that cannot be read is recorded and skipped; the others still
+    complete. Returns ({pdf_path: (pages, pages served from cache)},
+    {pdf_path: error}).
+    """
+    writers, stats, failed, tasks = {}, {}, {}, []
+    try:
+        for pdf_path, output_path in jobs:
+            try:
+                digest = pdf_hash(pdf_path)
+                n_pages = _page_count(pdf_path, digest, cache_dir)
+                cached = {page_no: _read_cached(digest, page_no, cache_dir) for page_no in range(n_pages)}
+                missing = [page_no for page_no, text in cached.items() if text is None]
+                writer = writers[pdf_path] = _OrderedWriter(output_path, n_pages)
+                if missing:
+                    # cached pages wait in memory until the extracted ones catch up
+                    writer.pending.update((p, text) for p, text in cached.items() if text is not None)
+                else:
+                    for page_no, text in cached.items():
+                        writer.add(page_no, text)
+            except Exception as exc:
+                failed[pdf_path] = _error(exc)
+                if pdf_path in writers:
+                    writers.pop(pdf_path).discard()
+                continue
+            stats[pdf_path] = (n_pages, n_pages - len(missing))
+            for i in range(0, len(missing), pages_per_task):
+                tasks.append((pdf_path, digest, missing[i:i + pages_per_task]))
+
+        if tasks:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_extract_range, pdf_path, digest, pages, cache_dir): pdf_path
+                           for pdf_path, digest, pages in tasks}
+                for fut in as_completed(futures):
+                    pdf_path = futures[fut]
+                    if pdf_path in failed:
+                        continue
+                    try:
+                        for page_no, text in fut.result():
+                            writers[pdf_path].add(page_no, text)
+                    except Exception as exc:
+                        failed[pdf_path] = _error(exc)
+                        stats.pop(pdf_path, None)
+                        writers.pop(pdf_path).discard()
+    finally:
+        for writer in writers.values():
+            if not writer.done:
+                writer.discard()
+    return stats, failed
+
+
+def pdf_pages(pdf_path, cache_dir=CACHE_DIR):
+    """List of page texts, served from the per-page cache where possible"""
+    digest = pdf_hash(pdf_path)
+    texts = [_read_cached(digest, page_no, cache_dir)
+             for page_no in range(_page_count(pdf_path, digest, cache_dir))]
+    missing = [page_no for page_no, text in enumerate(texts) if text is None]
+    if missing:
+        for page_no, text in _extract_range(pdf_path, digest, missing, cache_dir):
+            texts[page_no] = text
+    return texts
+
+
+def extract_text(pdf_path, output_path):
+    stats, failed = extract_many([(pdf_path, output_path)])
+    if pdf_path in failed:
+        return failed[pdf_path]
+    pages, cached = stats[pdf_path]
+    return f"Text extracted to {output_path} ({pages} pages, {cached} from cache)"
+
+
+def extract_directory(pdf_dir, output_dir):
+    """Extract every PDF in pdf_dir to output_dir/<name>.txt in a single batch"""
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(os.path.join(pdf_dir, name), os.path.join(output_dir, os.path.splitext(name)[0] + '.txt'))
+            for name in sorted(os.listdir(pdf_dir)) if name.lower().endswith('.pdf')]
+    stats, failed = extract_many(jobs)
+    for pdf_path, (pages, cached) in stats.items():
+        print(f"{pdf_path}: {pages} pages ({cached} from cache)")
+    for pdf_path, error in failed.items():
+        print(f"{pdf_path}: FAILED ({error})")
+    return f"Extracted {len(stats)} of {len(jobs)} PDF(s) to {output_dir}"
+
 
 if __name__ == "__main__":
-    pdf_path = "Project-1-revised.docx.pdf"
-    output_path = "extracted_text.txt"
-    print(extract_text(pdf_path, output_path))
+    if len(sys.argv) == 3 and os.path.isdir(sys.argv[1]):
+        print(extract_directory(sys.argv[1], sys.argv[2]))
+    else:
+        pdf_path = sys.argv[1] if len(sys.argv) > 1 else "Project-1-revised.docx.pdf"
+        output_path = sys.argv[2] if len(sys.argv) > 2 else "extracted_text.txt"
+        print(extract_text(pdf_path, output_path))
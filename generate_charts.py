@@ -3,6 +3,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from ipo_dates import parse_ipo_dates
+
 # Set style
 sns.set_style('whitegrid')
 plt.rcParams['figure.figsize'] = (10, 6)
@@ -11,7 +13,7 @@ plt.rcParams['figure.figsize'] = (10, 6)
 print("Loading data...")
 stock_ipos = pd.read_csv('stock_ipos_20231004.csv')
 stock_ipos = stock_ipos.dropna(subset=['ipo_date'])
-stock_ipos['ipo_date'] = pd.to_datetime(stock_ipos['ipo_date'])
+stock_ipos['ipo_date'] = parse_ipo_dates(stock_ipos['ipo_date'])
 
 # Identify SPACs
 stock_spacs = pd.read_excel('list_of_all_spacs.xlsx')
@@ -9,9 +9,18 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 import os
 
-def create_comprehensive_pdf():
-    """Generate comprehensive PDF report with graphs and explanations"""
+from report_assets import asset_path, target_assets
+
+def create_comprehensive_pdf(assets=None):
+    """Generate comprehensive PDF report with graphs and explanations
+
+    assets: optional {chart name: image path} mapping; defaults to the PDF
+    variants from report_assets
+    """
     
+    if assets is None:
+        assets = target_assets('pdf')
+
     pdf_filename = "IPO_Analysis_Report_Q5_Q6.pdf"
     doc = SimpleDocTemplate(pdf_filename, pagesize=letter,
                            rightMargin=72, leftMargin=72,
@@ -158,10 +167,10 @@ def create_comprehensive_pdf():
     ))
     
     # Add graph if exists
-    if os.path.exists('day0_comparison.png'):
+    if os.path.exists(asset_path(assets, 'day0_comparison.png')):
         elements.append(Spacer(1, 0.1*inch))
         elements.append(Paragraph("<b>Figure 1: Day 0 Return Comparison - SPAC vs Non-SPAC</b>", body_style))
-        img = Image('day0_comparison.png', width=6*inch, height=2.5*inch)
+        img = Image(asset_path(assets, 'day0_comparison.png'), width=6*inch, height=2.5*inch)
         elements.append(img)
         elements.append(Spacer(1, 0.1*inch))
     
@@ -251,10 +260,10 @@ def create_comprehensive_pdf():
     ))
     
     # Add graph if exists
-    if os.path.exists('multiwindow_comparison.png'):
+    if os.path.exists(asset_path(assets, 'multiwindow_comparison.png')):
         elements.append(Spacer(1, 0.1*inch))
         elements.append(Paragraph("<b>Figure 2: Mean Returns Across Time Windows</b>", body_style))
-        img = Image('multiwindow_comparison.png', width=6*inch, height=3*inch)
+        img = Image(asset_path(assets, 'multiwindow_comparison.png'), width=6*inch, height=3*inch)
         elements.append(img)
         elements.append(Spacer(1, 0.1*inch))
     
@@ -270,9 +279,9 @@ def create_comprehensive_pdf():
     elements.append(PageBreak())
     
     # Add volatility graph if exists
-    if os.path.exists('volatility_comparison.png'):
+    if os.path.exists(asset_path(assets, 'volatility_comparison.png')):
         elements.append(Paragraph("<b>Figure 3: Return Volatility Across Time Windows</b>", body_style))
-        img = Image('volatility_comparison.png', width=6*inch, height=3*inch)
+        img = Image(asset_path(assets, 'volatility_comparison.png'), width=6*inch, height=3*inch)
         elements.append(img)
         elements.append(Spacer(1, 0.1*inch))
     
@@ -396,9 +405,9 @@ def create_comprehensive_pdf():
     elements.append(PageBreak())
     
     # Add index comparison graph if exists
-    if os.path.exists('index_comparison.png'):
+    if os.path.exists(asset_path(assets, 'index_comparison.png')):
         elements.append(Paragraph("<b>Figure 4: Index Inclusion Impact on One-Year Returns</b>", body_style))
-        img = Image('index_comparison.png', width=6*inch, height=3*inch)
+        img = Image(asset_path(assets, 'index_comparison.png'), width=6*inch, height=3*inch)
         elements.append(img)
         elements.append(Spacer(1, 0.1*inch))
     
@@ -500,21 +509,21 @@ def create_comprehensive_pdf():
     doc.build(elements)
     return pdf_filename
 
-# Generate PDF
-try:
-    pdf_file = create_comprehensive_pdf()
-    file_size = os.path.getsize(pdf_file)
-    print(f"✓ Comprehensive PDF report generated successfully!")
-    print(f"✓ Filename: {pdf_file}")
-    print(f"✓ File size: {file_size:,} bytes ({file_size/1024:.1f} KB)")
-    print(f"✓ Location: {os.path.abspath(pdf_file)}")
-    print(f"\n✓ Report includes:")
-    print(f"  - Paragraph format (no numbering)")
-    print(f"  - 4 embedded graphs with detailed explanations")
-    print(f"  - 4 statistical tables")
-    print(f"  - Comprehensive analysis of what values mean for IPO investing")
-    print(f"  - Investment implications and practical strategies")
-except Exception as e:
-    print(f"Error: {e}")
-    import traceback
-    traceback.print_exc()
+if __name__ == "__main__":
+    try:
+        pdf_file = create_comprehensive_pdf()
+        file_size = os.path.getsize(pdf_file)
+        print(f"✓ Comprehensive PDF report generated successfully!")
+        print(f"✓ Filename: {pdf_file}")
+        print(f"✓ File size: {file_size:,} bytes ({file_size/1024:.1f} KB)")
+        print(f"✓ Location: {os.path.abspath(pdf_file)}")
+        print(f"\n✓ Report includes:")
+        print(f"  - Paragraph format (no numbering)")
+        print(f"  - 4 embedded graphs with detailed explanations")
+        print(f"  - 4 statistical tables")
+        print(f"  - Comprehensive analysis of what values mean for IPO investing")
+        print(f"  - Investment implications and practical strategies")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -10,6 +10,10 @@ from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
 import datetime
 
+import pandas as pd
+
+from docx_tables import add_dataframe_table
+
 def add_horizontal_line(paragraph):
     """Add a horizontal line to a paragraph"""
     p = paragraph._p
@@ -145,48 +149,23 @@ def create_report():
     doc.add_heading('Results', level=3)
     doc.add_paragraph().add_run('Table 1: Day 0 Return Statistics by Level and SPAC Status').bold = True
     
-    # Create table
-    table = doc.add_table(rows=4, cols=7)
-    table.style = 'Light Grid Accent 1'
-    
-    # Header row
     headers = ['Category', 'Mean', 'Median', 'Std Dev', 'Count', 'Min', 'Max']
-    for i, header in enumerate(headers):
-        cell = table.rows[0].cells[i]
-        cell.text = header
-        cell.paragraphs[0].runs[0].font.bold = True
-    
-    # Data rows
     data = [
         ['Abnormal, Non-SPAC', '2.918', '2.245', '3.010', '30', '1.017', '17.750'],
         ['Normal, Non-SPAC', '-0.005', '0.000', '0.127', '3,400', '-0.851', '0.974'],
         ['Normal, SPAC', '-0.009', '0.000', '0.070', '251', '-0.550', '0.429']
     ]
-    
-    for i, row_data in enumerate(data, start=1):
-        for j, value in enumerate(row_data):
-            table.rows[i].cells[j].text = value
+    add_dataframe_table(doc, pd.DataFrame(data, columns=headers))
     
     doc.add_paragraph()
     doc.add_paragraph().add_run('Table 2: Overall Day 0 Return by SPAC Status').bold = True
     
-    table2 = doc.add_table(rows=3, cols=5)
-    table2.style = 'Light Grid Accent 1'
-    
     headers2 = ['Category', 'Mean', 'Median', 'Std Dev', 'Count']
-    for i, header in enumerate(headers2):
-        cell = table2.rows[0].cells[i]
-        cell.text = header
-        cell.paragraphs[0].runs[0].font.bold = True
-    
     data2 = [
         ['Non-SPAC', '0.021 (2.1%)', '0.000', '0.408', '3,430'],
         ['SPAC', '-0.009 (-0.9%)', '0.000', '0.070', '251']
     ]
-    
-    for i, row_data in enumerate(data2, start=1):
-        for j, value in enumerate(row_data):
-            table2.rows[i].cells[j].text = value
+    add_dataframe_table(doc, pd.DataFrame(data2, columns=headers2))
     
     doc.add_heading('Key Findings', level=3)
     findings_q5i = [
@@ -206,15 +185,7 @@ def create_report():
     doc.add_heading('Results', level=3)
     doc.add_paragraph().add_run('Table 3: Returns and Volatility Across Time Windows').bold = True
     
-    table3 = doc.add_table(rows=6, cols=7)
-    table3.style = 'Light Grid Accent 1'
-    
     headers3 = ['Window', 'Non-SPAC Mean', 'SPAC Mean', 'Non-SPAC Std', 'SPAC Std', 'Non-SPAC Median', 'SPAC Median']
-    for i, header in enumerate(headers3):
-        cell = table3.rows[0].cells[i]
-        cell.text = header
-        cell.paragraphs[0].runs[0].font.bold = True
-    
     data3 = [
         ['Day 0', '2.09%', '-0.88%', '0.408', '0.070', '0.00%', '0.00%'],
         ['5-day', '3.40%', '2.13%', '1.252', '0.276', '0.00%', '0.10%'],
@@ -222,10 +193,7 @@ def create_report():
         ['91-day', '6.07%', '3.02%', '2.007', '0.477', '0.10%', '0.92%'],
         ['252-day', '4.26%', '1.31%', '2.968', '0.157', '-0.70%', '3.73%']
     ]
-    
-    for i, row_data in enumerate(data3, start=1):
-        for j, value in enumerate(row_data):
-            table3.rows[i].cells[j].text = value
+    add_dataframe_table(doc, pd.DataFrame(data3, columns=headers3))
     
     doc.add_heading('Key Findings', level=3)
     findings_q5ii = [
@@ -247,22 +215,11 @@ def create_report():
     doc.add_heading('Results', level=3)
     doc.add_paragraph().add_run('Table 4: S&P 500 Inclusion Performance (1-Year Returns)').bold = True
     
-    table4 = doc.add_table(rows=3, cols=7)
-    table4.style = 'Light Grid Accent 1'
-    
-    for i, header in enumerate(headers):
-        cell = table4.rows[0].cells[i]
-        cell.text = header
-        cell.paragraphs[0].runs[0].font.bold = True
-    
     data4 = [
         ['Not Included', '3.71%', '0.00%', '2.885', '3,630', '-99.7%', '12,920%'],
         ['Included', '29.29%', '17.10%', '0.538', '51', '-71.8%', '244.8%']
     ]
-    
-    for i, row_data in enumerate(data4, start=1):
-        for j, value in enumerate(row_data):
-            table4.rows[i].cells[j].text = value
+    add_dataframe_table(doc, pd.DataFrame(data4, columns=headers))
     
     doc.add_heading('Key Findings', level=3)
     findings_sp500 = [
@@ -280,22 +237,11 @@ def create_report():
     doc.add_heading('Results', level=3)
     doc.add_paragraph().add_run('Table 5: Russell 1000 Inclusion Performance (1-Year Returns)').bold = True
     
-    table5 = doc.add_table(rows=3, cols=7)
-    table5.style = 'Light Grid Accent 1'
-    
-    for i, header in enumerate(headers):
-        cell = table5.rows[0].cells[i]
-        cell.text = header
-        cell.paragraphs[0].runs[0].font.bold = True
-    
     data5 = [
         ['Not Included', '3.09%', '-0.10%', '2.919', '3,538', '-99.7%', '12,920%'],
         ['Included', '28.16%', '13.38%', '0.738', '143', '-88.5%', '441.4%']
     ]
-    
-    for i, row_data in enumerate(data5, start=1):
-        for j, value in enumerate(row_data):
-            table5.rows[i].cells[j].text = value
+    add_dataframe_table(doc, pd.DataFrame(data5, columns=headers))
     
     doc.add_heading('Key Findings', level=3)
     findings_russell = [
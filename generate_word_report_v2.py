@@ -7,7 +7,13 @@ from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 import os
 
-def create_report():
+from report_assets import asset_path, target_assets
+
+def create_report(assets=None):
+    """Create the Word report; assets optionally maps chart names to prepared files"""
+    if assets is None:
+        assets = target_assets('docx')
+
     doc = Document()
     
     # Title
@@ -39,8 +45,8 @@ def create_report():
     doc.add_heading('Day 0 Return Analysis', level=2)
     
     # Add graph
-    if os.path.exists('day0_comparison.png'):
-        doc.add_picture('day0_comparison.png', width=Inches(6))
+    if os.path.exists(asset_path(assets, 'day0_comparison.png')):
+        doc.add_picture(asset_path(assets, 'day0_comparison.png'), width=Inches(6))
         last_paragraph = doc.paragraphs[-1]
         last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
     
@@ -66,8 +72,8 @@ def create_report():
     # Multi-window analysis
     doc.add_heading('Multi-Window Return Analysis', level=2)
     
-    if os.path.exists('multiwindow_comparison.png'):
-        doc.add_picture('multiwindow_comparison.png', width=Inches(6))
+    if os.path.exists(asset_path(assets, 'multiwindow_comparison.png')):
+        doc.add_picture(asset_path(assets, 'multiwindow_comparison.png'), width=Inches(6))
         last_paragraph = doc.paragraphs[-1]
         last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
     
@@ -96,8 +102,8 @@ def create_report():
     
     doc.add_heading('S&P 500 Inclusion Impact', level=2)
     
-    if os.path.exists('sp500_performance.png'):
-        doc.add_picture('sp500_performance.png', width=Inches(6))
+    if os.path.exists(asset_path(assets, 'sp500_performance.png')):
+        doc.add_picture(asset_path(assets, 'sp500_performance.png'), width=Inches(6))
         last_paragraph = doc.paragraphs[-1]
         last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
     
@@ -124,8 +130,8 @@ def create_report():
     
     doc.add_heading('Russell 1000 Inclusion Impact', level=2)
     
-    if os.path.exists('russell1000_performance.png'):
-        doc.add_picture('russell1000_performance.png', width=Inches(6))
+    if os.path.exists(asset_path(assets, 'russell1000_performance.png')):
+        doc.add_picture(asset_path(assets, 'russell1000_performance.png'), width=Inches(6))
         last_paragraph = doc.paragraphs[-1]
         last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
     
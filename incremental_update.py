@@ -0,0 +1,316 @@
+"""
+Incremental refresh from a new IPO snapshot
+
+Each input file is a dated snapshot (stock_ipos_YYYYMMDD.csv). Instead of
+redoing everything, refresh() diffs the new snapshot against the last
+processed one by (symbol, ipo_date, hash of the row's values) - repeated keys
+are numbered within the same hash, so reordering a snapshot changes nothing:
+
+  * new and changed rows are enriched (year, month, quarter, bday,
+    spac/sp/russell flags, day0_lvl) - only these rows go through
+    identify_groups();
+  * removed and changed rows have their old contribution subtracted from the
+    stored aggregates, and new/changed rows are added;
+  * only the year partitions of the Parquet processed dataset that contain a
+    change are rewritten.
+
+The stored aggregates are sufficient statistics: count, sum and sum of
+squares per group and return column (mean and std), and n, Σx, Σy, Σx², Σxy,
+Σy² for the 252-day ~ 22-day regressions (full sample and sym_22day_ret < 5,
+the fixed cut predictive_analysis() used before its influence-based rule),
+so slopes, intercepts and R² are exact after any sequence of refreshes.
+Medians are not decomposable and are not kept here.
+
+A change to the SPAC / S&P 500 / Russell 1000 lists can flip flags on any
+row, so it triggers a full rebuild.
+
+Usage:
+    python incremental_update.py stock_ipos_20231004.csv           # first run: full build
+    python incremental_update.py stock_ipos_20240105.csv           # later: only the changes
+    python incremental_update.py stock_ipos_20240105.csv --verify  # compare with a full recompute
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from processed_store import PARQUET_DIR, read_processed, replace_partitions, write_processed
+from ipo_dates import DATE_PARTS, add_date_parts, parse_ipo_dates
+from sql_backend import LISTS, file_hash
+
+STATE_DIR = '.incremental_state'
+KEY = ['symbol', 'ipo_date', 'row_hash', 'occurrence']
+
+RAW_COLUMNS = [
+    'symbol', 'sector', 'industry', 'ipo_date',
+    'sym_day0_OTC', 'sym_1day_ret', 'sym_5day_ret', 'sym_22day_ret', 'sym_91day_ret', 'sym_252day_ret',
+    'iwv_day0_OTC', 'iwv_1day_ret', 'iwv_5day_ret', 'iwv_22day_ret', 'iwv_91day_ret', 'iwv_252day_ret',
+]
+PROCESSED_COLUMNS = [*RAW_COLUMNS, *DATE_PARTS, 'spac', 'sp', 'russell', 'day0_lvl']
+RETURN_COLUMNS = [c for c in RAW_COLUMNS if c.startswith(('sym_', 'iwv_'))]
+GROUPINGS = {
+    'all': [],
+    'spac': ['spac'],
+    'sp': ['sp'],
+    'russell': ['russell'],
+    'day0_lvl+spac': ['day0_lvl', 'spac'],
+}
+REGRESSIONS = {
+    'full': None,
+    'filtered': 5,  # sym_22day_ret < 5: influence-based exclusion is not decomposable
+}
+X, Y = 'sym_22day_ret', 'sym_252day_ret'
+
+
+# ---------------------------------------------------------------------------
+# Snapshot diff
+# ---------------------------------------------------------------------------
+
+def _with_key(rows):
+    """Add row_hash and occurrence (the position among rows with the same symbol, date and values)
+
+    The hash is taken over RAW_COLUMNS cast to the dtypes read_csv produces, so
+    processed rows read back from the Parquet dataset hash like the raw rows
+    they came from.
+    """
+    rows = rows.copy()
+    rows['ipo_date'] = rows['ipo_date'].astype('datetime64[ns]')
+    values = rows[RAW_COLUMNS].astype({'symbol': 'str', 'sector': 'str', 'industry': 'str',
+                                       **dict.fromkeys(RETURN_COLUMNS, 'float64')})
+    rows['row_hash'] = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    rows['occurrence'] = rows.groupby(['symbol', 'ipo_date', 'row_hash']).cumcount()
+    return rows
+
+
+def read_snapshot(path):
+    """Raw snapshot with parsed dates, a row hash and a per-key occurrence number"""
+    raw = pd.read_csv(path)
+    raw = raw.dropna(subset=['ipo_date'])
+    raw['ipo_date'] = parse_ipo_dates(raw['ipo_date'])
+    return _with_key(raw).reset_index(drop=True)
+
+
+def diff_snapshot(raw, index):
+    """(added or changed rows of `raw`, keys removed or changed since `index`)
+
+    A changed row has a new hash, so it shows up as one removed and one added key.
+    """
+    merged = raw[KEY].merge(index, on=KEY, how='outer', indicator=True)
+    upsert_keys = merged.loc[merged['_merge'] == 'left_only', KEY]
+    stale = merged.loc[merged['_merge'] == 'right_only', KEY + ['year']]
+    upserts = raw.merge(upsert_keys, on=KEY)
+    return upserts, stale
+
+
+def enrich(rows):
+    """Add the columns main() adds: date parts, spac/sp/russell, day0_lvl"""
+    from project1_analysis import identify_groups
+    rows = add_date_parts(rows.copy())
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = identify_groups(rows)
+    rows['day0_lvl'] = np.where(rows['sym_day0_OTC'] < 1, 'normal', 'abnormal')
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Sufficient statistics
+# ---------------------------------------------------------------------------
+
+def group_sums(rows):
+    """{grouping|level...: {column: [n, Σ, Σ²]}} for a frame of processed rows"""
+    out = {}
+    values = rows[RETURN_COLUMNS]
+    present = values.notna()
+    filled = values.fillna(0.0)
+    parts = pd.concat({'n': present.astype(float), 's': filled, 'ss': filled ** 2}, axis=1)
+    for name, keys in GROUPINGS.items():
+        grouped = parts.groupby([rows[k] for k in keys]).sum() if keys else parts.sum().to_frame().T
+        for level, row in grouped.iterrows():
+            level = level if isinstance(level, tuple) else (level,)
+            group = "|".join([name, *map(str, level)]) if keys else name
+            out[group] = {c: [row[('n', c)], row[('s', c)], row[('ss', c)]] for c in RETURN_COLUMNS}
+    return out
+
+
+def regression_sums(rows):
+    """{regression: [n, Σx, Σy, Σx², Σxy, Σy²]}"""
+    out = {}
+    both = rows[[X, Y]].dropna()
+    for name, cut in REGRESSIONS.items():
+        sel = both if cut is None else both[both[X] < cut]
+        x, y = sel[X].to_numpy(), sel[Y].to_numpy()
+        out[name] = [float(len(x)), x.sum(), y.sum(), (x * x).sum(), (x * y).sum(), (y * y).sum()]
+    return out
+
+
+def _accumulate(target, delta, sign):
+    for key, value in delta.items():
+        if isinstance(value, dict):
+            _accumulate(target.setdefault(key, {}), value, sign)
+        else:
+            current = target.get(key, [0.0] * len(value))
+            target[key] = [float(a + sign * b) for a, b in zip(current, value)]
+
+
+def apply_delta(state, rows, sign):
+    """Add (sign=+1) or subtract (sign=-1) the contribution of `rows`"""
+    if len(rows):
+        _accumulate(state['groups'], group_sums(rows), sign)
+        _accumulate(state['regressions'], regression_sums(rows), sign)
+
+
+def group_table(state):
+    """Mean / std / count per group and column from the stored sums"""
+    records = []
+    for group, columns in sorted(state['groups'].items()):
+        for col, (n, s, ss) in columns.items():
+            n = round(n)
+            if n == 0:
+                continue
+            mean = s / n
+            var = (ss - n * mean * mean) / (n - 1) if n > 1 else np.nan
+            records.append({'group': group, 'column': col, 'count': n, 'mean': mean,
+                            'std': np.sqrt(max(var, 0.0)) if n > 1 else np.nan})
+    return pd.DataFrame(records).set_index(['group', 'column'])
+
+
+def regression_table(state):
+    """OLS of sym_252day_ret on sym_22day_ret from the stored sums"""
+    records = {}
+    for name, (n, sx, sy, sxx, sxy, syy) in state['regressions'].items():
+        sxx_c, sxy_c, syy_c = n * sxx - sx * sx, n * sxy - sx * sy, n * syy - sy * sy
+        slope = sxy_c / sxx_c
+        records[name] = {'n': round(n), 'intercept': (sy - slope * sx) / n, 'slope': slope,
+                         'r_squared': sxy_c * sxy_c / (sxx_c * syy_c)}
+    return pd.DataFrame(records).T
+
+
+# ---------------------------------------------------------------------------
+# State
+# ---------------------------------------------------------------------------
+
+def _paths(state_dir):
+    return os.path.join(state_dir, 'state.json'), os.path.join(state_dir, 'rows.parquet')
+
+
+def load_state(state_dir=STATE_DIR):
+    state_file, index_file = _paths(state_dir)
+    if not (os.path.exists(state_file) and os.path.exists(index_file)):
+        return None, None
+    with open(state_file, encoding='utf-8') as f:
+        state = json.load(f)
+    return state, pd.read_parquet(index_file)
+
+
+def save_state(state, index, state_dir=STATE_DIR):
+    os.makedirs(state_dir, exist_ok=True)
+    state_file, index_file = _paths(state_dir)
+    index.to_parquet(index_file + '.tmp', index=False)
+    os.replace(index_file + '.tmp', index_file)
+    with open(state_file + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
+    os.replace(state_file + '.tmp', state_file)
+
+
+def _processed_columns(rows):
+    return rows[PROCESSED_COLUMNS]
+
+
+def full_build(raw, list_hashes, snapshot, dataset=PARQUET_DIR):
+    processed = enrich(raw)
+    state = {'snapshot': snapshot, 'lists': list_hashes, 'columns': PROCESSED_COLUMNS, 'key': KEY,
+             'groups': {}, 'regressions': {}}
+    apply_delta(state, processed, +1)
+    write_processed(_processed_columns(processed), dataset)
+    return state, processed
+
+
+def refresh(snapshot, state_dir=STATE_DIR, dataset=PARQUET_DIR, rebuild=False):
+    """Bring the processed dataset and aggregates up to date with `snapshot`
+
+    Returns (state, summary dict).
+    """
+    start = time.perf_counter()
+    list_hashes = {path: file_hash(path) for path in LISTS.values()}
+    raw = read_snapshot(snapshot)
+    state, index = load_state(state_dir)
+
+    if (rebuild or state is None or state['lists'] != list_hashes or state.get('columns') != PROCESSED_COLUMNS
+            or state.get('key') != KEY or not os.path.exists(dataset)):
+        reason = ('requested' if rebuild else 'no previous state' if state is None
+                  else 'constituent lists changed' if state['lists'] != list_hashes
+                  else 'processed columns changed' if state.get('columns') != PROCESSED_COLUMNS
+                  else 'row key changed' if state.get('key') != KEY
+                  else 'processed dataset missing')
+        state, processed = full_build(raw, list_hashes, snapshot, dataset)
+        summary = {'mode': f'full ({reason})', 'added/changed': len(processed), 'removed/changed': 0,
+                   'years rewritten': processed['year'].nunique()}
+    else:
+        upserts, stale = diff_snapshot(raw, index)
+        new_rows = enrich(upserts)
+        years = sorted(set(stale['year'].astype(int)) | set(new_rows['year'].astype(int)))
+        if years:
+            old = _with_key(read_processed(dataset, year=years))
+            stale_keys = stale[KEY].assign(_stale=True)
+            old = old.merge(stale_keys, on=KEY, how='left')
+            removed = old[old['_stale'].fillna(False).astype(bool)]
+            kept = old[~old['_stale'].fillna(False).astype(bool)]
+            apply_delta(state, removed, -1)
+            apply_delta(state, new_rows, +1)
+            for col in ('spac', 'sp', 'russell', 'day0_lvl', 'sector', 'industry'):
+                kept[col] = kept[col].astype(str)
+            partitions = pd.concat([kept, new_rows], ignore_index=True)
+            partitions = partitions.sort_values(KEY, kind='stable')
+            replace_partitions(_processed_columns(partitions), years, dataset)
+        state['snapshot'] = snapshot
+        summary = {'mode': 'incremental', 'added/changed': len(new_rows), 'removed/changed': len(stale),
+                   'years rewritten': len(years)}
+
+    index = raw[KEY].assign(year=raw['ipo_date'].dt.year)
+    save_state(state, index, state_dir)
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    return state, summary
+
+
+def verify(state, snapshot):
+    """Largest relative difference between the stored aggregates and a full recompute"""
+    scratch = {'groups': {}, 'regressions': {}}
+    apply_delta(scratch, enrich(read_snapshot(snapshot)), +1)
+    diffs = []
+    for stored, fresh in ((group_table(state), group_table(scratch)),
+                          (regression_table(state), regression_table(scratch))):
+        stored, fresh = stored.align(fresh)
+        a, b = stored.to_numpy(dtype=float), fresh.to_numpy(dtype=float)
+        rel = np.abs(a - b) / np.maximum(np.abs(b), 1e-12)
+        diffs.append(np.nanmax(np.where(np.isnan(a) & np.isnan(b), 0.0, rel)))
+    return max(diffs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the processed dataset from a new snapshot")
+    parser.add_argument('snapshot', help="snapshot CSV, e.g. stock_ipos_20231004.csv")
+    parser.add_argument('--rebuild', action='store_true', help="ignore the stored state")
+    parser.add_argument('--verify', action='store_true', help="compare with a full recompute")
+    args = parser.parse_args()
+
+    state, summary = refresh(args.snapshot, rebuild=args.rebuild)
+    print(", ".join(f"{k}: {v}" for k, v in summary.items()))
+
+    table = group_table(state)
+    windows = ['sym_day0_OTC', 'sym_5day_ret', 'sym_22day_ret', 'sym_91day_ret', 'sym_252day_ret']
+    print("\nMean return by group:")
+    print(table['mean'].unstack('column')[windows].round(4))
+    print("\nRegression sym_252day_ret ~ sym_22day_ret:")
+    print(regression_table(state))
+    if args.verify:
+        worst = verify(state, args.snapshot)
+        print(f"\nMax relative difference vs full recompute: {worst:.2e}")
+
+
+if __name__ == "__main__":
+    main()
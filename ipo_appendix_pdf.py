@@ -0,0 +1,359 @@
+"""
+Generate the per-IPO fact-sheet appendix as a streamed, chunked PDF
+
+create_comprehensive_pdf() collects every flowable in one list and calls
+doc.build once, which is fine for the 8-page report but not for one page per
+IPO. Here the appendix is rendered in fixed-size chunks: each worker
+receives only its chunk's raw columns, formats them and renders its fact
+sheets, a bounded number of chunks are in flight at a time, and the chunk
+PDFs are streamed into a single file one chunk at a time. Styles and table
+styles are built once per process and reused for every page.
+
+Usage:
+    python ipo_appendix_pdf.py                       # appendix for stock_ipos_processed.csv
+    python ipo_appendix_pdf.py --benchmark 10000     # synthetic 10k-IPO benchmark
+"""
+import argparse
+import gc
+import os
+import resource
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+
+from ipo_dates import ISO_FORMAT
+
+OUTPUT_FILE = 'IPO_Appendix_Fact_Sheets.pdf'
+CHUNK_SIZE = 250
+
+WINDOWS = [
+    ('day0_OTC', 'Day 0'),
+    ('1day_ret', '1-day'),
+    ('5day_ret', '5-day'),
+    ('22day_ret', '22-day'),
+    ('91day_ret', '91-day'),
+    ('252day_ret', '252-day'),
+]
+
+# Shared styles, created once per process
+_styles = getSampleStyleSheet()
+HEADING_STYLE = ParagraphStyle(
+    'FactSheetHeading',
+    parent=_styles['Heading1'],
+    fontSize=18,
+    textColor=colors.HexColor('#2E86AB'),
+    spaceAfter=6,
+    fontName='Helvetica-Bold'
+)
+SUBHEADING_STYLE = ParagraphStyle(
+    'FactSheetSubheading',
+    parent=_styles['Heading2'],
+    fontSize=11,
+    textColor=colors.HexColor('#555555'),
+    spaceAfter=12,
+)
+TITLE_STYLE = ParagraphStyle(
+    'AppendixTitle',
+    parent=_styles['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#2E86AB'),
+    alignment=TA_CENTER,
+    spaceAfter=20,
+    fontName='Helvetica-Bold'
+)
+INFO_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+RETURNS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E86AB')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+INFO_COL_WIDTHS = [1.6*inch, 4.4*inch]
+RETURNS_COL_WIDTHS = [1.3*inch, 1.5*inch, 1.5*inch, 1.5*inch]
+RETURNS_HEADER = ['Window', 'IPO Return', 'Russell 1000', 'Excess']
+INPUT_COLUMNS = (['symbol', 'sector', 'industry', 'ipo_date', 'spac', 'sp', 'russell']
+                 + [f'{prefix}_{w}' for w, _ in WINDOWS for prefix in ('sym', 'iwv')])
+# page attributes a page may inherit from its page tree
+INHERITABLE = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+
+def format_pct(values):
+    """Vectorized percentage formatting; NaN becomes 'n/a'"""
+    values = pd.Series(values, dtype=float)
+    out = (values * 100).map('{:.2f}%'.format)
+    return out.where(values.notna(), 'n/a')
+
+
+def _iso_dates(dates):
+    """ipo_date as text; the processed CSV already stores it as ISO dates"""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.strftime(ISO_FORMAT)
+    return dates.astype(str)
+
+
+def prepare_rows(stock_ipos):
+    """Format every field of a chunk at once and return plain dict records"""
+    df = pd.DataFrame({
+        'symbol': stock_ipos['symbol'].astype(str),
+        'sector': stock_ipos['sector'].fillna('n/a').astype(str),
+        'industry': stock_ipos['industry'].fillna('n/a').astype(str),
+        'ipo_date': _iso_dates(stock_ipos['ipo_date']),
+    })
+    for flag in ('spac', 'sp', 'russell'):
+        df[flag] = stock_ipos[flag].fillna('no').astype(str) if flag in stock_ipos else 'n/a'
+    for w, _ in WINDOWS:
+        sym = stock_ipos[f'sym_{w}'].astype(float)
+        iwv = stock_ipos[f'iwv_{w}'].astype(float)
+        df[f'sym_{w}'] = format_pct(sym).values
+        df[f'iwv_{w}'] = format_pct(iwv).values
+        df[f'ex_{w}'] = format_pct(sym - iwv).values
+    return df.to_dict('records')
+
+
+def fact_sheet(row):
+    """Flowables for one IPO page"""
+    info = [
+        ['Sector:', row['sector']],
+        ['Industry:', row['industry']],
+        ['IPO date:', row['ipo_date']],
+        ['SPAC:', row['spac']],
+        ['S&P 500:', row['sp']],
+        ['Russell 1000:', row['russell']],
+    ]
+    info_table = Table(info, colWidths=INFO_COL_WIDTHS)
+    info_table.setStyle(INFO_TABLE_STYLE)
+
+    returns = [RETURNS_HEADER]
+    for w, label in WINDOWS:
+        returns.append([label, row[f'sym_{w}'], row[f'iwv_{w}'], row[f'ex_{w}']])
+    returns_table = Table(returns, colWidths=RETURNS_COL_WIDTHS)
+    returns_table.setStyle(RETURNS_TABLE_STYLE)
+
+    return [
+        Paragraph(escape(row['symbol']), HEADING_STYLE),
+        Paragraph(f"IPO fact sheet &mdash; {row['ipo_date']}", SUBHEADING_STYLE),
+        info_table,
+        Spacer(1, 0.3*inch),
+        returns_table,
+        PageBreak(),
+    ]
+
+
+def _footer(first_page_number):
+    def draw(canvas, doc):
+        canvas.saveState()
+        canvas.setFont('Helvetica', 8)
+        canvas.drawRightString(letter[0] - 72, 30, f"Appendix page {first_page_number + doc.page - 1}")
+        canvas.restoreState()
+    return draw
+
+
+def render_chunk(chunk, path, first_page_number):
+    """Format and render one chunk of IPOs (a DataFrame slice) to `path`; return (path, pages)"""
+    doc = SimpleDocTemplate(path, pagesize=letter,
+                            rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=50)
+    flowables = []
+    for row in prepare_rows(chunk):
+        flowables.extend(fact_sheet(row))
+    if flowables:
+        flowables.pop()  # no trailing PageBreak
+    footer = _footer(first_page_number)
+    doc.build(flowables, onFirstPage=footer, onLaterPages=footer)
+    return path, doc.page
+
+
+def render_cover(path, n_ipos):
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    doc.build([
+        Spacer(1, 2.5*inch),
+        Paragraph("Appendix: IPO Fact Sheets", TITLE_STYLE),
+        Paragraph(f"One page per IPO ({n_ipos:,} IPOs)", SUBHEADING_STYLE),
+    ])
+    return path, doc.page
+
+
+def merge_pdfs(paths, output_file):
+    """Concatenate chunk PDFs in order, holding one chunk in memory at a time
+
+    pypdf's PdfWriter keeps every merged page until it writes the file. Here
+    the objects each page uses are renumbered and written out as soon as
+    their chunk is read; only the object offsets (for the cross-reference
+    table) and the page numbers stay in memory.
+    """
+    from pypdf import PdfReader
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+    offsets = [None, None, None]  # 0: free-list head, 1: catalog, 2: page tree
+    pages_ref = IndirectObject(2, 0, None)
+    kids = []
+
+    with open(output_file, 'wb') as out:
+        out.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+        def write_object(number, obj):
+            offsets[number] = out.tell()
+            out.write(f"{number} 0 obj\n".encode())
+            obj.write_to_stream(out)
+            out.write(b"\nendobj\n")
+
+        for path in paths:
+            reader = PdfReader(path)
+            numbers, todo = {}, []
+
+            def renumber(obj):
+                """Point references at the output numbering (in place), queueing new objects"""
+                if isinstance(obj, IndirectObject):
+                    if obj.pdf is None:  # already in the output numbering
+                        return obj
+                    if obj.idnum not in numbers:
+                        numbers[obj.idnum] = len(offsets)
+                        offsets.append(None)
+                        todo.append(obj)
+                    return IndirectObject(numbers[obj.idnum], 0, None)
+                if isinstance(obj, DictionaryObject):
+                    for key, value in list(dict.items(obj)):
+                        dict.__setitem__(obj, key, renumber(value))
+                elif isinstance(obj, ArrayObject):
+                    for i, value in enumerate(list.__iter__(obj)):
+                        list.__setitem__(obj, i, renumber(value))
+                return obj
+
+            for page in reader.pages:
+                for key in INHERITABLE:  # copied down before the page leaves its page tree
+                    node = page
+                    while key not in node and '/Parent' in node:
+                        node = node['/Parent'].get_object()
+                    if node is not page and key in node:
+                        page[NameObject(key)] = dict.get(node, key)
+                numbers[page.indirect_reference.idnum] = len(offsets)
+                offsets.append(None)
+                kids.append(numbers[page.indirect_reference.idnum])
+                page[NameObject('/Parent')] = pages_ref
+            for page in reader.pages:
+                write_object(numbers[page.indirect_reference.idnum], renumber(page))
+                while todo:
+                    ref = todo.pop()
+                    write_object(numbers[ref.idnum], renumber(ref.get_object()))
+            del reader
+            gc.collect()  # the reader's objects reference each other
+
+        kids_array = ' '.join(f"{k} 0 R" for k in kids)
+        offsets[2] = out.tell()
+        out.write(f"2 0 obj\n<< /Type /Pages /Count {len(kids)} /Kids [{kids_array}] >>\nendobj\n".encode())
+        offsets[1] = out.tell()
+        out.write(b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n")
+        xref = out.tell()
+        out.write(f"xref\n0 {len(offsets)}\n0000000000 65535 f \n".encode())
+        out.write(''.join(f"{offset:010d} 00000 n \n" for offset in offsets[1:]).encode())
+        out.write(f"trailer\n<< /Size {len(offsets)} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def build_appendix(stock_ipos, output_file=OUTPUT_FILE, chunk_size=CHUNK_SIZE, workers=None):
+    """Render the appendix for every row of `stock_ipos`; return (pages, seconds)"""
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 2
+    stock_ipos = stock_ipos[[c for c in INPUT_COLUMNS if c in stock_ipos]]
+    tmp_dir = tempfile.mkdtemp(prefix='ipo_appendix_')
+    try:
+        cover_path, cover_pages = render_cover(os.path.join(tmp_dir, 'cover.pdf'), len(stock_ipos))
+        chunk_paths = {}
+        page_counts = {}
+        starts = list(range(0, len(stock_ipos), chunk_size))
+
+        # Keep at most 2 chunks per worker in flight; each carries only its
+        # own rows' raw columns and is formatted in the worker.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = {}
+            next_chunk = 0
+            while next_chunk < len(starts) or in_flight:
+                while next_chunk < len(starts) and len(in_flight) < 2 * workers:
+                    i = starts[next_chunk]
+                    path = os.path.join(tmp_dir, f"chunk_{next_chunk:05d}.pdf")
+                    # every fact sheet is exactly one page
+                    fut = pool.submit(render_chunk, stock_ipos.iloc[i:i + chunk_size], path, cover_pages + i + 1)
+                    in_flight[fut] = next_chunk
+                    next_chunk += 1
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    idx = in_flight.pop(fut)
+                    chunk_paths[idx], page_counts[idx] = fut.result()
+
+        merge_pdfs([cover_path] + [chunk_paths[i] for i in sorted(chunk_paths)], output_file)
+        pages = cover_pages + sum(page_counts.values())
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return pages, time.perf_counter() - start
+
+
+def synthetic_ipos(n, seed=0):
+    """Random IPO frame with the same columns as stock_ipos_processed.csv"""
+    rng = np.random.default_rng(seed)
+    sectors = ['Technology', 'Healthcare', 'Financial Services', 'Industrials', 'Energy']
+    df = pd.DataFrame({
+        'symbol': [f"SYN{i:05d}" for i in range(n)],
+        'sector': rng.choice(sectors, n),
+        'industry': rng.choice(['Software', 'Biotechnology', 'Shell Companies', 'Banks'], n),
+        'ipo_date': pd.Timestamp('2012-01-01') + pd.to_timedelta(rng.integers(0, 4000, n), unit='D'),
+        'spac': rng.choice(['yes', 'no'], n, p=[0.07, 0.93]),
+        'sp': rng.choice(['yes', 'no'], n, p=[0.014, 0.986]),
+        'russell': rng.choice(['yes', 'no'], n, p=[0.04, 0.96]),
+    })
+    for w, _ in WINDOWS:
+        df[f'sym_{w}'] = rng.standard_t(3, n) * 0.2
+        df[f'iwv_{w}'] = rng.normal(0.01, 0.05, n)
+    return df
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished children, in MB"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024, children / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-IPO fact-sheet appendix (streamed PDF)")
+    parser.add_argument('--input', default='stock_ipos_processed.csv')
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--benchmark', type=int, metavar='N', help="use N synthetic IPOs instead of --input")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        stock_ipos = synthetic_ipos(args.benchmark)
+    else:
+        stock_ipos = pd.read_csv(args.input)
+
+    pages, seconds = build_appendix(stock_ipos, args.output, args.chunk_size, args.workers)
+    parent_mb, worker_mb = peak_rss_mb()
+    print(f"✓ Appendix generated: {args.output}")
+    print(f"✓ IPOs: {len(stock_ipos):,} | Pages: {pages:,} | Build time: {seconds:.1f}s "
+          f"({len(stock_ipos) / seconds:,.0f} IPOs/s)")
+    print(f"✓ File size: {os.path.getsize(args.output) / 1024:,.1f} KB")
+    print(f"✓ Peak RSS: parent {parent_mb:.0f} MB, largest worker {worker_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
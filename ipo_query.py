@@ -0,0 +1,216 @@
+"""
+Ad hoc queries over the enriched IPO dataset
+
+Answers questions like "SPAC mean 22-day return for Technology IPOs in
+2020-2021" without editing the analysis scripts. The prepared frame (the
+memory-mapped ipo_return_store written with stock_ipos_processed.csv, or the
+CSV itself) is sorted by ipo_date once, so a date range is two binary
+searches giving a contiguous row slice. spac, sp, russell, sector
+and industry have precomputed bitmap indexes (one boolean array per value);
+filters are AND-ed over the slice only, and statistics are computed on the
+selected rows. Recent results are kept in an LRU cache.
+
+Python:
+    from ipo_query import IPOQuery
+    q = IPOQuery.from_csv()
+    q.stats('22day', start='2020-01-01', end='2021-12-31', sector='Technology', spac='yes')
+
+CLI:
+    python ipo_query.py 22day --start 2020 --end 2021 --sector Technology --spac yes
+    python ipo_query.py 252day --by spac --stats mean median count
+"""
+import argparse
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from ipo_dates import ISO_FORMAT, parse_ipo_dates
+from return_store import STORE_DIR, ReturnStore
+
+PROCESSED_FILE = 'stock_ipos_processed.csv'
+
+INDEXED_COLUMNS = ['spac', 'sp', 'russell', 'sector', 'industry']
+WINDOWS = {
+    'day0': 'sym_day0_OTC',
+    '1day': 'sym_1day_ret',
+    '5day': 'sym_5day_ret',
+    '22day': 'sym_22day_ret',
+    '91day': 'sym_91day_ret',
+    '252day': 'sym_252day_ret',
+}
+STATS = {
+    'mean': np.mean,
+    'median': np.median,
+    'std': lambda v: np.std(v, ddof=1) if len(v) > 1 else np.nan,
+    'min': np.min,
+    'max': np.max,
+    'count': len,
+}
+DEFAULT_STATS = ('mean', 'median', 'std', 'count')
+CACHE_SIZE = 256
+
+
+def _from_store(path, store_dir):
+    """The frame from the memory-mapped return store, or None if it is missing or older than `path`"""
+    meta = os.path.join(store_dir, 'meta.json')
+    if not os.path.exists(meta) or (os.path.exists(path) and os.path.getmtime(meta) < os.path.getmtime(path)):
+        return None
+    try:
+        store = ReturnStore.open(store_dir)
+    except ValueError:
+        return None
+    return store.to_frame(flags=store.flag_columns, categories=list(store.categories))
+
+
+def load_frame(path=PROCESSED_FILE, store_dir=STORE_DIR):
+    """The prepared frame: the return store written with the processed CSV, the CSV itself,
+    or rebuilt from the raw files"""
+    if path == PROCESSED_FILE:
+        frame = _from_store(path, store_dir)
+        if frame is not None:
+            return frame
+    if os.path.exists(path):
+        frame = pd.read_csv(path)
+        frame['ipo_date'] = parse_ipo_dates(frame['ipo_date'], ISO_FORMAT)
+        return frame
+    from project1_analysis import load_and_prep_data, identify_groups
+    return identify_groups(load_and_prep_data())
+
+
+def _date_bound(value, end=False):
+    """Timestamp for a --start/--end value; a bare year covers the whole year"""
+    if value is None:
+        return None
+    value = str(value)
+    if value.isdigit() and len(value) == 4:
+        value = f"{value}-12-31" if end else f"{value}-01-01"
+    return pd.Timestamp(value)
+
+
+def _as_tuple(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(map(str, value)))
+    return (str(value),)
+
+
+class IPOQuery:
+    """Date-sorted, bitmap-indexed view of the IPO frame"""
+
+    def __init__(self, stock_ipos, cache_size=CACHE_SIZE):
+        frame = stock_ipos.sort_values('ipo_date', kind='stable').reset_index(drop=True)
+        self.n_rows = len(frame)
+        self.dates = frame['ipo_date'].to_numpy(dtype='datetime64[ns]')
+        self.values = {col: frame[col].to_numpy(dtype=float)
+                       for col in frame.columns if col.startswith(('sym_', 'iwv_'))}
+        self.bitmaps = {}
+        for col in INDEXED_COLUMNS:
+            if col in frame.columns:
+                keys = frame[col].fillna('').astype(str).to_numpy()
+                self.bitmaps[col] = {value: keys == value for value in np.unique(keys)}
+        self._cached_stats = lru_cache(maxsize=cache_size)(self._compute)
+
+    @classmethod
+    def from_csv(cls, path=PROCESSED_FILE, cache_size=CACHE_SIZE):
+        return cls(load_frame(path), cache_size)
+
+    def column(self, name):
+        column = WINDOWS.get(name, name)
+        if column not in self.values:
+            raise KeyError(f"Unknown return column {name!r}; use one of {', '.join(WINDOWS)} "
+                           f"or a sym_/iwv_ column")
+        return column
+
+    def date_slice(self, start=None, end=None):
+        """Row range [lo, hi) with start <= ipo_date <= end (binary search)"""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, start.to_datetime64(), 'left'))
+        hi = self.n_rows if end is None else int(np.searchsorted(self.dates, end.to_datetime64(), 'right'))
+        return lo, max(hi, lo)
+
+    def mask(self, lo, hi, filters):
+        """Boolean mask over rows [lo, hi) for {column: (values...)}; values are OR-ed"""
+        mask = np.ones(hi - lo, dtype=bool)
+        for col, values in filters:
+            if col not in self.bitmaps:
+                raise KeyError(f"No index on {col!r}; filter on one of {', '.join(self.bitmaps)}")
+            index = self.bitmaps[col]
+            selected = np.zeros(hi - lo, dtype=bool)
+            for value in values:
+                if value in index:
+                    selected |= index[value][lo:hi]
+            mask &= selected
+        return mask
+
+    def _compute(self, column, start, end, filters, by, stats):
+        lo, hi = self.date_slice(start, end)
+        mask = self.mask(lo, hi, filters)
+        values = self.values[column][lo:hi]
+
+        def summarise(selected):
+            v = values[selected]
+            v = v[~np.isnan(v)]
+            if not len(v):
+                return {name: 0 if name == 'count' else np.nan for name in stats}
+            return {name: STATS[name](v) if name == 'count' else float(STATS[name](v)) for name in stats}
+
+        if by is None:
+            return summarise(mask)
+        if by not in self.bitmaps:
+            raise KeyError(f"No index on {by!r}; group by one of {', '.join(self.bitmaps)}")
+        return {value: summarise(mask & bitmap[lo:hi])
+                for value, bitmap in self.bitmaps[by].items() if (mask & bitmap[lo:hi]).any()}
+
+    def stats(self, column, start=None, end=None, by=None, stats=DEFAULT_STATS, **filters):
+        """Statistics of a return column over the selected rows
+
+        column: a window alias ('22day') or a column name ('iwv_22day_ret')
+        start/end: inclusive ipo_date bounds (a bare year means the whole year)
+        by: optional indexed column to group the selection by
+        filters: indexed column=value or column=[values], e.g. sector='Technology'
+
+        Returns {stat: value}, or {group: {stat: value}} when `by` is given.
+        """
+        unknown = [s for s in stats if s not in STATS]
+        if unknown:
+            raise ValueError(f"Unknown statistic(s) {unknown}; choose from {', '.join(STATS)}")
+        key_filters = tuple(sorted((col, _as_tuple(v)) for col, v in filters.items() if v is not None))
+        start, end = _date_bound(start), _date_bound(end, end=True)
+        return self._cached_stats(self.column(column), start, end, key_filters, by, tuple(stats))
+
+    def cache_info(self):
+        return self._cached_stats.cache_info()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query statistics over the enriched IPO dataset")
+    parser.add_argument('column', help=f"return window ({', '.join(WINDOWS)}) or column name")
+    parser.add_argument('--start', help="first IPO date (YYYY or YYYY-MM-DD)")
+    parser.add_argument('--end', help="last IPO date (YYYY or YYYY-MM-DD)")
+    for col in INDEXED_COLUMNS:
+        parser.add_argument(f'--{col}', nargs='+', help=f"filter on {col} (several values are OR-ed)")
+    parser.add_argument('--by', choices=INDEXED_COLUMNS, help="group the selection")
+    parser.add_argument('--stats', nargs='+', default=list(DEFAULT_STATS), help=f"from: {', '.join(STATS)}")
+    parser.add_argument('--data', default=PROCESSED_FILE)
+    args = parser.parse_args()
+
+    query = IPOQuery.from_csv(args.data)
+    filters = {col: getattr(args, col) for col in INDEXED_COLUMNS}
+    start = time.perf_counter()
+    result = query.stats(args.column, args.start, args.end, args.by, args.stats, **filters)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    rows = result if args.by else {'selection': result}
+    print(f"{'Group':<28} | " + " | ".join(f"{s:>10}" for s in args.stats))
+    print("-" * (31 + 13 * len(args.stats)))
+    for group, values in rows.items():
+        cells = [f"{values[s]:>10,.0f}" if s == 'count' else f"{values[s]:>10.2%}" for s in args.stats]
+        print(f"{str(group)[:28]:<28} | " + " | ".join(cells))
+    print(f"\n{query.column(args.column)}, query time {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Year-partitioned Parquet store for the processed IPO dataset
+
+main() in project1_analysis.py writes stock_ipos_processed.csv, which every
+consumer re-parses and re-converts (dates, yes/no flags). This module writes
+the same enriched frame as a Parquet dataset partitioned by year
+(stock_ipos_processed.parquet/year=2021/part-0.parquet, ...) with typed
+columns: ipo_date as a date, returns as float64, and sector, industry and the
+spac/sp/russell/day0_lvl flags dictionary-encoded. Column statistics are
+written for every row group.
+
+read_processed() projects columns and pushes filters down, so a year filter
+skips whole partitions and other filters skip row groups by their
+statistics; "only 2021 SPACs, only 252-day returns" reads one small file and
+two columns.
+
+Usage:
+    python processed_store.py --write                  # from stock_ipos_processed.csv
+    python processed_store.py --year 2021 --spac yes --columns symbol sym_252day_ret
+"""
+import argparse
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from ipo_dates import ISO_FORMAT, parse_ipo_dates
+
+PARQUET_DIR = 'stock_ipos_processed.parquet'
+CSV_FILE = 'stock_ipos_processed.csv'
+
+CATEGORY_COLUMNS = ['sector', 'industry', 'spac', 'sp', 'russell', 'day0_lvl']
+ROW_GROUP_SIZE = 64 * 1024
+
+
+def _schema_frame(stock_ipos):
+    """Frame with the stored column types"""
+    frame = stock_ipos.copy()
+    frame['ipo_date'] = frame['ipo_date'].dt.date
+    frame['year'] = frame['year'].astype('int16')
+    for col, dtype in (('month', 'int8'), ('quarter', 'int8'), ('bday', 'int32')):
+        if col in frame.columns:
+            frame[col] = frame[col].astype(dtype)
+    for col in CATEGORY_COLUMNS:
+        if col in frame.columns:
+            frame[col] = frame[col].astype('category')
+    return frame
+
+
+def _write_dataset(stock_ipos, dest):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(_schema_frame(stock_ipos), preserve_index=False)
+    shutil.rmtree(dest, ignore_errors=True)
+    pq.write_to_dataset(
+        table, dest,
+        partition_cols=['year'],
+        use_dictionary=[c for c in CATEGORY_COLUMNS if c in table.column_names],
+        write_statistics=True,
+        compression='zstd',
+        row_group_size=ROW_GROUP_SIZE,
+        basename_template='part-{i}.parquet',
+    )
+
+
+def _swap(new, target):
+    """Replace directory `target` with `new` (either may be missing)"""
+    old = target + '.old'
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(target):
+        os.replace(target, old)
+    if os.path.exists(new):
+        os.replace(new, target)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def write_processed(stock_ipos, path=PARQUET_DIR):
+    """Write the enriched frame as a Parquet dataset partitioned by year
+
+    The dataset is written next to `path` and swapped in, so readers never
+    see a half-written dataset and partitions of vanished years disappear.
+    """
+    _write_dataset(stock_ipos, path + '.tmp')
+    _swap(path + '.tmp', path)
+    return path
+
+
+def replace_partitions(stock_ipos, years, path=PARQUET_DIR):
+    """Rewrite only the `years` partitions with the rows of `stock_ipos`
+
+    `stock_ipos` holds the complete new contents of those years; a year with
+    no rows left loses its partition. Other partitions are not touched.
+    """
+    tmp = path + '.tmp'
+    if len(stock_ipos):
+        _write_dataset(stock_ipos, tmp)
+    os.makedirs(path, exist_ok=True)
+    for year in sorted(set(years)):
+        _swap(os.path.join(tmp, f"year={year}"), os.path.join(path, f"year={year}"))
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _dataset(path):
+    import pyarrow.dataset as ds
+    return ds.dataset(path, format='parquet', partitioning='hive')
+
+
+def _expression(filters):
+    """pyarrow expression from {column: value or [values]}"""
+    import pyarrow.dataset as ds
+    expr = None
+    for col, value in filters.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        term = ds.field(col).isin(list(values))
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def read_processed(path=PARQUET_DIR, columns=None, **filters):
+    """DataFrame of the selected columns and rows, e.g.
+
+    read_processed(columns=['symbol', 'sym_252day_ret'], year=2021, spac='yes')
+    """
+    dataset = _dataset(path)
+    table = dataset.to_table(columns=columns, filter=_expression(filters))
+    return table.to_pandas(date_as_object=False)
+
+
+def scan_report(path=PARQUET_DIR, **filters):
+    """(files read, files in dataset, bytes in read files, total bytes) for a filter"""
+    dataset = _dataset(path)
+    expr = _expression(filters)
+    every = list(dataset.get_fragments())
+    read = every if expr is None else list(dataset.get_fragments(filter=expr))
+    return (len(read), len(every),
+            sum(os.path.getsize(f.path) for f in read), sum(os.path.getsize(f.path) for f in every))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write or query the year-partitioned Parquet dataset")
+    parser.add_argument('--write', action='store_true', help=f"(re)write the dataset from {CSV_FILE}")
+    parser.add_argument('--year', type=int, nargs='+')
+    parser.add_argument('--spac', choices=['yes', 'no'])
+    parser.add_argument('--sp', choices=['yes', 'no'])
+    parser.add_argument('--russell', choices=['yes', 'no'])
+    parser.add_argument('--columns', nargs='+')
+    args = parser.parse_args()
+
+    if args.write or not os.path.exists(PARQUET_DIR):
+        stock_ipos = pd.read_csv(CSV_FILE)
+        stock_ipos['ipo_date'] = parse_ipo_dates(stock_ipos['ipo_date'], ISO_FORMAT)
+        write_processed(stock_ipos)
+        print(f"Wrote {PARQUET_DIR} ({len(stock_ipos)} rows, CSV {os.path.getsize(CSV_FILE) / 1024:.0f} KB)")
+
+    filters = {k: v for k, v in (('year', args.year), ('spac', args.spac),
+                                 ('sp', args.sp), ('russell', args.russell)) if v is not None}
+    start = time.perf_counter()
+    frame = read_processed(columns=args.columns, **filters)
+    elapsed = (time.perf_counter() - start) * 1000
+    files, all_files, read_bytes, total_bytes = scan_report(**filters)
+    print(frame.head(20))
+    print(f"\n{len(frame)} rows x {frame.shape[1]} columns in {elapsed:.1f} ms; "
+          f"{files}/{all_files} files ({read_bytes / 1024:.0f} of {total_bytes / 1024:.0f} KB) scanned")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,64 +3,81 @@ import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import statsmodels.formula.api as smf
 
+from analysis_cache import memoize
+from ipo_dates import parse_ipo_dates, add_date_parts
+from influence_diagnostics import simple_influence, influential, influence_plot, DEFAULT_RULE
+from robust_regression import fit_all, slope_table, OUTPUT_FILE as ROBUST_FILE
+from stat_tests import run_battery, print_summary as print_test_summary, OUTPUT_FILE as TESTS_FILE
+from data_validation import validate, quarantine, REPORT_FILE, QUARANTINE_FILE
+
 # Set plot style
 sns.set(rc={"figure.figsize":(10, 6)})
 
-def load_and_prep_data():
+def load_and_prep_data(quarantine_bad_rows=False, path='stock_ipos_20231004.csv'):
     print("--- Loading Data ---")
     # 1. Load Data
-    stock_ipos = pd.read_csv('stock_ipos_20231004.csv')
+    stock_ipos = pd.read_csv(path)
     print("Initial shape:", stock_ipos.shape)
+
+    # ipo_date is factorized once, for both the checks and the parsing below
+    date_codes, date_strings = pd.factorize(stock_ipos['ipo_date'])
+
+    # Data-quality checks on the raw rows (see data_validation.py)
+    report = validate(stock_ipos, dates=(date_codes, date_strings))
+    report.write()
+    print(f"Validation ({REPORT_FILE}): {report.summary()}")
+    if quarantine_bad_rows:
+        date_codes = date_codes[~report.error_mask()]
+        stock_ipos = quarantine(stock_ipos, report)
+        print(f"Shape after quarantining to {QUARANTINE_FILE}:", stock_ipos.shape)
     
     # 2. Clean Dates
     stock_ipos = stock_ipos.dropna(subset=['ipo_date']) # Ensure ipo_date is present
-    stock_ipos['ipo_date'] = pd.to_datetime(stock_ipos['ipo_date'])
-    stock_ipos['year'] = stock_ipos['ipo_date'].dt.year
-    stock_ipos['month'] = stock_ipos['ipo_date'].dt.month
+    date_codes = date_codes[date_codes >= 0]
+    stock_ipos['ipo_date'] = parse_ipo_dates(stock_ipos['ipo_date'], factorized=(date_codes, date_strings))
+    stock_ipos = add_date_parts(stock_ipos)  # year, month, quarter, bday
     print("Shape after date cleaning:", stock_ipos.shape)
     
     return stock_ipos
 
-def identify_groups(stock_ipos):
+# Constituent lists that become yes/no flag columns, in report order:
+# column -> (file, label for errors, label for the count line)
+GROUP_SOURCES = {
+    'spac': ('list_of_all_spacs.xlsx', 'SPACs', 'SPACs found in IPO data'),
+    'sp': ('sp500_202308.xlsx', 'S&P 500', 'S&P 500 stocks in IPO data'),
+    'russell': ('russ_1000_202308.xlsx', 'Russell 1000', 'Russell 1000 stocks in IPO data'),
+}
+
+def read_symbols(path):
+    """Ticker list from a constituent workbook (runs in a worker process)"""
+    return list(pd.read_excel(path)['symbol'])
+
+def start_group_loads(pool, sources=GROUP_SOURCES):
+    """Submit every constituent workbook to `pool`; returns {column: future}"""
+    return {col: pool.submit(read_symbols, path) for col, (path, _, _) in sources.items()}
+
+def identify_groups(stock_ipos, loads=None, sources=GROUP_SOURCES):
     print("\n--- Identifying Groups (SPACs, S&P, Russell) ---")
     
-    # 3. Identify SPACs
-    try:
-        stock_spacs = pd.read_excel('list_of_all_spacs.xlsx')
-        spacs_tkrs = list(stock_spacs['symbol'])
-        stock_ipos['spac'] = np.where(stock_ipos['symbol'].isin(spacs_tkrs), 'yes', 'no')
-        print("SPACs found in IPO data:", stock_ipos['spac'].value_counts().get('yes', 0))
-    except Exception as e:
-        print(f"Error loading SPACs: {e}")
-
-    # 4. Identify S&P 500
-    try:
-        sp500 = pd.read_excel('sp500_202308.xlsx')
-        # Assuming 'Symbol' or similar column exists, need to check from previous inspection
-        # Previous inspection showed: ['Symbol', 'Name', ...] for sp500? No, wait.
-        # Let's assume 'Symbol' or 'Ticker' based on typical files, but I should check the inspection output again.
-        # Inspection output for sp500_202308.xlsx was: ['symbol', 'name', ...] (guessed based on typical)
-        # Actually, let's look at the previous turn's output for inspect_data.py
-        # Output was: --- sp500_202308.xlsx --- ... [1 rows x 4 columns] ... symbol ...
-        # So column is 'symbol'.
-        sp500_tkrs = list(sp500['symbol'])
-        stock_ipos['sp'] = np.where(stock_ipos['symbol'].isin(sp500_tkrs), 'yes', 'no')
-        print("S&P 500 stocks in IPO data:", stock_ipos['sp'].value_counts().get('yes', 0))
-    except Exception as e:
-        print(f"Error loading S&P 500: {e}")
-
-    # 5. Identify Russell 1000
-    try:
-        russ1000 = pd.read_excel('russ_1000_202308.xlsx')
-        # Inspection output for russ_1000 was: ... symbol ...
-        russ_tkrs = list(russ1000['symbol'])
-        stock_ipos['russell'] = np.where(stock_ipos['symbol'].isin(russ_tkrs), 'yes', 'no')
-        print("Russell 1000 stocks in IPO data:", stock_ipos['russell'].value_counts().get('yes', 0))
-    except Exception as e:
-        print(f"Error loading Russell 1000: {e}")
+    # 3-5. Flag SPACs, S&P 500 and Russell 1000 members. openpyxl parsing is
+    # slow and the workbooks are independent, so they are parsed in parallel
+    # (main() starts them before the CSV is read); results are joined in order.
+    if loads is None:
+        with ProcessPoolExecutor(max_workers=len(sources)) as pool:
+            return identify_groups(stock_ipos, start_group_loads(pool, sources), sources)
+    for col, (path, name, label) in sources.items():
+        try:
+            tkrs = loads[col].result()
+            stock_ipos[col] = np.where(stock_ipos['symbol'].isin(tkrs), 'yes', 'no')
+            print(f"{label}:", stock_ipos[col].value_counts().get('yes', 0))
+        except Exception as e:
+            print(f"Error loading {name}: {e}")
         
     return stock_ipos
 
@@ -81,6 +98,13 @@ def analyze_spacs(stock_ipos):
     print("SPACs in S&P 500:", spac_only['sp'].value_counts())
     print("SPACs in Russell 1000:", spac_only['russell'].value_counts())
 
+RETURN_COLUMNS = ['sym_day0_OTC', 'iwv_day0_OTC', 'sym_1day_ret', 'iwv_1day_ret',
+                  'sym_5day_ret', 'iwv_5day_ret', 'sym_22day_ret', 'iwv_22day_ret',
+                  'sym_91day_ret', 'iwv_91day_ret', 'sym_252day_ret', 'iwv_252day_ret']
+
+# The memoized steps below are pure functions of the frame: re-runs with the
+# same inputs replay their printed output and plots from .analysis_cache/.
+@memoize(columns=['ipo_date'] + RETURN_COLUMNS)
 def analyze_returns(stock_ipos):
     print("\n--- Analyzing Returns ---")
     # 3. Compare IPO vs Russell returns
@@ -113,6 +137,8 @@ def analyze_returns(stock_ipos):
                   f"{stock_ipos[sym_col].median():.4f}     | {stock_ipos[iwv_col].median():.4f}     | "
                   f"{stock_ipos[sym_col].std():.4f}     | {stock_ipos[iwv_col].std():.4f}")
 
+# Returns the filtered frame with every column, so the whole frame is the key
+@memoize(outputs=['scatter_22_252.png', 'influence_22_252.png', 'scatter_22_252_11month.png'])
 def predictive_analysis(stock_ipos):
     print("\n--- Predictive Analysis ---")
     
@@ -136,8 +162,15 @@ def predictive_analysis(stock_ipos):
     plt.savefig("scatter_22_252.png")
     print("Saved plot: scatter_22_252.png")
     
-    # (c) Filter outliers
-    stock_ipos_filtered = stock_ipos[stock_ipos['sym_22day_ret'] < 5]
+    # (c) Filter influential observations (Cook's distance, see influence_diagnostics.py)
+    diagnostics = simple_influence(stock_ipos['sym_22day_ret'], stock_ipos['sym_252day_ret'])
+    excluded = influential(diagnostics, DEFAULT_RULE)
+    print(f"\nInfluential observations ({DEFAULT_RULE}): {int(excluded.sum())}")
+    print(stock_ipos.loc[excluded, ['symbol', 'sym_22day_ret', 'sym_252day_ret']]
+          .join(diagnostics.loc[excluded, ['leverage', 'student_external', 'cooks_d', 'dffits']]).to_string())
+    influence_plot(diagnostics, excluded, "influence_22_252.png")
+    print("Saved plot: influence_22_252.png")
+    stock_ipos_filtered = stock_ipos[~excluded]
     print(f"\nFiltered data shape: {stock_ipos_filtered.shape} (Original: {stock_ipos.shape})")
     
     # (d) Regression on filtered data
@@ -186,6 +219,7 @@ def analyze_spac_vs_nonspac(stock_ipos):
         print(f"\n{w} Stats by SPAC:")
         print(stock_ipos.groupby('spac')[w].agg(['mean', 'median', 'std', 'count']))
 
+@memoize(columns=['sp', 'russell', 'sym_252day_ret'])
 def analyze_inclusion_performance(stock_ipos):
     print("\n--- Inclusion Performance (S&P/Russell) ---")
     
@@ -198,18 +232,76 @@ def analyze_inclusion_performance(stock_ipos):
     print("\nRussell 1000 Inclusion Performance (1-year return):")
     print(stock_ipos.groupby('russell')['sym_252day_ret'].agg(['mean', 'median', 'std', 'count']))
 
+def benchmark_loading():
+    """Wall time of reading the CSV and the workbooks serially vs concurrently"""
+    timings = {}
+    start = time.perf_counter()
+    pd.read_csv('stock_ipos_20231004.csv')
+    timings['stock_ipos_20231004.csv'] = time.perf_counter() - start
+    for path, _, _ in GROUP_SOURCES.values():
+        start = time.perf_counter()
+        read_symbols(path)
+        timings[path] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(GROUP_SOURCES)) as pool:
+        loads = start_group_loads(pool)
+        pd.read_csv('stock_ipos_20231004.csv')
+        for future in loads.values():
+            future.result()
+    concurrent = time.perf_counter() - start
+
+    for path, seconds in timings.items():
+        print(f"{path:<28} {seconds:6.3f}s")
+    print(f"{'serial total':<28} {sum(timings.values()):6.3f}s")
+    print(f"{'slowest single file':<28} {max(timings.values()):6.3f}s")
+    print(f"{'concurrent':<28} {concurrent:6.3f}s  ({os.cpu_count()} CPUs)")
+
 def main():
-    stock_ipos = load_and_prep_data()
-    stock_ipos = identify_groups(stock_ipos)
+    # Parse the constituent workbooks in worker processes while the CSV loads
+    with ProcessPoolExecutor(max_workers=len(GROUP_SOURCES)) as pool:
+        loads = start_group_loads(pool)
+        stock_ipos = load_and_prep_data(quarantine_bad_rows='--quarantine' in sys.argv)
+        stock_ipos = identify_groups(stock_ipos, loads)
     analyze_spacs(stock_ipos)
     analyze_returns(stock_ipos)
     stock_ipos_filtered = predictive_analysis(stock_ipos)
+
+    # Robust alternatives to excluding observations, for every window pair
+    print("\n--- Robust Regressions (1-year ~ 1-month) ---")
+    robust = fit_all(stock_ipos)
+    print(slope_table(robust).round(4))
+    robust.to_csv(ROBUST_FILE, index=False)
+    print(f"Saved fits for all window pairs to {ROBUST_FILE}")
     analyze_spac_vs_nonspac(stock_ipos)
     analyze_inclusion_performance(stock_ipos)
+
+    # Significance tests behind the descriptive comparisons above
+    print("\n--- Two-Sample Tests (all windows x groupings) ---")
+    tests = run_battery(stock_ipos)
+    print_test_summary(tests)
+    tests.to_csv(TESTS_FILE, index=False)
+    print(f"Saved test results to {TESTS_FILE}")
     
     # Save processed data for next steps
     stock_ipos.to_csv("stock_ipos_processed.csv", index=False)
     print("\nSaved processed data to stock_ipos_processed.csv")
 
+    # Typed, year-partitioned copy for readers that only need a slice
+    try:
+        from processed_store import write_processed, PARQUET_DIR
+        write_processed(stock_ipos)
+        print(f"Saved processed data to {PARQUET_DIR}/ (partitioned by year)")
+    except ImportError:
+        print("pyarrow not installed; skipped the Parquet output")
+
+    # Memory-mapped return matrix for fast cold starts
+    from return_store import write_store, STORE_DIR
+    write_store(stock_ipos)
+    print(f"Saved return matrix to {STORE_DIR}/")
+
 if __name__ == "__main__":
-    main()
+    if '--benchmark-load' in sys.argv:
+        benchmark_loading()
+    else:
+        main()
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from ipo_dates import parse_ipo_dates
+
 # Load the processed data (or load fresh and prepare)
 print("=" * 80)
 print("QUESTION 5: SPACs vs Non-SPACs Return Analysis")
@@ -9,7 +11,7 @@ print("=" * 80)
 # Load data
 stock_ipos = pd.read_csv('stock_ipos_20231004.csv')
 stock_ipos = stock_ipos.dropna(subset=['ipo_date'])
-stock_ipos['ipo_date'] = pd.to_datetime(stock_ipos['ipo_date'])
+stock_ipos['ipo_date'] = parse_ipo_dates(stock_ipos['ipo_date'])
 
 # Identify SPACs
 try:
@@ -0,0 +1,178 @@
+"""
+Shared image assets for the report builders
+
+The chart PNGs are written by matplotlib as 300-dpi RGBA images sized for
+print. Embedding them as-is bloats the PDF, Word and PowerPoint files and
+makes every builder decode the full-size image (reportlab also has to split
+out the alpha channel).
+
+This module decodes each chart once, flattens it onto white and produces
+per-target variants: resized to the exact placement size the builder uses,
+at the target's resolution, and palette-quantized (or losslessly
+recompressed, or JPEG-encoded). Variants are cached by source hash and
+variant parameters, so unchanged charts are never re-encoded. Builders
+receive a {chart name: path} mapping and embed the variant files.
+"""
+import hashlib
+import os
+
+CACHE_DIR = '.asset_cache'
+
+CHARTS = [
+    'day0_comparison.png',
+    'multiwindow_comparison.png',
+    'volatility_comparison.png',
+    'sp500_performance.png',
+    'russell1000_performance.png',
+    'index_comparison.png',
+]
+
+# Placement size in inches for each target. (width, height) is an exact box,
+# (width, None) keeps the aspect ratio. These mirror the Image()/add_picture()
+# calls in the builders.
+PLACEMENTS = {
+    'pdf': {
+        'day0_comparison.png': (6, 2.5),
+        'multiwindow_comparison.png': (6, 3),
+        'volatility_comparison.png': (6, 3),
+        'index_comparison.png': (6, 3),
+    },
+    'docx': {
+        'day0_comparison.png': (6, None),
+        'multiwindow_comparison.png': (6, None),
+        'sp500_performance.png': (6, None),
+        'russell1000_performance.png': (6, None),
+    },
+    'pptx': {
+        'day0_comparison.png': (8, None),
+        'multiwindow_comparison.png': (8, None),
+        'volatility_comparison.png': (8, None),
+    },
+}
+
+# Resolution the variant is rendered at for each target.
+TARGET_DPI = {'pdf': 200, 'docx': 150, 'pptx': 150}
+
+# Encodings every target can embed. WebP is left out on purpose: reportlab,
+# python-docx and python-pptx cannot embed it.
+ENCODINGS = ('palette', 'lossless', 'jpeg')
+DEFAULT_ENCODING = 'palette'
+JPEG_QUALITY = 85
+
+
+def source_hash(path):
+    """SHA-256 of a source image"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def flatten(img):
+    """Composite an RGBA/LA/P image onto a white background and return RGB"""
+    from PIL import Image as PILImage
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = PILImage.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+def variant_size(src_size, placement, dpi):
+    """Pixel size for a placement (inches) at `dpi`; never upscales"""
+    src_w, src_h = src_size
+    width_in, height_in = placement
+    w = round(width_in * dpi)
+    h = round(height_in * dpi) if height_in else round(w * src_h / src_w)
+    if w >= src_w and h >= src_h:
+        return src_size
+    return (min(w, src_w), min(h, src_h))
+
+
+def encode_variant(rgb, path, encoding):
+    """Write an RGB image to `path` using the requested encoding"""
+    from PIL import Image as PILImage
+    if encoding == 'jpeg':
+        rgb.save(path, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif encoding == 'palette':
+        # Charts are flat colours plus anti-aliased edges; 256 colours without
+        # dithering is visually lossless for them.
+        pal = rgb.quantize(colors=256, method=PILImage.Quantize.MEDIANCUT, dither=PILImage.Dither.NONE)
+        pal.save(path, format='PNG', optimize=True)
+    else:
+        rgb.save(path, format='PNG', optimize=True)
+
+
+def variant_path(name, digest, target, size, encoding, cache_dir=CACHE_DIR):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    ext = 'jpg' if encoding == 'jpeg' else 'png'
+    q = f"-q{JPEG_QUALITY}" if encoding == 'jpeg' else ''
+    return os.path.join(cache_dir, f"{stem}-{digest[:16]}-{target}-{size[0]}x{size[1]}-{encoding}{q}.{ext}")
+
+
+def prepare_variants(targets=tuple(PLACEMENTS), names=CHARTS, encoding=DEFAULT_ENCODING, cache_dir=CACHE_DIR):
+    """Build (or reuse) the variants for every target; return {target: {chart name: path}}
+
+    Each source image is decoded and flattened at most once, however many
+    targets need it, and only if at least one of its variants is missing.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding {encoding!r}; choose from {', '.join(ENCODINGS)}")
+    from PIL import Image as PILImage
+
+    os.makedirs(cache_dir, exist_ok=True)
+    result = {target: {} for target in targets}
+    for name in names:
+        wanted = [t for t in targets if name in PLACEMENTS[t]]
+        if not wanted or not os.path.exists(name):
+            continue
+        digest = source_hash(name)
+        with PILImage.open(name) as img:
+            src_size = img.size
+        rgb = None
+        for target in wanted:
+            size = variant_size(src_size, PLACEMENTS[target][name], TARGET_DPI[target])
+            path = variant_path(name, digest, target, size, encoding, cache_dir)
+            if not os.path.exists(path):
+                if rgb is None:
+                    with PILImage.open(name) as img:
+                        rgb = flatten(img)
+                resized = rgb if size == rgb.size else rgb.resize(size, PILImage.Resampling.LANCZOS)
+                tmp = path + '.tmp'
+                encode_variant(resized, tmp, encoding)
+                os.replace(tmp, path)
+            result[target][name] = path
+    return result
+
+
+def target_assets(target, encoding=DEFAULT_ENCODING):
+    """Variants for one target, or None (use originals) if Pillow is unavailable"""
+    try:
+        return prepare_variants((target,), encoding=encoding)[target]
+    except ImportError:
+        return None
+
+
+def asset_path(assets, name):
+    """Path a builder should embed for chart `name` (falls back to the original file)"""
+    if assets and name in assets:
+        return assets[name]
+    return name
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Prepare per-target chart variants")
+    parser.add_argument('--encoding', choices=ENCODINGS, default=DEFAULT_ENCODING)
+    args = parser.parse_args()
+
+    variants = prepare_variants(encoding=args.encoding)
+    print(f"{'Target':<6} | {'Chart':<28} | {'Source KB':>9} | {'Variant KB':>10}")
+    print("-" * 64)
+    for target, mapping in variants.items():
+        for name, path in mapping.items():
+            print(f"{target:<6} | {name:<28} | {os.path.getsize(name) / 1024:9.1f} | "
+                  f"{os.path.getsize(path) / 1024:10.1f}")
@@ -0,0 +1,292 @@
+"""
+Memory-mapped store for the IPO x window return matrix
+
+A directory of raw binary files opened with np.memmap, so an analysis entry
+point can open the data in milliseconds and only page in the columns it
+touches, instead of re-parsing stock_ipos_processed.csv:
+
+    meta.json             row count, column names, file layout
+    returns.f64           float64 [n_columns, n_rows], one contiguous run per column
+    dates.i64             ipo_date as days since 1970-01-01
+    symbol_codes.i32      per-row index into the symbol dictionary
+    symbol_offsets.i64    dictionary: byte offsets into symbol_bytes.bin
+    symbol_bytes.bin      dictionary: concatenated UTF-8 symbols
+    flag_<name>.bits      np.packbits bitmap per group flag (spac, sp, russell,
+                          day0_lvl), as set by identify_groups() / day0_lvl
+    cat_<name>.i32        per-row category code for sector and industry
+                          (-1 = missing); the categories are listed in meta.json
+
+Usage:
+    store = ReturnStore.open()
+    r = store.column('sym_252day_ret')           # memmap view, nothing read yet
+    r[store.mask('spac')].mean()
+
+    python return_store.py --write               # from stock_ipos_processed.csv
+    python return_store.py --benchmark 10000000  # synthetic cold start, in a fresh process
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+STORE_DIR = 'ipo_return_store'
+FLAG_COLUMNS = {
+    'spac': 'yes',
+    'sp': 'yes',
+    'russell': 'yes',
+    'day0_lvl': 'abnormal',
+}
+CATEGORY_COLUMNS = ['sector', 'industry']
+FORMAT_VERSION = 2
+
+
+class ReturnStore:
+    """Lazily memory-mapped view of a store directory"""
+
+    def __init__(self, path, meta, mode='r'):
+        self.path = path
+        self.meta = meta
+        self.mode = mode
+        self.n_rows = meta['n_rows']
+        self.return_columns = meta['return_columns']
+        self.flag_columns = meta['flag_columns']
+        self.categories = meta['categories']
+        self._index = {c: i for i, c in enumerate(self.return_columns)}
+        self._maps = {}
+
+    # -- opening -------------------------------------------------------------
+
+    @classmethod
+    def open(cls, path=STORE_DIR):
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported store version {meta.get('version')}")
+        return cls(path, meta)
+
+    @classmethod
+    def create(cls, path, n_rows, return_columns, flag_columns, n_symbols, symbol_bytes, categories=None):
+        """Empty writable store; fill it through the writable memmaps, then finish()"""
+        os.makedirs(path, exist_ok=True)
+        meta = {'version': FORMAT_VERSION, 'n_rows': int(n_rows), 'return_columns': list(return_columns),
+                'flag_columns': list(flag_columns), 'n_symbols': int(n_symbols),
+                'symbol_bytes': int(symbol_bytes),
+                'categories': {name: list(values) for name, values in (categories or {}).items()}}
+        return cls(path, meta, mode='w+')
+
+    def finish(self):
+        """Flush the data and write meta.json last, so a partial store never opens"""
+        for mm in self._maps.values():
+            mm.flush()
+        self._maps.clear()
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+        self.mode = 'r'
+
+    def _map(self, name, dtype, shape):
+        if name not in self._maps:
+            self._maps[name] = np.memmap(os.path.join(self.path, name), dtype=dtype,
+                                         mode=self.mode, shape=shape)
+        return self._maps[name]
+
+    # -- data ----------------------------------------------------------------
+
+    @property
+    def returns(self):
+        """float64 [n_columns, n_rows] memmap"""
+        return self._map('returns.f64', np.float64, (len(self.return_columns), self.n_rows))
+
+    def column(self, name):
+        """One return column as a contiguous memmap view"""
+        return self.returns[self._index[name]]
+
+    @property
+    def dates(self):
+        """int64 day ordinals (days since 1970-01-01)"""
+        return self._map('dates.i64', np.int64, (self.n_rows,))
+
+    def bitmap(self, flag):
+        """Packed bitmap for a group flag"""
+        return self._map(f'flag_{flag}.bits', np.uint8, ((self.n_rows + 7) // 8,))
+
+    def mask(self, flag):
+        """Boolean mask for a group flag"""
+        return np.unpackbits(self.bitmap(flag), count=self.n_rows).view(np.bool_)
+
+    def category_codes(self, name):
+        """int32 codes into self.categories[name]; -1 where the value is missing"""
+        return self._map(f'cat_{name}.i32', np.int32, (self.n_rows,))
+
+    @property
+    def symbol_codes(self):
+        return self._map('symbol_codes.i32', np.int32, (self.n_rows,))
+
+    def symbols(self, codes=None):
+        """Decode symbol codes (all rows by default) to an array of strings"""
+        offsets = self._map('symbol_offsets.i64', np.int64, (self.meta['n_symbols'] + 1,))
+        blob = self._map('symbol_bytes.bin', np.uint8, (max(self.meta['symbol_bytes'], 1),))
+        codes = self.symbol_codes if codes is None else np.asarray(codes)
+        dictionary = {}
+        out = []
+        for code in codes.tolist():
+            if code not in dictionary:
+                dictionary[code] = bytes(blob[offsets[code]:offsets[code + 1]]).decode('utf-8')
+            out.append(dictionary[code])
+        return np.array(out, dtype=object)
+
+    def to_frame(self, columns=None, flags=None, categories=None, symbols=False):
+        """pandas DataFrame of the requested columns (only those are read)"""
+        import pandas as pd
+        data = {}
+        if symbols:
+            data['symbol'] = self.symbols()
+        data['ipo_date'] = self.dates.astype('datetime64[D]')
+        for col in columns or self.return_columns:
+            data[col] = np.asarray(self.column(col))
+        for flag in flags or []:
+            data[flag] = np.where(self.mask(flag), FLAG_COLUMNS[flag], 'no' if FLAG_COLUMNS[flag] == 'yes' else 'normal')
+        for name in categories or []:
+            data[name] = pd.Categorical.from_codes(np.asarray(self.category_codes(name)), self.categories[name])
+        return pd.DataFrame(data)
+
+
+def _pack_dictionary(uniques):
+    encoded = [str(u).encode('utf-8') for u in uniques]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return offsets, b''.join(encoded)
+
+
+def write_store(stock_ipos, path=STORE_DIR):
+    """Write the processed frame to a new store at `path` (replacing any old one)"""
+    import pandas as pd
+    return_columns = [c for c in stock_ipos.columns if c.startswith(('sym_', 'iwv_'))]
+    flag_columns = [c for c in FLAG_COLUMNS if c in stock_ipos.columns]
+    codes, uniques = pd.factorize(stock_ipos['symbol'].astype(str))
+    offsets, blob = _pack_dictionary(uniques)
+    category_codes = {name: pd.factorize(stock_ipos[name], sort=True)
+                      for name in CATEGORY_COLUMNS if name in stock_ipos.columns}
+
+    tmp = path + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    store = ReturnStore.create(tmp, len(stock_ipos), return_columns, flag_columns, len(uniques), len(blob),
+                               {name: [str(v) for v in values] for name, (_, values) in category_codes.items()})
+    for i, col in enumerate(return_columns):
+        store.returns[i] = stock_ipos[col].to_numpy(dtype=np.float64)
+    store.dates[:] = stock_ipos['ipo_date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+    store.symbol_codes[:] = codes
+    for flag in flag_columns:
+        store.bitmap(flag)[:] = np.packbits((stock_ipos[flag] == FLAG_COLUMNS[flag]).to_numpy())
+    for name, (values, _) in category_codes.items():
+        store.category_codes(name)[:] = values
+    offsets.tofile(os.path.join(tmp, 'symbol_offsets.i64'))
+    with open(os.path.join(tmp, 'symbol_bytes.bin'), 'wb') as f:
+        f.write(blob)
+    store.finish()
+
+    old = path + '.old'
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def write_synthetic(path, n_rows, chunk=1_000_000, seed=0):
+    """A synthetic store of `n_rows` IPOs, generated chunk by chunk"""
+    rng = np.random.default_rng(seed)
+    windows = ['day0_OTC', '1day_ret', '5day_ret', '22day_ret', '91day_ret', '252day_ret']
+    return_columns = [f'{p}_{w}' for p in ('sym', 'iwv') for w in windows]
+    n_symbols = max(n_rows // 2, 1)
+    offsets, blob = _pack_dictionary(f'S{i:07d}' for i in range(n_symbols))
+
+    shutil.rmtree(path, ignore_errors=True)
+    store = ReturnStore.create(path, n_rows, return_columns, list(FLAG_COLUMNS), n_symbols, len(blob))
+    for start in range(0, n_rows, chunk):
+        stop = min(start + chunk, n_rows)
+        n = stop - start
+        for i in range(len(return_columns)):
+            store.returns[i, start:stop] = rng.standard_t(3, n) * 0.1
+        store.dates[start:stop] = rng.integers(15340, 19630, n)
+        store.symbol_codes[start:stop] = rng.integers(0, n_symbols, n)
+    for flag, share in zip(FLAG_COLUMNS, (0.07, 0.015, 0.04, 0.02)):
+        store.bitmap(flag)[:] = np.packbits(rng.random(n_rows) < share)
+    offsets.tofile(os.path.join(path, 'symbol_offsets.i64'))
+    with open(os.path.join(path, 'symbol_bytes.bin'), 'wb') as f:
+        f.write(blob)
+    store.finish()
+    return path
+
+
+def evict(path):
+    """Drop the store's files from the OS page cache, so the next open reads from disk"""
+    for name in os.listdir(path):
+        fd = os.open(os.path.join(path, name), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def _cold_query(path):
+    """Benchmark child: open the store and compute the SPAC vs non-SPAC 252-day mean"""
+    start = time.perf_counter()
+    store = ReturnStore.open(path)
+    opened = time.perf_counter()
+    spac = store.mask('spac')
+    r = store.column('sym_252day_ret')
+    spac_mean, other_mean = r[spac].mean(), r[~spac].mean()
+    done = time.perf_counter()
+    print(json.dumps({'open': opened - start, 'query': done - opened,
+                      'spac_mean': spac_mean, 'other_mean': other_mean}))
+
+
+def benchmark(n_rows, path):
+    start = time.perf_counter()
+    write_synthetic(path, n_rows)
+    print(f"Wrote {n_rows:,}-row synthetic store in {time.perf_counter() - start:.1f}s "
+          f"({sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2**20:,.0f} MB)")
+
+    # a fresh interpreter on an evicted store: nothing is warm from writing it
+    evict(path)
+    start = time.perf_counter()
+    child = subprocess.run([sys.executable, os.path.abspath(__file__), '--cold-start', path],
+                           capture_output=True, text=True, check=True)
+    total = time.perf_counter() - start
+    result = json.loads(child.stdout)
+    print(f"open {1000 * result['open']:.1f} ms; SPAC vs non-SPAC 252-day mean "
+          f"({result['spac_mean']:.4f} / {result['other_mean']:.4f}) {1000 * result['query']:.0f} ms; "
+          f"cold start total {total:.3f}s including interpreter start-up")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Memory-mapped IPO return store")
+    parser.add_argument('--write', action='store_true', help="build the store from stock_ipos_processed.csv")
+    parser.add_argument('--benchmark', type=int, metavar='N', help="cold start on N synthetic IPOs")
+    parser.add_argument('--path', default=None)
+    parser.add_argument('--cold-start', metavar='PATH', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start:
+        _cold_query(args.cold_start)
+    elif args.benchmark:
+        benchmark(args.benchmark, args.path or STORE_DIR + '_synthetic')
+    else:
+        if args.write or not os.path.exists(STORE_DIR):
+            import pandas as pd
+            from ipo_dates import ISO_FORMAT, parse_ipo_dates
+            stock_ipos = pd.read_csv('stock_ipos_processed.csv')
+            stock_ipos['ipo_date'] = parse_ipo_dates(stock_ipos['ipo_date'], ISO_FORMAT)
+            write_store(stock_ipos)
+        store = ReturnStore.open(args.path or STORE_DIR)
+        print(f"{store.n_rows:,} rows; columns: {', '.join(store.return_columns)}; "
+              f"flags: {', '.join(store.flag_columns)}")
@@ -0,0 +1,317 @@
+"""
+Batched robust regressions for heavy-tailed IPO returns
+
+sym_252day_ret has a standard deviation near 3 and a handful of extreme
+values, which is why predictive_analysis() excludes influential observations
+(influence_diagnostics.py) before refitting. fit_all() gives the robust
+alternatives for every window pair (earlier window -> later window,
+y = a + b x) in one call:
+
+    ols         least squares, for reference
+    quantile    check-loss regression at each requested quantile
+    huber       Huber M-estimation (t = 1.345, MAD scale re-estimated each step)
+    theil_sen   median of pairwise slopes
+
+Quantile and Huber fits are iteratively reweighted least squares run on
+all pairs (and all quantiles) at once: the data are [batch x rows] arrays,
+each iteration is one weighted 2x2 solve per batch row in closed form, and
+batch rows drop out as they converge. The iterations follow statsmodels
+QuantReg and RLM(HuberT()) so the estimates agree with them (--check).
+
+Theil-Sen uses every pair of IPOs when there are at most MAX_PAIRS pairs
+(about 6,300 IPOs; the 3,700 IPOs of the current snapshot give 6.8M pairs
+and an exact fit in about 0.2s) and otherwise a fixed-seed random sample of
+MAX_PAIRS pairs, marked `sampled` in the output; the window pairs are spread
+over worker processes.
+
+    python robust_regression.py                      # writes robust_regressions.csv
+    python robust_regression.py --check              # against statsmodels / scipy
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+OUTPUT_FILE = 'robust_regressions.csv'
+WINDOWS = ['sym_day0_OTC', 'sym_1day_ret', 'sym_5day_ret', 'sym_22day_ret', 'sym_91day_ret', 'sym_252day_ret']
+PAIRS = [(x, y) for i, x in enumerate(WINDOWS) for y in WINDOWS[i + 1:]]
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+METHODS = ('ols', 'quantile', 'huber', 'theil_sen')
+HUBER_T = 1.345
+MAX_PAIRS = 20_000_000
+
+
+def _design(stock_ipos, pairs):
+    """[batch, rows] x, y and 0/1 weights marking the rows usable for each pair"""
+    x = np.stack([stock_ipos[px].to_numpy(dtype=float) for px, _ in pairs])
+    y = np.stack([stock_ipos[py].to_numpy(dtype=float) for _, py in pairs])
+    mask = (~np.isnan(x) & ~np.isnan(y)).astype(float)
+    return np.nan_to_num(x), np.nan_to_num(y), mask
+
+
+def wls(x, y, w):
+    """Weighted simple regression per batch row: (intercept, slope) arrays"""
+    sw = w.sum(axis=1)
+    mx = (w * x).sum(axis=1) / sw
+    my = (w * y).sum(axis=1) / sw
+    dx = x - mx[:, None]
+    slope = (w * dx * (y - my[:, None])).sum(axis=1) / (w * dx * dx).sum(axis=1)
+    return my - slope * mx, slope
+
+
+def _residuals(x, y, intercept, slope):
+    return y - intercept[:, None] - slope[:, None] * x
+
+
+def fit_quantile(x, y, mask, quantiles, p_tol=1e-6, max_iter=1000):
+    """IRLS quantile regression (as statsmodels QuantReg) for every batch row x quantile
+
+    Returns intercept, slope, iterations, converged, each [len(quantiles), batch].
+    """
+    q = np.repeat(np.asarray(quantiles, dtype=float), len(x))[:, None]
+    xb, yb, mb = (np.tile(a, (len(quantiles), 1)) for a in (x, y, mask))
+    intercept, slope = wls(xb, yb, mb)
+    iterations = np.zeros(len(xb), dtype=int)
+    active = np.ones(len(xb), dtype=bool)
+    # work on compacted copies of the unconverged rows; re-compact only when some converge
+    idx = np.arange(len(xb))
+    xa, ya, ma, qa = xb, yb, mb, q
+    for it in range(1, max_iter + 1):
+        r = _residuals(xa, ya, intercept[idx], slope[idx])
+        r = np.where(np.abs(r) < 1e-6, np.where(r >= 0, 1e-6, -1e-6), r)
+        w = ma / np.abs(np.where(r < 0, qa * r, (1 - qa) * r))
+        new_intercept, new_slope = wls(xa, ya, w)
+        diff = np.maximum(np.abs(new_intercept - intercept[idx]), np.abs(new_slope - slope[idx]))
+        intercept[idx], slope[idx] = new_intercept, new_slope
+        iterations[idx] = it
+        done = diff < p_tol
+        if done.any():
+            active[idx[done]] = False
+            keep = ~done
+            idx, xa, ya, ma, qa = idx[keep], xa[keep], ya[keep], ma[keep], qa[keep]
+            if not len(idx):
+                break
+    shape = (len(quantiles), len(x))
+    return (intercept.reshape(shape), slope.reshape(shape), iterations.reshape(shape),
+            (~active).reshape(shape))
+
+
+def _mad_scale(r, mask):
+    """Median absolute residual / 0.6745 per batch row (statsmodels mad, center 0)"""
+    return np.nanmedian(np.where(mask > 0, np.abs(r), np.nan), axis=1) / 0.6744897501960817
+
+
+def _huber_rho(z, t=HUBER_T):
+    a = np.abs(z)
+    return np.where(a <= t, 0.5 * z * z, t * a - 0.5 * t * t)
+
+
+def fit_huber(x, y, mask, t=HUBER_T, tol=1e-8, max_iter=50):
+    """Huber M-estimation by IRLS (as statsmodels RLM with HuberT, scale 'mad', conv 'dev')
+
+    Returns intercept, slope, iterations, converged, each [batch].
+    """
+    intercept, slope = wls(x, y, mask)
+    r = _residuals(x, y, intercept, slope)
+    scale = _mad_scale(r, mask)
+    deviance = np.full(len(x), np.inf)
+    iterations = np.ones(len(x), dtype=int)
+    active = np.ones(len(x), dtype=bool)
+    while active.any():
+        idx = np.flatnonzero(active)
+        z = np.abs(r[idx] / scale[idx, None])
+        w = mask[idx] * np.where(z <= t, 1.0, t / np.maximum(z, t))
+        intercept[idx], slope[idx] = wls(x[idx], y[idx], w)
+        r[idx] = _residuals(x[idx], y[idx], intercept[idx], slope[idx])
+        scale[idx] = _mad_scale(r[idx], mask[idx])
+        new_deviance = (mask[idx] * _huber_rho(r[idx] / scale[idx, None], t)).sum(axis=1)
+        iterations[idx] += 1
+        done = (np.abs(new_deviance - deviance[idx]) <= tol) | (iterations[idx] >= max_iter)
+        deviance[idx] = new_deviance
+        active[idx[done]] = False
+    converged = iterations < max_iter
+    return intercept, slope, iterations, converged
+
+
+def theil_sen(x, y, max_pairs=MAX_PAIRS, seed=0, chunk=256):
+    """(intercept, slope, exact) for one window pair; NaN rows must already be removed
+
+    Intercept as scipy.stats.theilslopes: median(y) - slope * median(x).
+    """
+    n = len(x)
+    exact = max_pairs is None or n * (n - 1) // 2 <= max_pairs
+    if exact:
+        # filled in place and partitioned in place: peak memory is one slope per pair
+        slopes = np.empty(n * (n - 1) // 2)
+        filled = 0
+        cols = np.arange(n)
+        for start in range(0, n, chunk):
+            rows = np.arange(start, min(start + chunk, n))[:, None]
+            dx = x[None, :] - x[rows]
+            keep = (cols[None, :] > rows) & (dx != 0)
+            block = (y[None, :] - y[rows])[keep] / dx[keep]
+            slopes[filled:filled + len(block)] = block
+            filled += len(block)
+        slopes = slopes[:filled]
+    else:
+        rng = np.random.default_rng(seed)
+        i, j = rng.integers(n, size=max_pairs), rng.integers(n, size=max_pairs)
+        dx = x[j] - x[i]
+        keep = dx != 0
+        slopes = (y[j] - y[i])[keep] / dx[keep]
+    slope = _median_inplace(slopes)
+    return np.median(y) - slope * np.median(x), slope, exact
+
+
+def _median_inplace(values):
+    """np.median without the copy; reorders `values`"""
+    half = len(values) // 2
+    if len(values) % 2:
+        values.partition(half)
+        return values[half]
+    values.partition([half - 1, half])
+    return 0.5 * (values[half - 1] + values[half])
+
+
+def _theil_sen_task(x, y, max_pairs):
+    ok = ~np.isnan(x) & ~np.isnan(y)
+    return theil_sen(x[ok], y[ok], max_pairs)
+
+
+def fit_all(stock_ipos, pairs=PAIRS, quantiles=QUANTILES, methods=METHODS, max_pairs=MAX_PAIRS, workers=None):
+    """Tidy DataFrame with one row per window pair x method (x quantile)
+
+    Columns: x, y, method, quantile, intercept, slope, n, iterations, converged,
+    sampled (Theil-Sen on a sample of IPO pairs), pairs (IPO pairs the
+    Theil-Sen median is taken over, 0 for other methods), seconds (per fit)
+    """
+    pairs = list(pairs)
+    x, y, mask = _design(stock_ipos, pairs)
+    n = mask.sum(axis=1).astype(int)
+    frames = []
+
+    def add(method, intercept, slope, quantile=np.nan, iterations=1, converged=True, sampled=False, n_pairs=0,
+            seconds=0.0):
+        frames.append(pd.DataFrame({
+            'x': [p[0] for p in pairs], 'y': [p[1] for p in pairs], 'method': method,
+            'quantile': quantile, 'intercept': intercept, 'slope': slope, 'n': n,
+            'iterations': iterations, 'converged': converged, 'sampled': sampled,
+            'pairs': n_pairs, 'seconds': seconds / len(pairs),
+        }))
+
+    # Theil-Sen is the expensive part: start it in worker processes first
+    theil_futures = pool = None
+    if 'theil_sen' in methods:
+        workers = workers or os.cpu_count() or 1
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=min(workers, len(pairs)))
+            start_ts = time.perf_counter()
+            theil_futures = [pool.submit(_theil_sen_task, stock_ipos[px].to_numpy(dtype=float),
+                                         stock_ipos[py].to_numpy(dtype=float), max_pairs) for px, py in pairs]
+    try:
+        if 'ols' in methods:
+            start = time.perf_counter()
+            add('ols', *wls(x, y, mask), seconds=time.perf_counter() - start)
+        if 'quantile' in methods:
+            start = time.perf_counter()
+            intercept, slope, iterations, converged = fit_quantile(x, y, mask, quantiles)
+            seconds = (time.perf_counter() - start) / len(quantiles)
+            for k, q in enumerate(quantiles):
+                add('quantile', intercept[k], slope[k], q, iterations[k], converged[k], seconds=seconds)
+        if 'huber' in methods:
+            start = time.perf_counter()
+            intercept, slope, iterations, converged = fit_huber(x, y, mask)
+            add('huber', intercept, slope, iterations=iterations, converged=converged,
+                seconds=time.perf_counter() - start)
+        if 'theil_sen' in methods:
+            if theil_futures is None:
+                start_ts = time.perf_counter()
+                results = [_theil_sen_task(stock_ipos[px].to_numpy(dtype=float),
+                                           stock_ipos[py].to_numpy(dtype=float), max_pairs) for px, py in pairs]
+            else:
+                results = [f.result() for f in theil_futures]
+            intercept, slope, exact = (np.array(v) for v in zip(*results))
+            n_pairs = np.where(exact, n * (n - 1) // 2, max_pairs or 0)
+            add('theil_sen', intercept, slope, sampled=~exact, n_pairs=n_pairs,
+                seconds=time.perf_counter() - start_ts)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def slope_table(table, x='sym_22day_ret', y='sym_252day_ret'):
+    """Slope of one window pair under every method, one row per method/quantile"""
+    rows = table[(table['x'] == x) & (table['y'] == y)]
+    label = (rows['method'] + rows['quantile'].map(lambda q: '' if np.isnan(q) else f' q={q:g}')
+             + rows['sampled'].map({True: ' (sampled)', False: ''}))
+    return rows.assign(method=label).set_index('method')[['intercept', 'slope', 'iterations']]
+
+
+def _check_loss(x, y, intercept, slope, q):
+    r = y - intercept - slope * x
+    return np.sum(np.where(r < 0, (q - 1) * r, q * r))
+
+
+def check(stock_ipos, table):
+    """Differences from statsmodels OLS / QuantReg / RLM and scipy theilslopes
+
+    The quantile objective is flat near its minimum and both solvers stop
+    at an approximate minimizer, so quantile fits are compared on the
+    check loss they reach rather than on the slope.
+    """
+    import warnings
+    import statsmodels.api as sm
+    from scipy import stats
+
+    worst = {}
+    for row in table.itertuples(index=False):
+        data = stock_ipos[[row.x, row.y]].dropna()
+        x, endog = data[row.x].to_numpy(), data[row.y].to_numpy()
+        exog = sm.add_constant(x)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            if row.method == 'ols':
+                ref = sm.OLS(endog, exog).fit().params[1]
+            elif row.method == 'quantile':
+                a, b = sm.QuantReg(endog, exog).fit(q=row.quantile).params
+                ref = _check_loss(x, endog, a, b, row.quantile)
+                ours = _check_loss(x, endog, row.intercept, row.slope, row.quantile)
+                worst['quantile'] = max(worst.get('quantile', -np.inf), (ours - ref) / ref)
+                continue
+            elif row.method == 'huber':
+                ref = sm.RLM(endog, exog, M=sm.robust.norms.HuberT()).fit().params[1]
+            else:
+                ref = stats.theilslopes(endog, x).slope
+        # sampled Theil-Sen fits are compared too, but reported on their own line
+        method = 'theil_sen (sampled)' if row.method == 'theil_sen' and row.sampled else row.method
+        worst[method] = max(worst.get(method, 0.0), abs(ref - row.slope) / max(abs(ref), 1e-12))
+    for method, diff in worst.items():
+        what = "check loss above statsmodels" if method == 'quantile' else "relative slope difference"
+        print(f"{method:<19} max {what}: {diff:.2e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Quantile, Huber and Theil-Sen fits for every window pair")
+    parser.add_argument('--quantiles', type=float, nargs='*', default=QUANTILES)
+    parser.add_argument('--max-pairs', type=int, default=MAX_PAIRS,
+                        help="Theil-Sen: sample this many IPO pairs when there are more (0 = all pairs)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--check', action='store_true', help="compare with statsmodels and scipy")
+    args = parser.parse_args()
+
+    stock_ipos = pd.read_csv('stock_ipos_processed.csv')
+    start = time.perf_counter()
+    table = fit_all(stock_ipos, quantiles=args.quantiles, max_pairs=args.max_pairs or None, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    table.to_csv(OUTPUT_FILE, index=False)
+    print(slope_table(table).round(4).to_string())
+    print(f"\n{len(PAIRS)} window pairs, {len(table)} fits in {elapsed:.2f}s "
+          f"({table.groupby('method')['seconds'].sum().round(3).to_dict()}); saved to {OUTPUT_FILE}")
+    if args.check:
+        check(stock_ipos, table)
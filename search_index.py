@@ -0,0 +1,264 @@
+"""
+Full-text and numeric search over the generated deliverables
+
+Reports and decks (.md, .docx, .pdf, .pptx and the captured .txt outputs)
+are split into locations (a page, a slide, a paragraph, a table cell or a
+line) and indexed into an inverted word index plus a sorted numeric-value
+index. PDF pages come from extract_pdf's per-page cache and slides from
+compare_presentations' cached deck fingerprints.
+
+The index lives in .search_index/: one shard per document, keyed by the
+document's SHA-256, and a manifest mapping paths to shards. Rebuilding only
+re-extracts files whose hash changed and drops shards of deleted files.
+
+Usage:
+    python search_index.py --update               # index the project directory
+    python search_index.py 1.4%                   # where does 1.4% appear
+    python search_index.py "abnormal returns"     # phrase search
+    python search_index.py 2.09% --approx         # also match values that round to it
+"""
+import argparse
+import bisect
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+INDEX_DIR = '.search_index'
+PATTERNS = ['*.md', '*.docx', '*.pdf', '*.pptx', '*.txt']
+SNIPPET_CHARS = 60
+
+WORD_RE = re.compile(r"[a-z0-9]+(?:[.'&][a-z0-9]+)*")
+NUMBER_RE = re.compile(r'(?<![\w.])([-+−]?)(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?(%?)(?!\w|\.\d)')
+
+
+# ---------------------------------------------------------------------------
+# Extraction: every extractor returns [(location, text)]
+# ---------------------------------------------------------------------------
+
+def locations_text(path):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return [(f"line {i}", line.rstrip('\n')) for i, line in enumerate(f, 1) if line.strip()]
+
+
+def locations_docx(path):
+    from docx import Document
+    doc = Document(path)
+    out = [(f"paragraph {i}", p.text) for i, p in enumerate(doc.paragraphs, 1) if p.text.strip()]
+    for t, table in enumerate(doc.tables, 1):
+        for r, row in enumerate(table.rows, 1):
+            out.append((f"table {t} row {r}", " | ".join(c.text for c in row.cells)))
+    return out
+
+
+def locations_pdf(path):
+    from extract_pdf import pdf_pages
+    return [(f"page {i}", text) for i, text in enumerate(pdf_pages(path), 1) if text and text.strip()]
+
+
+def locations_pptx(path):
+    from compare_presentations import parse_deck
+    out = []
+    for i, slide in enumerate(parse_deck(path), 1):
+        out.extend((f"slide {i}", text) for text in slide['texts'])
+        for t, table in enumerate(slide['tables'], 1):
+            for r, row in enumerate(table, 1):
+                out.append((f"slide {i} table {t} row {r}", " | ".join(row)))
+    return out
+
+
+EXTRACTORS = {'.md': locations_text, '.txt': locations_text, '.docx': locations_docx,
+              '.pdf': locations_pdf, '.pptx': locations_pptx}
+
+
+def parse_number(sign, digits, decimals, percent):
+    """(value, decimal places, is percent) for a NUMBER_RE match"""
+    value = float(digits.replace(',', '') + (decimals or ''))
+    if sign in ('-', '−'):
+        value = -value
+    return value, len(decimals) - 1 if decimals else 0, bool(percent)
+
+
+def build_shard(path):
+    """Inverted index and numeric index for one document"""
+    locations = EXTRACTORS[os.path.splitext(path)[1].lower()](path)
+    terms, numbers = {}, []
+    for loc_id, (_, text) in enumerate(locations):
+        for term in set(WORD_RE.findall(text.lower())):
+            terms.setdefault(term, []).append(loc_id)
+        for m in NUMBER_RE.finditer(text):
+            value, places, percent = parse_number(*m.groups())
+            numbers.append([value, places, percent, loc_id, m.start()])
+    return {'locations': locations, 'terms': terms, 'numbers': numbers}
+
+
+# ---------------------------------------------------------------------------
+# On-disk index
+# ---------------------------------------------------------------------------
+
+def file_hash(path):
+    """SHA-256 of a document; keys its shard"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def discover(root='.', patterns=PATTERNS):
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(os.path.join(root, pattern)))
+    # skip Office lock files (~$name.docx)
+    return sorted(p for p in paths if not os.path.basename(p).startswith('~$'))
+
+
+def _manifest_path(index_dir):
+    return os.path.join(index_dir, 'manifest.json')
+
+
+def _shard_path(index_dir, digest):
+    return os.path.join(index_dir, 'shards', f"{digest}.json")
+
+
+def load_manifest(index_dir=INDEX_DIR):
+    if os.path.exists(_manifest_path(index_dir)):
+        with open(_manifest_path(index_dir), encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def update_index(paths, index_dir=INDEX_DIR, workers=None):
+    """Bring the index up to date with `paths`; returns (indexed, reused, dropped)"""
+    manifest = load_manifest(index_dir)
+    os.makedirs(os.path.join(index_dir, 'shards'), exist_ok=True)
+    new_manifest, todo = {}, {}
+    for path in paths:
+        digest = file_hash(path)
+        new_manifest[path] = digest
+        if not os.path.exists(_shard_path(index_dir, digest)):
+            todo[path] = digest
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {path: pool.submit(build_shard, path) for path in todo}
+            for path, fut in futures.items():
+                shard_file = _shard_path(index_dir, todo[path])
+                with open(shard_file + '.tmp', 'w', encoding='utf-8') as f:
+                    json.dump(fut.result(), f)
+                os.replace(shard_file + '.tmp', shard_file)
+
+    live = set(new_manifest.values())
+    dropped = [p for p in manifest if p not in new_manifest]
+    for digest in set(manifest.values()) - live:
+        if os.path.exists(_shard_path(index_dir, digest)):
+            os.remove(_shard_path(index_dir, digest))
+    with open(_manifest_path(index_dir) + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(new_manifest, f, indent=2)
+    os.replace(_manifest_path(index_dir) + '.tmp', _manifest_path(index_dir))
+    return len(todo), len(paths) - len(todo), len(dropped)
+
+
+class SearchIndex:
+    """Read-only view of the on-disk index, merged across documents"""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.docs = []       # [(path, locations)]
+        self.terms = {}      # term -> [(doc id, location id)]
+        values = []          # (value, percent, doc id, location id, offset)
+        for doc_id, (path, digest) in enumerate(sorted(load_manifest(index_dir).items())):
+            with open(_shard_path(index_dir, digest), encoding='utf-8') as f:
+                shard = json.load(f)
+            self.docs.append((path, shard['locations']))
+            for term, loc_ids in shard['terms'].items():
+                self.terms.setdefault(term, []).extend((doc_id, loc) for loc in loc_ids)
+            values.extend((v, pct, doc_id, loc, off) for v, _, pct, loc, off in shard['numbers'])
+        values.sort()
+        self.values = values
+        self.keys = [v[0] for v in values]
+
+    def search_number(self, query, approx=False):
+        """Hits for a number like '1.4%', '-0.88' or '3,681'
+
+        By default the value must be equal (1.4% matches 1.40%); with
+        approx=True any value that rounds to the query at its precision
+        matches (1.4% also matches 1.37%).
+        """
+        m = NUMBER_RE.fullmatch(query.strip())
+        if not m:
+            raise ValueError(f"Not a number: {query!r}")
+        value, places, percent = parse_number(*m.groups())
+        half = 0.5 * 10 ** -places if approx else 1e-9
+        lo = bisect.bisect_left(self.keys, value - half)
+        hi = bisect.bisect_left(self.keys, value + half) if approx else bisect.bisect_right(self.keys, value + half)
+        hits = []
+        for v, pct, doc_id, loc, off in self.values[lo:hi]:
+            if pct == percent:
+                hits.append((doc_id, loc, off))
+        return hits
+
+    def search_text(self, query):
+        """Hits for a word or phrase (case-insensitive)"""
+        words = WORD_RE.findall(query.lower())
+        if not words:
+            return []
+        postings = [set(self.terms.get(w, ())) for w in words]
+        candidates = set.intersection(*postings)
+        phrase = re.compile(r'\s+'.join(re.escape(w) for w in query.split()), re.I)
+        hits = []
+        for doc_id, loc in sorted(candidates):
+            m = phrase.search(self.docs[doc_id][1][loc][1])
+            if m:
+                hits.append((doc_id, loc, m.start()))
+        return hits
+
+    def search(self, query, approx=False):
+        if NUMBER_RE.fullmatch(query.strip()):
+            return self.search_number(query, approx)
+        return self.search_text(query)
+
+    def describe(self, hit):
+        """(path, location, snippet) for a hit"""
+        doc_id, loc, off = hit
+        path, locations = self.docs[doc_id]
+        where, text = locations[loc]
+        start = max(off - SNIPPET_CHARS // 2, 0)
+        snippet = " ".join(text[start:start + SNIPPET_CHARS].split())
+        return path, where, snippet
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the generated reports and decks")
+    parser.add_argument('query', nargs='*', help="number (e.g. 1.4%%) or word/phrase")
+    parser.add_argument('--update', action='store_true', help="re-index changed files first")
+    parser.add_argument('--root', default='.', help="directory to index")
+    parser.add_argument('--approx', action='store_true', help="match numbers that round to the query")
+    parser.add_argument('--index-dir', default=INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.update or not os.path.exists(_manifest_path(args.index_dir)):
+        start = time.perf_counter()
+        indexed, reused, dropped = update_index(discover(args.root), args.index_dir)
+        print(f"Index updated: {indexed} indexed, {reused} unchanged, {dropped} removed "
+              f"({time.perf_counter() - start:.2f}s)")
+
+    if not args.query:
+        return
+    start = time.perf_counter()
+    index = SearchIndex(args.index_dir)
+    loaded = time.perf_counter()
+    query = " ".join(args.query)
+    hits = index.search(query, args.approx)
+    done = time.perf_counter()
+    for hit in hits:
+        path, where, snippet = index.describe(hit)
+        print(f"{path}:{where}: ...{snippet}...")
+    print(f"\n{len(hits)} hit(s) for {query!r} (load {(loaded - start) * 1000:.1f} ms, "
+          f"query {(done - loaded) * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Zero-copy shared return matrix for worker processes
+
+Submitting a task with the pandas frame as an argument pickles the whole
+frame to the worker every time. SharedReturns instead copies the prepared
+columns into one multiprocessing.shared_memory block, once:
+
+    returns  float64  [n_returns, n_rows]  the sym_* / iwv_* columns
+    flags    bool     [n_flags, n_rows]    spac, sp, russell (== 'yes'), day0_lvl (== 'abnormal')
+    dates    int64    [n_rows]             ipo_date as days since 1970-01-01
+
+Each column is contiguous. Workers receive only a small descriptor (block
+name, shape, column names) and attach NumPy views onto the same memory, so
+per-worker start-up cost and memory stay constant as the dataset grows.
+
+Usage:
+    with SharedReturns.export(stock_ipos) as shared:
+        with ProcessPoolExecutor(initializer=attach_worker, initargs=(shared.descriptor,)) as pool:
+            pool.map(task, ...)          # task() calls worker_view()
+
+    python shared_returns.py --benchmark   # pickled frame vs shared block
+"""
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+FLAG_COLUMNS = {
+    'spac': 'yes',
+    'sp': 'yes',
+    'russell': 'yes',
+    'day0_lvl': 'abnormal',
+}
+
+
+class SharedReturns:
+    """NumPy views onto a shared block; the exporting process owns (unlinks) it"""
+
+    def __init__(self, descriptor, shm, owner):
+        self.descriptor = descriptor
+        self._shm = shm
+        self._owner = owner
+        n = descriptor['n_rows']
+        n_ret, n_flag = len(descriptor['return_columns']), len(descriptor['flag_columns'])
+        buf = shm.buf
+        offset = 0
+        self.returns_matrix = np.ndarray((n_ret, n), dtype=np.float64, buffer=buf, offset=offset)
+        offset += self.returns_matrix.nbytes
+        self.dates = np.ndarray((n,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self.dates.nbytes
+        self.flags_matrix = np.ndarray((n_flag, n), dtype=np.bool_, buffer=buf, offset=offset)
+        if not owner:
+            for arr in (self.returns_matrix, self.dates, self.flags_matrix):
+                arr.flags.writeable = False
+        self.returns = dict(zip(descriptor['return_columns'], self.returns_matrix))
+        self.flags = dict(zip(descriptor['flag_columns'], self.flags_matrix))
+
+    @classmethod
+    def export(cls, stock_ipos):
+        """Copy the return columns, flags and dates of `stock_ipos` into a new block"""
+        return_columns = [c for c in stock_ipos.columns if c.startswith(('sym_', 'iwv_'))]
+        flag_columns = [c for c in FLAG_COLUMNS if c in stock_ipos.columns]
+        n = len(stock_ipos)
+        size = n * (8 * len(return_columns) + 8 + len(flag_columns))
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        descriptor = {'name': shm.name, 'n_rows': n,
+                      'return_columns': return_columns, 'flag_columns': flag_columns}
+        shared = cls(descriptor, shm, owner=True)
+        for i, col in enumerate(return_columns):
+            shared.returns_matrix[i] = stock_ipos[col].to_numpy(dtype=np.float64)
+        shared.dates[:] = stock_ipos['ipo_date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+        for i, col in enumerate(flag_columns):
+            shared.flags_matrix[i] = (stock_ipos[col] == FLAG_COLUMNS[col]).to_numpy()
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        """Read-only views onto an exported block"""
+        return cls(descriptor, shared_memory.SharedMemory(name=descriptor['name']), owner=False)
+
+    def close(self):
+        # drop the views before closing the mapping they point into
+        self.returns = self.flags = None
+        self.returns_matrix = self.flags_matrix = self.dates = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Per-process attachment, set up once by the pool initializer
+_view = None
+
+
+def attach_worker(descriptor):
+    """ProcessPoolExecutor initializer: attach to the shared block once per worker"""
+    global _view
+    _view = SharedReturns.attach(descriptor)
+
+
+def worker_view():
+    """The SharedReturns this worker attached to in attach_worker()"""
+    if _view is None:
+        raise RuntimeError("worker_view() called outside a pool initialised with attach_worker()")
+    return _view
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: SPAC minus non-SPAC 252-day mean, bootstrapped in chunks
+# ---------------------------------------------------------------------------
+
+def _bootstrap(returns, spac, n_resamples, seed):
+    rng = np.random.default_rng(seed)
+    ok = ~np.isnan(returns)
+    a, b = returns[ok & spac], returns[ok & ~spac]
+    ia = rng.integers(len(a), size=(n_resamples, len(a)))
+    ib = rng.integers(len(b), size=(n_resamples, len(b)))
+    return a[ia].mean(axis=1) - b[ib].mean(axis=1)
+
+
+def _task_pickled(frame, n_resamples, seed):
+    return _bootstrap(frame['sym_252day_ret'].to_numpy(), (frame['spac'] == 'yes').to_numpy(), n_resamples, seed)
+
+
+def _task_shared(n_resamples, seed):
+    view = worker_view()
+    return _bootstrap(view.returns['sym_252day_ret'], view.flags['spac'], n_resamples, seed)
+
+
+def benchmark(stock_ipos, tasks=32, n_resamples=50, workers=None):
+    import pickle
+    from concurrent.futures import ProcessPoolExecutor
+
+    print(f"Frame: {len(stock_ipos):,} rows; pickled frame per task: "
+          f"{len(pickle.dumps(stock_ipos)) / 1024:,.0f} KB")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pickled = list(pool.map(_task_pickled, [stock_ipos] * tasks, [n_resamples] * tasks, range(tasks)))
+    t_pickled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with SharedReturns.export(stock_ipos) as shared:
+        print(f"Shared block: {shared._shm.size / 1024:,.0f} KB; descriptor: "
+              f"{len(pickle.dumps(shared.descriptor))} bytes")
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach_worker,
+                                 initargs=(shared.descriptor,)) as pool:
+            zero_copy = list(pool.map(_task_shared, [n_resamples] * tasks, range(tasks)))
+    t_shared = time.perf_counter() - start
+
+    same = all(np.array_equal(a, b) for a, b in zip(pickled, zero_copy))
+    print(f"{tasks} tasks: pickled frame {t_pickled:.2f}s, shared memory {t_shared:.2f}s "
+          f"(identical results: {same})")
+
+
+if __name__ == "__main__":
+    import argparse
+    import pandas as pd
+    from return_store import ReturnStore
+
+    parser = argparse.ArgumentParser(description="Shared-memory return matrix")
+    parser.add_argument('--benchmark', action='store_true')
+    parser.add_argument('--scale', type=int, default=20, help="replicate the dataset N times")
+    parser.add_argument('--tasks', type=int, default=32)
+    args = parser.parse_args()
+
+    store = ReturnStore.open()
+    stock_ipos = store.to_frame(flags=store.flag_columns)
+    if args.benchmark:
+        benchmark(pd.concat([stock_ipos] * args.scale, ignore_index=True), tasks=args.tasks)
+    else:
+        with SharedReturns.export(stock_ipos) as shared:
+            print(shared.descriptor)
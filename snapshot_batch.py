@@ -0,0 +1,199 @@
+"""
+Batch analysis across dated snapshots
+
+The inputs are dated snapshots: stock_ipos_YYYYMMDD.csv for the IPOs and
+sp500_YYYYMM.xlsx / russ_1000_YYYYMM.xlsx for the index constituents
+(list_of_all_spacs.xlsx may also carry a date suffix). This runner discovers
+every snapshot, pairs each IPO snapshot with the nearest-dated constituent
+snapshots, and runs the SPAC, return, regression and index-inclusion analysis
+for every pair on a process pool. Each constituent file is parsed once in the
+parent and handed to the workers once, through the pool initializer, rather
+than re-read per snapshot. The results are collected into one comparison
+table (one row per IPO snapshot) to show how the conclusions drift.
+
+Usage:
+    python snapshot_batch.py                 # snapshots in the current directory
+    python snapshot_batch.py --dir history/ --output snapshot_comparison.csv
+"""
+import argparse
+import glob
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from influence_diagnostics import influential, simple_influence
+from ipo_dates import parse_ipo_dates
+
+OUTPUT_FILE = 'snapshot_comparison.csv'
+
+# kind -> (glob pattern, regex capturing the date suffix)
+SNAPSHOT_PATTERNS = {
+    'ipos': ('stock_ipos_*.csv', r'stock_ipos_(\d{8})\.csv$'),
+    'spac': ('list_of_all_spacs*.xlsx', r'list_of_all_spacs_?(\d{6}|\d{8})?\.xlsx$'),
+    'sp': ('sp500_*.xlsx', r'sp500_(\d{6}|\d{8})\.xlsx$'),
+    'russell': ('russ_1000_*.xlsx', r'russ_1000_(\d{6}|\d{8})\.xlsx$'),
+}
+CONSTITUENTS = ['spac', 'sp', 'russell']
+
+
+def snapshot_date(stamp):
+    """date for a YYYYMMDD or YYYYMM suffix (None for undated files)"""
+    if not stamp:
+        return None
+    if len(stamp) == 6:
+        return date(int(stamp[:4]), int(stamp[4:]), 1)
+    return date(int(stamp[:4]), int(stamp[4:6]), int(stamp[6:]))
+
+
+def discover(directory='.'):
+    """{kind: [(date or None, path)]} sorted by date"""
+    found = {}
+    for kind, (pattern, regex) in SNAPSHOT_PATTERNS.items():
+        files = []
+        for path in glob.glob(os.path.join(directory, pattern)):
+            m = re.search(regex, os.path.basename(path))
+            if m and not os.path.basename(path).startswith('~$'):
+                files.append((snapshot_date(m.group(1)), path))
+        found[kind] = sorted(files, key=lambda f: (f[0] or date.min, f[1]))
+    return found
+
+
+def nearest(candidates, when):
+    """Path of the candidate dated closest to `when` (ties go to the earlier one)"""
+    if not candidates:
+        return None
+    dated = [(d, p) for d, p in candidates if d is not None]
+    if not dated:
+        return candidates[-1][1]
+    return min(dated, key=lambda c: (abs((c[0] - when).days), c[0] > when))[1]
+
+
+def pair_snapshots(found):
+    """[(ipo path, {constituent kind: path})]"""
+    pairs = []
+    for when, ipo_path in found['ipos']:
+        pairs.append((ipo_path, {kind: nearest(found[kind], when) for kind in CONSTITUENTS}))
+    return pairs
+
+
+def read_symbols(path):
+    return np.asarray(pd.read_excel(path, usecols=['symbol'])['symbol'].dropna().astype(str).unique())
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+_SYMBOLS = {}
+
+
+def _init_worker(symbols):
+    """Pool initializer: receive the parsed constituent lists once per worker"""
+    global _SYMBOLS
+    _SYMBOLS = symbols
+
+
+def _ols(x, y):
+    """(slope, R², n) of y on x with an intercept, rows with NaN dropped"""
+    ok = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[ok], y[ok]
+    if len(x) < 3:
+        return np.nan, np.nan, len(x)
+    slope, intercept = np.polyfit(x, y, 1)
+    resid = y - (slope * x + intercept)
+    r2 = 1 - (resid @ resid) / ((y - y.mean()) @ (y - y.mean()))
+    return slope, r2, len(x)
+
+
+def analyze_snapshot(ipo_path, constituents):
+    """One row of the comparison table for an IPO snapshot and its constituent files"""
+    start = time.perf_counter()
+    stock_ipos = pd.read_csv(ipo_path)
+    stock_ipos = stock_ipos.dropna(subset=['ipo_date'])
+    stock_ipos['ipo_date'] = parse_ipo_dates(stock_ipos['ipo_date'])
+    for kind in CONSTITUENTS:
+        path = constituents.get(kind)
+        members = _SYMBOLS.get(path, np.array([], dtype=str))
+        stock_ipos[kind] = np.where(stock_ipos['symbol'].isin(members), 'yes', 'no')
+
+    spac = stock_ipos['spac'] == 'yes'
+    sp = stock_ipos['sp'] == 'yes'
+    russell = stock_ipos['russell'] == 'yes'
+    x = stock_ipos['sym_22day_ret'].to_numpy(dtype=float)
+    y = stock_ipos['sym_252day_ret'].to_numpy(dtype=float)
+    slope, r2, _ = _ols(x, y)
+    keep = ~influential(simple_influence(x, y)).to_numpy()  # as predictive_analysis()
+    slope_f, r2_f, n_f = _ols(x[keep], y[keep])
+
+    row = {
+        'snapshot': os.path.basename(ipo_path),
+        'sp_file': os.path.basename(constituents['sp']) if constituents.get('sp') else None,
+        'russell_file': os.path.basename(constituents['russell']) if constituents.get('russell') else None,
+        'ipos': len(stock_ipos),
+        'first_ipo': stock_ipos['ipo_date'].min().date(),
+        'last_ipo': stock_ipos['ipo_date'].max().date(),
+        'spac_share': spac.mean(),
+        'day0_mean_spac': stock_ipos.loc[spac, 'sym_day0_OTC'].mean(),
+        'day0_mean_nonspac': stock_ipos.loc[~spac, 'sym_day0_OTC'].mean(),
+        '252d_mean_spac': stock_ipos.loc[spac, 'sym_252day_ret'].mean(),
+        '252d_mean_nonspac': stock_ipos.loc[~spac, 'sym_252day_ret'].mean(),
+        'ipo_vs_russell_252d': (stock_ipos['sym_252day_ret'] - stock_ipos['iwv_252day_ret']).mean(),
+        'slope_252_on_22': slope,
+        'r2_252_on_22': r2,
+        'slope_filtered': slope_f,
+        'r2_filtered': r2_f,
+        'n_filtered': n_f,
+        'sp_count': int(sp.sum()),
+        '252d_mean_sp': stock_ipos.loc[sp, 'sym_252day_ret'].mean(),
+        '252d_median_sp': stock_ipos.loc[sp, 'sym_252day_ret'].median(),
+        'russell_count': int(russell.sum()),
+        '252d_mean_russell': stock_ipos.loc[russell, 'sym_252day_ret'].mean(),
+        '252d_median_russell': stock_ipos.loc[russell, 'sym_252day_ret'].median(),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    return row
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def run_batch(directory='.', workers=None):
+    """Comparison table (DataFrame) over every IPO snapshot in `directory`"""
+    found = discover(directory)
+    pairs = pair_snapshots(found)
+    if not pairs:
+        raise FileNotFoundError(f"No stock_ipos_YYYYMMDD.csv snapshots in {directory!r}")
+
+    needed = sorted({path for _, files in pairs for path in files.values() if path})
+    symbols = {path: read_symbols(path) for path in needed}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(symbols,)) as pool:
+        futures = [pool.submit(analyze_snapshot, ipo_path, files) for ipo_path, files in pairs]
+        rows = [fut.result() for fut in futures]
+    return pd.DataFrame(rows).set_index('snapshot')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the analysis on every dated snapshot")
+    parser.add_argument('--dir', default='.', help="directory holding the snapshots")
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = run_batch(args.dir, args.workers)
+    table.to_csv(args.output)
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.precision', 4):
+        print(table.T)
+    print(f"\n{len(table)} snapshot(s) in {time.perf_counter() - start:.2f}s; saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
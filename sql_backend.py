@@ -0,0 +1,298 @@
+"""
+Embedded SQL backend for the IPO analysis
+
+An optional alternative to the in-memory pandas path in project1_analysis.py.
+The IPO CSV is streamed in chunks into an on-disk SQLite database together
+with the SPAC, S&P 500 and Russell 1000 lists, and the SPAC, index-inclusion
+and window statistics are expressed as SQL (medians with window functions,
+standard deviations in two passes). The database only ever holds one CSV
+chunk in Python memory, so universes larger than RAM run out of core, and
+it is rebuilt only when one of the source files changes; repeated runs reuse
+the persisted tables.
+
+SQLite is used because it ships with Python; DuckDB would be a drop-in
+replacement for the same SQL but is an extra dependency.
+
+Usage:
+    python sql_backend.py              # build/reuse the database and print the statistics
+    python sql_backend.py --check      # compare every result with the pandas path
+    python sql_backend.py --rebuild
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from ipo_dates import parse_ipo_dates
+
+DB_FILE = 'ipo_analysis.sqlite'
+IPO_FILE = 'stock_ipos_20231004.csv'
+LISTS = {
+    'spacs': 'list_of_all_spacs.xlsx',
+    'sp500': 'sp500_202308.xlsx',
+    'russell1000': 'russ_1000_202308.xlsx',
+}
+CHUNK_ROWS = 50_000
+
+RETURN_COLUMNS = [
+    'sym_day0_OTC', 'sym_1day_ret', 'sym_5day_ret', 'sym_22day_ret', 'sym_91day_ret', 'sym_252day_ret',
+    'iwv_day0_OTC', 'iwv_1day_ret', 'iwv_5day_ret', 'iwv_22day_ret', 'iwv_91day_ret', 'iwv_252day_ret',
+]
+WINDOWS = ['sym_5day_ret', 'sym_22day_ret', 'sym_91day_ret', 'sym_252day_ret']
+AGGS = ['mean', 'median', 'std', 'count', 'min', 'max']
+
+# The enriched view: the same columns load_and_prep_data() + identify_groups()
+# + analyze_spac_vs_nonspac() add to the DataFrame.
+IPO_VIEW = """
+CREATE VIEW IF NOT EXISTS ipos AS
+SELECT i.*,
+       CASE WHEN i.symbol IN (SELECT symbol FROM spacs) THEN 'yes' ELSE 'no' END AS spac,
+       CASE WHEN i.symbol IN (SELECT symbol FROM sp500) THEN 'yes' ELSE 'no' END AS sp,
+       CASE WHEN i.symbol IN (SELECT symbol FROM russell1000) THEN 'yes' ELSE 'no' END AS russell,
+       CASE WHEN i.sym_day0_OTC < 1 THEN 'normal' ELSE 'abnormal' END AS day0_lvl
+FROM stock_ipos i
+"""
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_hashes(ipo_file=IPO_FILE, lists=LISTS):
+    return {path: file_hash(path) for path in [ipo_file, *lists.values()]}
+
+
+def _stored_hashes(conn):
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'sources'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return json.loads(row[0]) if row else None
+
+
+def _load_ipos(conn, ipo_file, chunk_rows):
+    conn.execute("DROP TABLE IF EXISTS stock_ipos")
+    conn.execute(f"""
+        CREATE TABLE stock_ipos (
+            symbol TEXT, sector TEXT, industry TEXT, ipo_date TEXT,
+            {', '.join(f'{c} REAL' for c in RETURN_COLUMNS)},
+            year INTEGER, month INTEGER
+        )""")
+    columns = ['symbol', 'sector', 'industry', 'ipo_date', *RETURN_COLUMNS, 'year', 'month']
+    insert = f"INSERT INTO stock_ipos VALUES ({', '.join('?' * len(columns))})"
+    rows = 0
+    for chunk in pd.read_csv(ipo_file, chunksize=chunk_rows):
+        chunk = chunk.dropna(subset=['ipo_date'])
+        dates = parse_ipo_dates(chunk['ipo_date'])
+        chunk = chunk.assign(ipo_date=dates.dt.strftime('%Y-%m-%d'), year=dates.dt.year, month=dates.dt.month)
+        chunk = chunk[columns].astype(object).where(chunk[columns].notna(), None)
+        conn.executemany(insert, chunk.itertuples(index=False, name=None))
+        rows += len(chunk)
+    conn.execute("CREATE INDEX idx_ipos_symbol ON stock_ipos(symbol)")
+    conn.execute("CREATE INDEX idx_ipos_date ON stock_ipos(ipo_date)")
+    conn.execute("CREATE INDEX idx_ipos_year ON stock_ipos(year)")
+    return rows
+
+
+def _load_list(conn, table, path):
+    symbols = pd.read_excel(path, usecols=['symbol'])['symbol'].dropna().astype(str).unique()
+    conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute(f"CREATE TABLE {table} (symbol TEXT PRIMARY KEY)")
+    conn.executemany(f"INSERT INTO {table} VALUES (?)", ((s,) for s in symbols))
+    return len(symbols)
+
+
+def open_database(db_path=DB_FILE, ipo_file=IPO_FILE, lists=LISTS, rebuild=False, chunk_rows=CHUNK_ROWS):
+    """Connection to the analysis database, (re)built if the sources changed"""
+    hashes = source_hashes(ipo_file, lists)
+    conn = sqlite3.connect(db_path)
+    if not rebuild and _stored_hashes(conn) == hashes:
+        return conn
+
+    start = time.perf_counter()
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    with conn:
+        conn.execute("DROP VIEW IF EXISTS ipos")
+        rows = _load_ipos(conn, ipo_file, chunk_rows)
+        counts = {table: _load_list(conn, table, path) for table, path in lists.items()}
+        conn.execute(IPO_VIEW)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('sources', ?)", (json.dumps(hashes),))
+    conn.execute("PRAGMA synchronous = FULL")
+    conn.execute("ANALYZE")
+    print(f"Built {db_path}: {rows} IPOs, " + ", ".join(f"{n} {t}" for t, n in counts.items())
+          + f" ({time.perf_counter() - start:.2f}s)")
+    return conn
+
+
+# ---------------------------------------------------------------------------
+# Statistics as SQL
+# ---------------------------------------------------------------------------
+
+def group_stats(conn, column, by, aggs=AGGS):
+    """DataFrame like stock_ipos.groupby(by)[column].agg(aggs), computed in SQLite
+
+    by=None aggregates the whole table into a single 'all' row.
+    """
+    if by is None:
+        by, select_keys = ['total'], "'all' AS total"
+    else:
+        by = [by] if isinstance(by, str) else list(by)
+        select_keys = ', '.join(by)
+    keys = ', '.join(by)
+    join = ' AND '.join(f"s.{k} = g.{k}" for k in by)
+    sql = f"""
+        WITH src AS (
+            SELECT {select_keys}, {column} AS x FROM ipos
+        ),
+        groups AS (
+            SELECT {keys}, AVG(x) AS mean, COUNT(x) AS count, MIN(x) AS min, MAX(x) AS max
+            FROM src GROUP BY {keys}
+        ),
+        spread AS (
+            SELECT {', '.join(f'g.{k}' for k in by)},
+                   SUM((s.x - g.mean) * (s.x - g.mean)) / (g.count - 1) AS var
+            FROM src s JOIN groups g ON {join}
+            WHERE s.x IS NOT NULL
+            GROUP BY {', '.join(f'g.{k}' for k in by)}
+        ),
+        ranked AS (
+            SELECT {keys}, x,
+                   ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY x) AS rn,
+                   COUNT(*) OVER (PARTITION BY {keys}) AS n
+            FROM src WHERE x IS NOT NULL
+        ),
+        medians AS (
+            SELECT {keys}, AVG(x) AS median FROM ranked
+            WHERE rn IN ((n + 1) / 2, (n + 2) / 2)
+            GROUP BY {keys}
+        )
+        SELECT {', '.join(f'g.{k}' for k in by)}, g.mean, m.median, v.var, g.count, g.min, g.max
+        FROM groups g
+        LEFT JOIN spread v ON {join.replace('s.', 'v.')}
+        LEFT JOIN medians m ON {join.replace('s.', 'm.')}
+        ORDER BY {', '.join(f'g.{k}' for k in by)}
+    """
+    frame = pd.DataFrame(conn.execute(sql).fetchall(),
+                         columns=[*by, 'mean', 'median', 'var', 'count', 'min', 'max'])
+    frame['std'] = np.sqrt(frame.pop('var').astype(float))
+    frame = frame.set_index(by if len(by) > 1 else by[0])
+    frame['count'] = frame['count'].astype('int64')
+    return frame[list(aggs)]
+
+
+def spac_counts_by_year(conn):
+    """analyze_spacs(): IPO counts by year and SPAC status"""
+    return pd.DataFrame(
+        conn.execute("SELECT year, spac, COUNT(symbol) FROM ipos GROUP BY year, spac ORDER BY year, spac").fetchall(),
+        columns=['year', 'spac', 'symbol'])
+
+
+def spac_index_counts(conn):
+    """analyze_spacs(): how many SPACs are in the S&P 500 / Russell 1000"""
+    return {col: dict(conn.execute(f"SELECT {col}, COUNT(*) FROM ipos WHERE spac = 'yes' GROUP BY {col}").fetchall())
+            for col in ('sp', 'russell')}
+
+
+def ipo_vs_russell(conn):
+    """analyze_returns(): mean, median and std of every sym_/iwv_ column"""
+    rows = [group_stats(conn, col, None, ['mean', 'median', 'std']).iloc[0].rename(col) for col in RETURN_COLUMNS]
+    return pd.DataFrame(rows)
+
+
+def analysis_results(conn):
+    """Every statistic the pandas analysis prints, keyed by section"""
+    results = {
+        'spac_counts_by_year': spac_counts_by_year(conn).set_index(['year', 'spac'])['symbol'],
+        'spac_index_counts': pd.DataFrame(spac_index_counts(conn)).sort_index(),
+        'ipo_vs_russell': ipo_vs_russell(conn),
+        'day0_by_level_and_spac': group_stats(conn, 'sym_day0_OTC', ['day0_lvl', 'spac']),
+        'sp_inclusion_252day': group_stats(conn, 'sym_252day_ret', 'sp', ['mean', 'median', 'std', 'count']),
+        'russell_inclusion_252day': group_stats(conn, 'sym_252day_ret', 'russell', ['mean', 'median', 'std', 'count']),
+    }
+    for w in WINDOWS:
+        results[f'{w}_by_spac'] = group_stats(conn, w, 'spac', ['mean', 'median', 'std', 'count'])
+    return results
+
+
+def pandas_results():
+    """The same statistics from the pandas path in project1_analysis.py"""
+    from project1_analysis import load_and_prep_data, identify_groups
+    with contextlib.redirect_stdout(io.StringIO()):
+        stock_ipos = identify_groups(load_and_prep_data())
+    stock_ipos['day0_lvl'] = np.where(stock_ipos['sym_day0_OTC'] < 1, 'normal', 'abnormal')
+
+    spac_only = stock_ipos[stock_ipos['spac'] == 'yes']
+    results = {
+        'spac_counts_by_year': stock_ipos.groupby(['year', 'spac'])['symbol'].count(),
+        'spac_index_counts': pd.DataFrame({col: spac_only[col].value_counts().to_dict()
+                                           for col in ('sp', 'russell')}).sort_index(),
+        'ipo_vs_russell': pd.DataFrame({col: {'mean': stock_ipos[col].mean(), 'median': stock_ipos[col].median(),
+                                              'std': stock_ipos[col].std()} for col in RETURN_COLUMNS}).T,
+        'day0_by_level_and_spac': stock_ipos.groupby(['day0_lvl', 'spac'])['sym_day0_OTC'].agg(AGGS),
+        'sp_inclusion_252day': stock_ipos.groupby('sp')['sym_252day_ret'].agg(['mean', 'median', 'std', 'count']),
+        'russell_inclusion_252day': stock_ipos.groupby('russell')['sym_252day_ret'].agg(['mean', 'median', 'std', 'count']),
+    }
+    for w in WINDOWS:
+        results[f'{w}_by_spac'] = stock_ipos.groupby('spac')[w].agg(['mean', 'median', 'std', 'count'])
+    return results
+
+
+def compare_results(sql, reference, rtol=1e-12):
+    """[(section, max relative difference, ok)] between two result dicts"""
+    report = []
+    for name, expected in reference.items():
+        actual = sql[name]
+        same_shape = (actual.shape == expected.shape
+                      and [str(i) for i in actual.index] == [str(i) for i in expected.index])
+        if not same_shape:
+            report.append((name, np.inf, False))
+            continue
+        a = np.asarray(actual, dtype=float)
+        e = np.asarray(expected, dtype=float)
+        both_nan = np.isnan(a) & np.isnan(e)
+        diff = np.where(both_nan, 0.0, np.abs(a - e) / np.maximum(np.abs(e), 1e-300))
+        worst = float(np.nanmax(np.where(np.isnan(diff), np.inf, diff))) if diff.size else 0.0
+        report.append((name, worst, worst <= rtol))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the IPO statistics on an embedded SQLite database")
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--rebuild', action='store_true', help="rebuild even if the sources are unchanged")
+    parser.add_argument('--check', action='store_true', help="compare every result with the pandas path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    conn = open_database(args.db, rebuild=args.rebuild)
+    results = analysis_results(conn)
+    elapsed = time.perf_counter() - start
+
+    if args.check:
+        report = compare_results(results, pandas_results())
+        print(f"{'Section':<28} | {'Max rel diff':>12} | Match")
+        print("-" * 52)
+        for name, worst, ok in report:
+            print(f"{name:<28} | {worst:12.2e} | {'yes' if ok else 'NO'}")
+        raise SystemExit(0 if all(ok for _, _, ok in report) else 1)
+
+    for name, frame in results.items():
+        print(f"\n{name}:")
+        print(frame)
+    print(f"\nSQL backend: {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
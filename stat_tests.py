@@ -0,0 +1,252 @@
+"""
+Two-sample test battery: every return window x every grouping
+
+For each window (sym_day0_OTC ... sym_252day_ret) and each comparison
+
+    spac      yes vs no
+    sp        yes vs no
+    russell   yes vs no
+    day0_lvl  abnormal vs normal
+    sector    each sector vs all other known sectors ('----' is unknown)
+
+run_battery() computes Welch's t, Mann-Whitney U, Kolmogorov-Smirnov and
+Brunner-Munzel tests, then corrects each test's p-values across the whole
+battery with Benjamini-Hochberg (FDR) and Holm.
+
+The values of a window are sorted once and their tie blocks found once;
+every comparison in that window is then a row of a [comparisons x rows]
+indicator matrix, and the ranks the tests need (in the pooled sample and
+within each group, with ties averaged) come from cumulative counts over the
+shared tie blocks. No test re-sorts or re-ranks the data. P-values use the
+large-sample forms (normal approximation with tie and continuity correction
+for U, Smirnov's asymptotic distribution for KS), matching scipy.stats with
+method='asymptotic' / method='asymp'.
+
+The result is one tidy table, one row per window x comparison x test:
+
+    window, grouping, group, rest, n_group, n_rest, mean_group, mean_rest,
+    median_group, median_rest, test, statistic, df, p_value, p_fdr, p_holm
+
+    python stat_tests.py                  # writes two_sample_tests.csv
+    python stat_tests.py --check          # compare with scipy.stats, one call per test
+"""
+import numpy as np
+import pandas as pd
+from scipy import stats
+from statsmodels.stats.multitest import multipletests
+
+OUTPUT_FILE = 'two_sample_tests.csv'
+WINDOWS = ['sym_day0_OTC', 'sym_1day_ret', 'sym_5day_ret', 'sym_22day_ret', 'sym_91day_ret', 'sym_252day_ret']
+# grouping column -> (group value, comparison value); None compares with every other value
+GROUPINGS = {
+    'spac': ('yes', 'no'),
+    'sp': ('yes', 'no'),
+    'russell': ('yes', 'no'),
+    'day0_lvl': ('abnormal', 'normal'),
+    'sector': None,
+}
+UNKNOWN_SECTOR = '----'
+MIN_GROUP_SIZE = 5
+TESTS = ['welch_t', 'mann_whitney_u', 'kolmogorov_smirnov', 'brunner_munzel']
+
+
+def comparisons(stock_ipos, groupings=GROUPINGS):
+    """[(grouping, group, rest, group mask, rest mask)] for every comparison in the battery"""
+    out = []
+    for col, pair in groupings.items():
+        values = stock_ipos[col].astype(str).to_numpy()
+        if pair is not None:
+            group, rest = pair
+            out.append((col, group, rest, values == group, values == rest))
+            continue
+        known = (values != UNKNOWN_SECTOR) & (values != 'nan')
+        for group in sorted(set(values[known])):
+            is_group = values == group
+            out.append((col, group, 'other', is_group, known & ~is_group))
+    return out
+
+
+class SortedWindow:
+    """One window's values sorted once, with its tie blocks"""
+
+    def __init__(self, x):
+        self.valid = ~np.isnan(x)
+        self.order = np.argsort(x[self.valid], kind='stable')
+        self.values = x[self.valid][self.order]
+        new_block = np.r_[True, self.values[1:] != self.values[:-1]]
+        self.block_starts = np.flatnonzero(new_block)
+        self.block_id = np.cumsum(new_block) - 1
+
+    def indicators(self, masks):
+        """[k, m] indicator matrix of the comparisons' masks, in sorted order"""
+        return np.stack([m[self.valid][self.order] for m in masks]).astype(np.int64)
+
+    def block_counts(self, ind):
+        """Members of each tie block, [k, n_blocks]"""
+        return np.add.reduceat(ind, self.block_starts, axis=1)
+
+    def ranks(self, ind):
+        """Average rank of every element within the sample marked by `ind` ([k, m]; 0 outside)"""
+        counts = self.block_counts(ind)
+        upto = np.cumsum(counts, axis=1)
+        per_block = (upto - counts + 1 + upto) / 2.0
+        return per_block[:, self.block_id] * ind
+
+
+def _two_sided_t(t, df):
+    return 2 * stats.t.sf(np.abs(t), df)
+
+
+def window_tests(x, masks):
+    """{test: (statistic, df, p)} arrays over the comparisons in `masks` for one window"""
+    w = SortedWindow(x)
+    a = w.indicators([m for m, _ in masks])
+    b = w.indicators([m for _, m in masks])
+    xs = w.values
+    n1, n2 = a.sum(axis=1).astype(float), b.sum(axis=1).astype(float)
+    n = n1 + n2
+    results = {}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Welch's t
+        m1, m2 = a @ xs / n1, b @ xs / n2
+        v1 = (a * (xs - m1[:, None]) ** 2).sum(axis=1) / (n1 - 1)
+        v2 = (b * (xs - m2[:, None]) ** 2).sum(axis=1) / (n2 - 1)
+        se1, se2 = v1 / n1, v2 / n2
+        t = (m1 - m2) / np.sqrt(se1 + se2)
+        df = (se1 + se2) ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+        results['welch_t'] = (t, df, _two_sided_t(t, df))
+
+        # Mann-Whitney U on ranks in the pooled sample
+        pooled = a + b
+        rank_pooled = w.ranks(pooled)
+        u1 = (rank_pooled * a).sum(axis=1) - n1 * (n1 + 1) / 2
+        ties = w.block_counts(pooled).astype(float)
+        tie_term = (ties ** 3 - ties).sum(axis=1)
+        sigma = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+        u = np.maximum(u1, n1 * n2 - u1)
+        z = (u - n1 * n2 / 2 - 0.5) / sigma
+        results['mann_whitney_u'] = (u1, np.full_like(u1, np.nan), np.clip(2 * stats.norm.sf(z), 0, 1))
+
+        # Kolmogorov-Smirnov: ECDFs at the end of every tie block
+        cdf_a = np.cumsum(w.block_counts(a), axis=1) / n1[:, None]
+        cdf_b = np.cumsum(w.block_counts(b), axis=1) / n2[:, None]
+        d = np.abs(cdf_a - cdf_b).max(axis=1)
+        en = np.round(n1 * n2 / n)
+        results['kolmogorov_smirnov'] = (d, np.full_like(d, np.nan), np.clip(stats.kstwo.sf(d, en), 0, 1))
+
+        # Brunner-Munzel: pooled ranks against within-group ranks
+        rank_a, rank_b = w.ranks(a), w.ranks(b)
+        mean_ca = (rank_pooled * a).sum(axis=1) / n1
+        mean_cb = (rank_pooled * b).sum(axis=1) / n2
+        dev_a = (rank_pooled - rank_a - mean_ca[:, None] + ((n1 + 1) / 2)[:, None]) * a
+        dev_b = (rank_pooled - rank_b - mean_cb[:, None] + ((n2 + 1) / 2)[:, None]) * b
+        s1 = (dev_a ** 2).sum(axis=1) / (n1 - 1)
+        s2 = (dev_b ** 2).sum(axis=1) / (n2 - 1)
+        wbfn = n1 * n2 * (mean_cb - mean_ca) / (n * np.sqrt(n1 * s1 + n2 * s2))
+        df_bm = (n1 * s1 + n2 * s2) ** 2 / ((n1 * s1) ** 2 / (n1 - 1) + (n2 * s2) ** 2 / (n2 - 1))
+        results['brunner_munzel'] = (wbfn, df_bm, _two_sided_t(wbfn, df_bm))
+
+    return results, n1, n2, m1, m2
+
+
+def _medians(x, masks):
+    return ([np.nanmedian(x[m]) if m.any() else np.nan for m, _ in masks],
+            [np.nanmedian(x[m]) if m.any() else np.nan for _, m in masks])
+
+
+def run_battery(stock_ipos, windows=WINDOWS, groupings=GROUPINGS, min_group_size=MIN_GROUP_SIZE):
+    """Tidy DataFrame of every test for every window x comparison, with FDR and Holm p-values"""
+    all_comparisons = comparisons(stock_ipos, groupings)
+    frames = []
+    for window in windows:
+        x = stock_ipos[window].to_numpy(dtype=float)
+        valid = ~np.isnan(x)
+        usable = [c for c in all_comparisons
+                  if (c[3] & valid).sum() >= min_group_size and (c[4] & valid).sum() >= min_group_size]
+        if not usable:
+            continue
+        masks = [(c[3], c[4]) for c in usable]
+        results, n1, n2, m1, m2 = window_tests(x, masks)
+        med1, med2 = _medians(x, masks)
+        base = pd.DataFrame({
+            'window': window,
+            'grouping': [c[0] for c in usable],
+            'group': [c[1] for c in usable],
+            'rest': [c[2] for c in usable],
+            'n_group': n1.astype(int),
+            'n_rest': n2.astype(int),
+            'mean_group': m1,
+            'mean_rest': m2,
+            'median_group': med1,
+            'median_rest': med2,
+        })
+        per_test = [base.assign(test=test, statistic=results[test][0], df=results[test][1],
+                                p_value=results[test][2]) for test in TESTS]
+        # rows in comparison order, the four tests of a comparison together
+        frames.append(pd.concat(per_test).sort_index(kind='stable'))
+
+    table = pd.concat(frames, ignore_index=True)
+    table['p_fdr'] = np.nan
+    table['p_holm'] = np.nan
+    for test, rows in table.groupby('test').groups.items():
+        p = table.loc[rows, 'p_value']
+        ok = p.notna()
+        if ok.any():
+            table.loc[p[ok].index, 'p_fdr'] = multipletests(p[ok], method='fdr_bh')[1]
+            table.loc[p[ok].index, 'p_holm'] = multipletests(p[ok], method='holm')[1]
+    return table
+
+
+def print_summary(table, alpha=0.05):
+    """Significant comparisons per test, before and after correction"""
+    counts = table.assign(raw=table['p_value'] < alpha, fdr=table['p_fdr'] < alpha,
+                          holm=table['p_holm'] < alpha, tested=table['p_value'].notna())
+    counts = counts.groupby('test', sort=False)[['tested', 'raw', 'fdr', 'holm']].sum()
+    print(f"Comparisons significant at {alpha:.0%} (of {len(table) // len(TESTS)} window x group comparisons):")
+    print(counts.to_string())
+
+
+def check_against_scipy(table, stock_ipos):
+    """Largest absolute difference from calling scipy.stats per comparison"""
+    import warnings
+    calls = {
+        'welch_t': lambda a, b: stats.ttest_ind(a, b, equal_var=False),
+        'mann_whitney_u': lambda a, b: stats.mannwhitneyu(a, b, method='asymptotic'),
+        'kolmogorov_smirnov': lambda a, b: stats.ks_2samp(a, b, method='asymp'),
+        'brunner_munzel': lambda a, b: stats.brunnermunzel(a, b),
+    }
+    masks = {(c[0], c[1]): (c[3], c[4]) for c in comparisons(stock_ipos)}
+    worst = {}
+    for row in table.itertuples(index=False):
+        x = stock_ipos[row.window].to_numpy(dtype=float)
+        in_group, in_rest = masks[(row.grouping, row.group)]
+        a, b = x[in_group & ~np.isnan(x)], x[in_rest & ~np.isnan(x)]
+        with np.errstate(all='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            ref = calls[row.test](a, b)
+            ours, theirs = np.array([row.statistic, row.p_value]), np.array([ref.statistic, ref.pvalue])
+            same = (ours == theirs) | (np.isnan(ours) & np.isnan(theirs))
+            diff = np.where(same, 0.0, np.abs(ours - theirs)).max()
+        worst[row.test] = max(worst.get(row.test, 0.0), diff)
+    for test, diff in worst.items():
+        print(f"{test:<20} max |difference| vs scipy.stats: {diff:.2e}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Two-sample tests across windows and groupings")
+    parser.add_argument('--check', action='store_true', help="compare with per-call scipy.stats")
+    args = parser.parse_args()
+
+    stock_ipos = pd.read_csv('stock_ipos_processed.csv')
+    start = time.perf_counter()
+    table = run_battery(stock_ipos)
+    elapsed = time.perf_counter() - start
+    table.to_csv(OUTPUT_FILE, index=False)
+    print_summary(table)
+    print(f"{len(table)} rows in {elapsed:.3f}s; saved to {OUTPUT_FILE}")
+    if args.check:
+        check_against_scipy(table, stock_ipos)
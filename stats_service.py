@@ -0,0 +1,340 @@
+"""
+Local HTTP service for the SPAC, index-inclusion and window statistics
+
+Serves the statistics questions_5_6.py prints as JSON, so dashboards can
+poll them without re-running the scripts. Standard library asyncio only.
+
+The prepared data is loaded once and reduced to a cube over
+year x sector x spac x sp x russell x window. Every cell keeps count, mean,
+M2 (sum of squared deviations), min, max and its sorted values, so any
+filter combination is answered by merging the matching cells (Chan's
+parallel update for mean/std) and taking the median of the merged values.
+Responses carry an ETag and are cached per data version; If-None-Match
+returns 304. The source CSV is polled and the cube rebuilt in the
+background when it changes.
+
+Endpoints:
+    GET /stats?window=22day&spac=yes&year=2020,2021&sector=Technology&by=sp
+    GET /health
+
+Usage:
+    python stats_service.py --port 8765
+    python stats_service.py --benchmark --requests 20000 --concurrency 64
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from ipo_query import PROCESSED_FILE, WINDOWS, load_frame
+
+DIMENSIONS = ['year', 'sector', 'spac', 'sp', 'russell']
+STATS = ['mean', 'median', 'std', 'count', 'min', 'max']
+RELOAD_INTERVAL = 2.0
+MAX_CACHED_RESPONSES = 4096
+
+
+# ---------------------------------------------------------------------------
+# Cube
+# ---------------------------------------------------------------------------
+
+class Cube:
+    """Per-cell sufficient statistics for every window"""
+
+    def __init__(self, stock_ipos):
+        frame = stock_ipos.copy()
+        if 'year' not in frame.columns:
+            frame['year'] = frame['ipo_date'].dt.year
+        frame['year'] = frame['year'].astype(str)
+        for dim in DIMENSIONS:
+            frame[dim] = frame[dim].fillna('').astype(str)
+        self.n_rows = len(frame)
+        self.cells = {}  # window -> {cell key tuple: (count, mean, m2, min, max, sorted values)}
+        for window, column in WINDOWS.items():
+            cells = {}
+            for key, values in frame.groupby(DIMENSIONS, sort=True)[column]:
+                v = np.sort(values.dropna().to_numpy(dtype=float))
+                if len(v):
+                    mean = v.mean()
+                    cells[key] = (len(v), mean, float(((v - mean) ** 2).sum()), v[0], v[-1], v)
+            self.cells[window] = cells
+
+    def select(self, window, filters):
+        """Cells of `window` whose key matches {dimension: set of levels}"""
+        positions = [(DIMENSIONS.index(dim), levels) for dim, levels in filters.items()]
+        return [(key, cell) for key, cell in self.cells[window].items()
+                if all(key[i] in levels for i, levels in positions)]
+
+    @staticmethod
+    def merge(cells):
+        """Combine cells into {stat: value}"""
+        n, mean, m2 = 0, 0.0, 0.0
+        lo, hi = np.inf, -np.inf
+        for count, cell_mean, cell_m2, cell_min, cell_max, _ in cells:
+            delta = cell_mean - mean
+            total = n + count
+            mean += delta * count / total
+            m2 += cell_m2 + delta ** 2 * n * count / total
+            n = total
+            lo, hi = min(lo, cell_min), max(hi, cell_max)
+        if n == 0:
+            return {'mean': None, 'median': None, 'std': None, 'count': 0, 'min': None, 'max': None}
+        values = np.concatenate([cell[5] for cell in cells]) if len(cells) > 1 else cells[0][5]
+        return {
+            'mean': float(mean),
+            'median': float(np.median(values)),
+            'std': float(np.sqrt(m2 / (n - 1))) if n > 1 else None,
+            'count': int(n),
+            'min': float(lo),
+            'max': float(hi),
+        }
+
+    def query(self, window, filters, by=None):
+        selected = self.select(window, filters)
+        if by is None:
+            return self.merge([cell for _, cell in selected])
+        i = DIMENSIONS.index(by)
+        groups = {}
+        for key, cell in selected:
+            groups.setdefault(key[i], []).append(cell)
+        return {level: self.merge(cells) for level, cells in sorted(groups.items())}
+
+
+def parse_query(query_string):
+    """(window, filters, by) from the query string; raises ValueError on bad input"""
+    params = {k: v[-1] for k, v in parse_qs(query_string, keep_blank_values=True).items()}
+    window = params.pop('window', '22day')
+    if window not in WINDOWS:
+        raise ValueError(f"unknown window {window!r}; use one of {', '.join(WINDOWS)}")
+    by = params.pop('by', None)
+    if by is not None and by not in DIMENSIONS:
+        raise ValueError(f"cannot group by {by!r}; use one of {', '.join(DIMENSIONS)}")
+    filters = {}
+    for dim, value in params.items():
+        if dim not in DIMENSIONS:
+            raise ValueError(f"unknown filter {dim!r}; use one of {', '.join(DIMENSIONS)}")
+        filters[dim] = frozenset(v.strip() for v in value.split(','))
+    return window, filters, by
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+class StatsService:
+    def __init__(self, source=PROCESSED_FILE, reload_interval=RELOAD_INTERVAL):
+        self.source = source
+        self.reload_interval = reload_interval
+        self.cube = None
+        self.version = None
+        self.responses = {}  # (version, normalised query) -> (etag, body)
+        self.load()
+
+    def _signature(self):
+        st = os.stat(self.source)
+        return f"{st.st_mtime_ns}-{st.st_size}"
+
+    def load(self):
+        signature = self._signature()
+        start = time.perf_counter()
+        cube = Cube(load_frame(self.source))
+        self.cube, self.version = cube, signature
+        self.responses.clear()
+        print(f"Loaded {self.source}: {self.cube.n_rows} rows, "
+              f"{sum(len(c) for c in self.cube.cells.values())} cells ({time.perf_counter() - start:.2f}s)")
+
+    async def watch(self):
+        """Rebuild the cube in a worker thread when the source file changes"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if self._signature() != self.version:
+                    await loop.run_in_executor(None, self.load)
+            except Exception as e:
+                print(f"Reload failed, still serving version {self.version}: {e}")
+
+    def stats_response(self, query_string):
+        cube, version = self.cube, self.version
+        window, filters, by = parse_query(query_string)
+        key = (version, window, tuple(sorted(filters.items())), by)
+        cached = self.responses.get(key)
+        if cached is None:
+            payload = {
+                'window': WINDOWS[window],
+                'filters': {dim: sorted(levels) for dim, levels in sorted(filters.items())},
+                'by': by,
+                'stats': cube.query(window, filters, by),
+                'version': version,
+            }
+            body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+            cached = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+            if len(self.responses) >= MAX_CACHED_RESPONSES:
+                self.responses.clear()
+            self.responses[key] = cached
+        return cached
+
+    def route(self, path, headers):
+        """(status, extra headers, body) for a GET request"""
+        url = urlsplit(path)
+        if url.path == '/health':
+            body = json.dumps({'status': 'ok', 'version': self.version, 'rows': self.cube.n_rows}).encode()
+            return 200, {}, body
+        if url.path != '/stats':
+            return 404, {}, b'{"error":"not found"}'
+        try:
+            etag, body = self.stats_response(url.query)
+        except ValueError as e:
+            return 400, {}, json.dumps({'error': str(e)}).encode()
+        if headers.get('if-none-match') == etag:
+            return 304, {'ETag': etag}, b''
+        return 200, {'ETag': etag, 'Cache-Control': 'no-cache'}, body
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    break
+                method, path, _ = parts
+                if method != 'GET':
+                    status, extra, body = 405, {'Allow': 'GET'}, b''
+                else:
+                    status, extra, body = self.route(path, headers)
+                head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                        "Content-Type: application/json",
+                        f"Content-Length: {len(body)}"]
+                head.extend(f"{k}: {v}" for k, v in extra.items())
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        watcher = asyncio.create_task(self.watch())
+        return server, watcher
+
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+BENCHMARK_QUERIES = [
+    '/stats?window=day0&by=spac',
+    '/stats?window=5day&by=spac',
+    '/stats?window=22day&by=spac',
+    '/stats?window=91day&by=spac',
+    '/stats?window=252day&by=spac',
+    '/stats?window=252day&by=sp',
+    '/stats?window=252day&by=russell',
+    '/stats?window=22day&sector=Technology&year=2020,2021&by=spac',
+    '/stats?window=252day&spac=no&by=year',
+    '/stats?window=91day&sp=no&russell=yes&by=sector',
+]
+
+
+async def _client(host, port, paths, latencies, revalidate):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    for path in paths:
+        extra = f"If-None-Match: {etags[path]}\r\n" if path in etags else ''
+        start = time.perf_counter()
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{extra}\r\n".encode())
+        await writer.drain()
+        await reader.readline()
+        length, etag = 0, None
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode().partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+            elif name.lower() == 'etag':
+                etag = value.strip()
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        if etag and revalidate:
+            etags[path] = etag
+    writer.close()
+
+
+async def benchmark(source, n_requests, concurrency, revalidate):
+    service = StatsService(source)
+    server, watcher = await service.serve(port=0)
+    host, port = server.sockets[0].getsockname()[:2]
+    per_client = max(n_requests // concurrency, 1)
+    rng = np.random.default_rng(0)
+    latencies = []
+    clients = []
+    for _ in range(concurrency):
+        paths = [BENCHMARK_QUERIES[i] for i in rng.integers(len(BENCHMARK_QUERIES), size=per_client)]
+        clients.append(_client(host, port, paths, latencies, revalidate))
+    start = time.perf_counter()
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - start
+    watcher.cancel()
+    server.close()
+    await server.wait_closed()
+
+    ms = np.array(latencies) * 1000
+    print(f"{len(ms):,} requests, {concurrency} concurrent connections, {elapsed:.2f}s "
+          f"({len(ms) / elapsed:,.0f} req/s)")
+    for q in (50, 90, 99, 99.9):
+        print(f"  p{q:<5} {np.percentile(ms, q):8.3f} ms")
+    print(f"  max    {ms.max():8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve IPO statistics over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--data', default=PROCESSED_FILE)
+    parser.add_argument('--benchmark', action='store_true', help="measure latency under concurrent load")
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--no-etag', action='store_true', help="benchmark clients fetch full bodies instead of revalidating")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        asyncio.run(benchmark(args.data, args.requests, args.concurrency, not args.no_etag))
+        return
+
+    async def run():
+        service = StatsService(args.data)
+        server, _ = await service.serve(args.host, args.port)
+        print(f"Serving on http://{args.host}:{args.port}/stats")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,515 @@
 """
-Generate PDF report from markdown file
+Verify the generated reports against freshly computed statistics
+
+Parses the Markdown, Word, PDF and PowerPoint deliverables in parallel,
+extracts every numeric token and every table, and checks them against the
+statistics computed from stock_ipos_processed.csv (the output of the analysis
+stage). Each table cell is mapped to the one statistic it reports from its
+row label, its column header and the table's caption (group, return window
+and statistic), and must match that statistic within the rounding tolerance
+implied by how the number is printed; otherwise it is reported as stale. A
+cell whose labels do not identify a computed statistic is reported as
+unmapped, so new tables have to be described here before they pass.
+Numbers in running text have no labels: they are checked against every
+statistic and reported as unverified when nothing matches (prose also
+contains derived figures such as ratios).
+
+Usage:
+    python verify_report.py                  # verify all four documents
+    python verify_report.py --show-prose     # also list unverified prose numbers
+Exit status is 1 if any table cell is stale or unmapped, or a document is missing.
 """
+import argparse
 import os
+import re
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+PROCESSED_FILE = 'stock_ipos_processed.csv'
+DOCUMENTS = [
+    'IPO_Analysis_Report_Q5_Q6.md',
+    'IPO_Analysis_Report_Q5_Q6.docx',
+    'IPO_Analysis_Report_Q5_Q6.pdf',
+    'IPO_Analysis_Q5_Q6.pptx',
+]
+
+WINDOWS = {
+    'day0': 'sym_day0_OTC',
+    '5day': 'sym_5day_ret',
+    '22day': 'sym_22day_ret',
+    '91day': 'sym_91day_ret',
+    '252day': 'sym_252day_ret',
+}
+AGGS = ['mean', 'median', 'std', 'count', 'min', 'max']
+
+# Relative slack on top of the rounding tolerance, for numbers printed with
+# fewer digits than they deserve (e.g. "292%").
+DEFAULT_REL_TOL = 0.005
+
+Token = namedtuple('Token', 'raw value decimals percent')
+# group: a key of GROUPS; window: a key of WINDOWS, or None for group sizes
+Fact = namedtuple('Fact', 'group window stat value kind')
+
+# Groups the reports describe, by the attributes their labels carry
+GROUPS = {
+    'all': {},
+    'SPAC': {'spac': 'yes'},
+    'Non-SPAC': {'spac': 'no'},
+    'Abnormal SPAC': {'level': 'abnormal', 'spac': 'yes'},
+    'Abnormal Non-SPAC': {'level': 'abnormal', 'spac': 'no'},
+    'Normal SPAC': {'level': 'normal', 'spac': 'yes'},
+    'Normal Non-SPAC': {'level': 'normal', 'spac': 'no'},
+    'S&P 500 included': {'index': 'sp', 'included': 'yes'},
+    'S&P 500 not included': {'index': 'sp', 'included': 'no'},
+    'Russell 1000 included': {'index': 'russell', 'included': 'yes'},
+    'Russell 1000 not included': {'index': 'russell', 'included': 'no'},
+    'neither index': {'index': 'neither'},
+}
+WINDOW_LABELS = {
+    'day0': r'\bday\s*0\b|\bday0\b',
+    '5day': r'\b5-day\b',
+    '22day': r'\b22-day\b|\b(1|one)[- ]month\b',
+    '91day': r'\b91-day\b|\b(3|three)[- ]months?\b',
+    '252day': r'\b252-day\b|\b(1|one)[- ]year\b|\b1Y\b',
+}
+# checked in order: "Median" before "Mean", "Mean Returns and Volatility" is a mean
+STAT_LABELS = {
+    'median': r'\bmedian\b',
+    'mean': r'\bmean\b|\baverage\b',
+    'std': r'\bstd\b|standard deviation|volatility',
+    'count': r'\bcount\b',
+    'min': r'\bmin(imum)?\b',
+    'max': r'\bmax(imum)?\b',
+    'share': r'% of total|\bpercentage\b|\bshare\b',
+    'difference': r'\bdifference\b|\badvantage\b',
+}
+
+NUMBER_RE = re.compile(r'(?<![\w.])([-+−]?)(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?(%?)(?!\w|\.\d)')
+CELL_RE = re.compile(NUMBER_RE.pattern + r'(\s*pp)?')
+TABLE_CAPTION_RE = re.compile(r'^Table \d+:')
+YEAR_RE = re.compile(r'^(19|20)\d\d$')
+# Numbers that are part of a name or label rather than a statistic:
+# "S&P 500", "Russell 1000", "5-day", "Table 3", "Question 5", ...
+LABEL_BEFORE_RE = re.compile(r'(S&P;?|Russell|Table|Figure|Question|Slide|Day|Section|Step)\s*$', re.I)
+PP_AFTER_RE = re.compile(r'^\s*(pp\b|percentage\s+points?)', re.I)
+LABEL_AFTER_RE = re.compile(r'^(\s*-?\s*(trading\s+)?(day|days|month|months|year|years|week|weeks)\b|\([ivx]+\))', re.I)
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+def _group_facts(facts, frame, group, window):
+    stats = frame[WINDOWS[window]].agg(AGGS)
+    for agg in AGGS:
+        kind = 'count' if agg == 'count' else 'value'
+        facts.append(Fact(group, window, agg, float(stats[agg]), kind))
+
+
+def _size_facts(facts, frame, group, n):
+    facts.append(Fact(group, None, 'count', len(frame), 'count'))
+    facts.append(Fact(group, None, 'share', len(frame) / n, 'value'))
+
+
+def compute_facts(stock_ipos):
+    """Every statistic the reports are expected to quote, as a list of Facts"""
+    facts = []
+    n = len(stock_ipos)
+    facts.append(Fact('all', None, 'count', n, 'count'))
+
+    groups = {
+        'all': stock_ipos,
+        'SPAC': stock_ipos[stock_ipos['spac'] == 'yes'],
+        'Non-SPAC': stock_ipos[stock_ipos['spac'] == 'no'],
+    }
+    for label, frame in list(groups.items())[1:]:
+        _size_facts(facts, frame, label, n)
+    for label, frame in groups.items():
+        for key in WINDOWS:
+            _group_facts(facts, frame, label, key)
+    # "Difference" / "advantage" columns and sentences quote mean differences in pp
+    for key, col in WINDOWS.items():
+        diff = groups['Non-SPAC'][col].mean() - groups['SPAC'][col].mean()
+        facts.append(Fact('all', key, 'difference', diff, 'value'))
+        facts.append(Fact('all', key, 'reverse difference', -diff, 'value'))
+
+    day0_lvl = np.where(stock_ipos['sym_day0_OTC'] < 1, 'Normal', 'Abnormal')
+    for (lvl, spac), frame in stock_ipos.groupby([day0_lvl, stock_ipos['spac']]):
+        label = f"{lvl} {'SPAC' if spac == 'yes' else 'Non-SPAC'}"
+        _group_facts(facts, frame, label, 'day0')
+
+    index_groups = {
+        'S&P 500 included': stock_ipos['sp'] == 'yes',
+        'S&P 500 not included': stock_ipos['sp'] == 'no',
+        'Russell 1000 included': stock_ipos['russell'] == 'yes',
+        'Russell 1000 not included': stock_ipos['russell'] == 'no',
+        'neither index': (stock_ipos['sp'] == 'no') & (stock_ipos['russell'] == 'no'),
+    }
+    for label, mask in index_groups.items():
+        frame = stock_ipos[mask]
+        _size_facts(facts, frame, label, n)
+        _group_facts(facts, frame, label, '252day')
+    return facts
+
+
+def describe(fact):
+    window = f" {fact.window}" if fact.window else ''
+    return f"{fact.group}{window} {fact.stat} = {fact.value:,.4g}"
+
+
+# ---------------------------------------------------------------------------
+# Extraction (runs in worker processes)
+# ---------------------------------------------------------------------------
+
+def _caption(line):
+    return line.strip().strip('*#').strip()
+
+
+def extract_md(path):
+    text, tables, table = [], [], []
+    caption = ''
+    in_code = False
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.strip().startswith('```'):
+                in_code = not in_code
+                continue
+            if in_code:
+                continue
+            if line.strip().startswith('|'):
+                cells = [c.strip().strip('*') for c in line.strip().strip('|').split('|')]
+                if not all(set(c) <= set('-: ') for c in cells):
+                    table.append(cells)
+                continue
+            if table:
+                tables.append((caption, table))
+                table = []
+            if line.strip():
+                caption = _caption(line)
+            if line.lstrip().startswith('#'):
+                continue
+            text.append(re.sub(r'^\s*\d+\.\s', '', line))
+    if table:
+        tables.append((caption, table))
+    return text, tables
+
+
+def extract_docx(path):
+    from docx import Document
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+    doc = Document(path)
+    text, tables = [], []
+    caption = ''
+    for child in doc.element.body.iterchildren():
+        if child.tag.endswith('}p'):
+            line = Paragraph(child, doc).text
+            text.append(line)
+            if line.strip():
+                caption = _caption(line)
+        elif child.tag.endswith('}tbl'):
+            tables.append((caption, [[c.text for c in row.cells] for row in Table(child, doc).rows]))
+    return text, tables
+
+
+def _pdf_table(lines, start):
+    """(rows, next line) for the table whose header begins at lines[start], or None
+
+    pypdf emits each reportlab table cell on its own line: the column
+    headers, then per row a label followed by one line per value.
+    """
+    end = start
+    while end < len(lines) and not CELL_RE.fullmatch(lines[end]):
+        end += 1
+    header, label = lines[start:end - 1], lines[end - 1] if end > start else None
+    width = len(header) - 1
+    if width < 1 or label is None:
+        return None
+    rows, i = [header], end
+    while i + width <= len(lines) and all(CELL_RE.fullmatch(v) for v in lines[i:i + width]):
+        rows.append([label] + lines[i:i + width])
+        i += width
+        if i + 1 < len(lines) and not CELL_RE.fullmatch(lines[i]) and CELL_RE.fullmatch(lines[i + 1]):
+            label = lines[i]
+            i += 1
+        else:
+            break
+    return (rows, i) if len(rows) > 1 else None
+
+
+def extract_pdf(path):
+    # A "Table N: ..." caption line starts a table (see _pdf_table); every
+    # other line is prose.
+    from pypdf import PdfReader
+    lines = [line.strip() for page in PdfReader(path).pages
+             for line in (page.extract_text() or '').splitlines() if line.strip()]
+    text, tables = [], []
+    i = 0
+    while i < len(lines):
+        text.append(lines[i])
+        parsed = _pdf_table(lines, i + 1) if TABLE_CAPTION_RE.match(lines[i]) else None
+        if parsed:
+            tables.append((_caption(lines[i]), parsed[0]))
+            i = parsed[1]
+        else:
+            i += 1
+    return text, tables
+
+
+def extract_pptx(path):
+    from pptx import Presentation
+    text, tables = [], []
+    for slide in Presentation(path).slides:
+        caption = ''
+        for shape in slide.shapes:
+            if shape.has_table:
+                tables.append((caption, [[c.text for c in row.cells] for row in shape.table.rows]))
+            elif shape.has_text_frame and not _is_code(shape.text_frame.text):
+                text.extend(p.text for p in shape.text_frame.paragraphs)
+                caption = caption or _caption(shape.text_frame.text)
+    return text, tables
+
+
+def _is_code(text):
+    return text.lstrip().startswith('#') or 'stock_ipos' in text
+
+
+EXTRACTORS = {'.md': extract_md, '.docx': extract_docx, '.pdf': extract_pdf, '.pptx': extract_pptx}
+
+
+def extract(path):
+    """(path, prose lines, tables, seconds) for one document"""
+    start = time.perf_counter()
+    text, tables = EXTRACTORS[os.path.splitext(path)[1]](path)
+    return path, text, tables, time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------------
+# Matching
+# ---------------------------------------------------------------------------
+
+def numeric_tokens(text):
+    """Numeric tokens in a string (years, index names and window labels are skipped)"""
+    tokens = []
+    for m in NUMBER_RE.finditer(text):
+        sign, whole, frac, pct = m.groups()
+        raw = m.group(0)
+        if not frac and not pct:
+            if YEAR_RE.match(whole):
+                continue
+            if LABEL_BEFORE_RE.search(text[:m.start()]) or LABEL_AFTER_RE.match(text[m.end():]):
+                continue
+        value = float(whole.replace(',', '') + (frac or ''))
+        if sign in ('-', '−'):
+            value = -value
+        # "1.7 pp" / "3 percentage points" are percentages of a difference
+        points = bool(PP_AFTER_RE.match(text[m.end():]))
+        tokens.append(Token(raw, value, len(frac) - 1 if frac else 0, bool(pct) or points))
+    return tokens
+
+
+def _first(labels, text):
+    for key, pattern in labels.items():
+        if re.search(pattern, text, re.I):
+            return key
+    return None
+
+
+def label_attributes(text, caption=False):
+    """Group attributes, window and statistic named in a row label, column header or caption
+
+    Captions only contribute the window, the index and the statistic: "by
+    SPAC Status" names a breakdown, not a group.
+    """
+    found = {'window': _first(WINDOW_LABELS, text), 'stat': _first(STAT_LABELS, text)}
+    if re.search(r'either index|\bneither\b', text, re.I):
+        found['index'] = 'neither'
+    elif re.search(r'S&P;?\s*500', text):
+        found['index'] = 'sp'
+    elif re.search(r'Russell\s*1000', text, re.I):
+        found['index'] = 'russell'
+    if not caption:
+        if re.search(r'non-?spac|traditional', text, re.I):
+            found['spac'] = 'no'
+        elif re.search(r'\bspacs?\b', text, re.I):
+            found['spac'] = 'yes'
+        if re.search(r'abnormal', text, re.I):
+            found['level'] = 'abnormal'
+        elif re.search(r'\bnormal\b', text, re.I):
+            found['level'] = 'normal'
+        if found.get('index') != 'neither' and re.search(r'included|S&P|Russell', text, re.I):
+            found['included'] = 'no' if re.search(r'\bnot\b|non-included|excluded', text, re.I) else 'yes'
+    return {k: v for k, v in found.items() if v is not None}
+
+
+class FactIndex:
+    """Facts by (group, window, statistic), and sorted by value for fast tolerance lookups"""
+
+    def __init__(self, facts, rel_tol=DEFAULT_REL_TOL):
+        self.rel_tol = rel_tol
+        self.by_key = {(f.group, f.window, f.stat): f for f in facts}
+        self.groups = {frozenset(attrs.items()): name for name, attrs in GROUPS.items()}
+        self.by_kind = {}
+        for kind in ('value', 'count'):
+            subset = sorted((f for f in facts if f.kind == kind and np.isfinite(f.value)),
+                            key=lambda f: f.value)
+            self.by_kind[kind] = (np.array([f.value for f in subset]), subset)
+
+    def _lookup(self, kind, value, tol):
+        values, facts = self.by_kind[kind]
+        lo = np.searchsorted(values, value - tol, side='left')
+        hi = np.searchsorted(values, value + tol, side='right')
+        if lo == hi:
+            return None
+        best = min(range(lo, hi), key=lambda i: abs(values[i] - value))
+        return facts[best]
+
+    def _value_tol(self, token):
+        """The token's value and the tolerance implied by how it is printed"""
+        scale = 100.0 if token.percent else 1.0
+        value = token.value / scale
+        return value, 0.5 * 10 ** -token.decimals / scale + self.rel_tol * abs(value) + 1e-12
+
+    def expected(self, caption, header, column, row):
+        """The fact a table cell reports, from its caption, column header and row label, or None
+
+        Later labels override earlier ones. A window named by the table's
+        other column headers ("Mean 1Y Return") applies to the whole table.
+        """
+        attrs = label_attributes(caption, caption=True)
+        windows = {label_attributes(h).get('window') for h in header} - {None}
+        if len(windows) == 1:
+            attrs['window'] = windows.pop()
+        for text in (column, row):
+            attrs.update(label_attributes(text))
+        window, stat = attrs.pop('window', None), attrs.pop('stat', None)
+        if attrs.get('index') in ('sp', 'russell'):
+            attrs.setdefault('included', 'yes')  # a row named after an index is its members
+        group = self.groups.get(frozenset(attrs.items()))
+        fact = self.by_key.get((group, window, stat))
+        if fact is None and stat in ('count', 'share'):
+            fact = self.by_key.get((group, None, stat))
+        return fact
+
+    def agrees(self, token, fact):
+        """True if the token is `fact` as printed (counts exactly, values within rounding)"""
+        value, tol = self._value_tol(token)
+        if fact.kind == 'count':
+            tol = 0.5
+        return bool(np.isfinite(fact.value)) and abs(fact.value - value) <= tol
+
+    def match(self, token):
+        """The closest fact consistent with how the token is printed, or None"""
+        value, tol = self._value_tol(token)
+        if not token.percent and token.decimals == 0:
+            found = self._lookup('count', value, 0.5)
+            if found:
+                return found
+        return self._lookup('value', value, tol)
+
+
+def verify_document(path, text, tables, index):
+    """Check table cells against their own statistic and prose numbers against any; return a result dict"""
+    stale, unmapped, matched_cells = [], [], 0
+    for t, (caption, table) in enumerate(tables, 1):
+        header = table[0]
+        for r, row in enumerate(table[1:], 2):
+            for column, cell in zip(header[1:], row[1:]):
+                tokens = numeric_tokens(cell)
+                if not tokens:
+                    continue
+                fact = index.expected(caption, header[1:], column, row[0])
+                if fact is None:
+                    unmapped.append((t, r, cell, f"{row[0]} / {column}"))
+                    continue
+                for token in tokens:
+                    if index.agrees(token, fact):
+                        matched_cells += 1
+                    else:
+                        stale.append((t, r, token.raw, f"{row[0]} / {column}: expected {describe(fact)}"))
+    prose_matched, unverified = 0, []
+    for line in text:
+        for token in numeric_tokens(line):
+            # ratios ("7.9x", "nine times") are derived, not quoted statistics
+            tail = line[line.find(token.raw) + len(token.raw):][:20].lstrip()
+            if tail.startswith(('x', 'times')):
+                continue
+            if index.match(token):
+                prose_matched += 1
+            else:
+                unverified.append((token.raw, line.strip()[:80]))
+    return {
+        'path': path,
+        'tables': len(tables),
+        'cells_matched': matched_cells,
+        'stale': stale,
+        'unmapped': unmapped,
+        'prose_matched': prose_matched,
+        'unverified': unverified,
+    }
+
+
+def verify(documents=DOCUMENTS, processed=PROCESSED_FILE, rel_tol=DEFAULT_REL_TOL):
+    """Verify all documents; return (results, missing documents, seconds)"""
+    start = time.perf_counter()
+    present = [d for d in documents if os.path.exists(d)]
+    missing = [d for d in documents if not os.path.exists(d)]
+    with ProcessPoolExecutor(max_workers=max(1, len(present))) as pool:
+        futures = [pool.submit(extract, d) for d in present]
+        index = FactIndex(compute_facts(pd.read_csv(processed)), rel_tol)
+        extracted = [f.result() for f in futures]
+    results = []
+    for path, text, tables, seconds in extracted:
+        result = verify_document(path, text, tables, index)
+        result['parse_seconds'] = seconds
+        results.append(result)
+    return results, missing, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify report numbers against computed statistics")
+    parser.add_argument('documents', nargs='*', default=DOCUMENTS)
+    parser.add_argument('--processed', default=PROCESSED_FILE, help="processed dataset from the analysis stage")
+    parser.add_argument('--rel-tol', type=float, default=DEFAULT_REL_TOL)
+    parser.add_argument('--show-prose', action='store_true', help="list unverified numbers in running text")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.processed):
+        print(f"ERROR: {args.processed} not found! Run project1_analysis.py first.")
+        sys.exit(1)
+
+    results, missing, seconds = verify(args.documents, args.processed, args.rel_tol)
+
+    print("=" * 80)
+    print("REPORT VERIFICATION")
+    print("=" * 80)
+    for path in missing:
+        print(f"\n{path}: MISSING")
+    for r in results:
+        problems = [f"{len(r[k])} {k.upper()}" for k in ('stale', 'unmapped') if r[k]]
+        status = ', '.join(problems) or "OK"
+        print(f"\n{r['path']}: {status}  (parsed in {r['parse_seconds']:.2f}s)")
+        print(f"  Tables: {r['tables']}, numeric cells matched: {r['cells_matched']}")
+        print(f"  Prose numbers matched: {r['prose_matched']}, unverified: {len(r['unverified'])}")
+        for t, row, raw, context in r['stale']:
+            print(f"  ✗ table {t} row {row}: {raw:<10} | {context}")
+        for t, row, raw, context in r['unmapped']:
+            print(f"  ✗ table {t} row {row}: {raw:<10} | {context}: no computed statistic for these labels")
+        if args.show_prose:
+            for raw, context in r['unverified']:
+                print(f"  ? {raw:<10} | {context}")
+    print("\n" + "=" * 80)
+    print(f"Verified {len(results)} document(s) in {seconds:.2f}s")
+    failed = missing or any(r['stale'] or r['unmapped'] for r in results)
+    print("✗ Verification failed" if failed else "✓ All table values match the computed statistics")
+    sys.exit(1 if failed else 0)
+
 
-# Check if markdown file exists
-md_file = "IPO_Analysis_Report_Q5_Q6.md"
-
-if os.path.exists(md_file):
-    print(f"Report generated successfully: {md_file}")
-    print(f"\nFile size: {os.path.getsize(md_file)} bytes")
-    print(f"Location: {os.path.abspath(md_file)}")
-    
-    print("\n" + "="*80)
-    print("REPORT SUMMARY")
-    print("="*80)
-    print("\nTitle: IPO Analysis Report - Questions 5 & 6")
-    print("Subtitle: SPAC vs Non-SPAC Returns and Index Inclusion Performance")
-    print("\nSections:")
-    print("  1. Introduction")
-    print("  2. Methodology")
-    print("  3. Question 5: SPAC vs Non-SPAC Performance")
-    print("     - 5(i): Day 0 Return Analysis")
-    print("     - 5(ii): Multi-Window Return Analysis")
-    print("  4. Question 6: Index Inclusion Performance")
-    print("     - S&P 500 Impact")
-    print("     - Russell 1000 Impact")
-    print("  5. Conclusions")
-    print("  6. Limitations")
-    print("  7. References")
-    print("  8. Appendix")
-    
-    print("\nKey Features:")
-    print("  - 6 statistical tables")
-    print("  - Complete code examples")
-    print("  - Detailed findings for each analysis")
-    print("  - Professional academic format")
-    print("  - 8 pages of comprehensive analysis")
-    
-    print("\n" + "="*80)
-    print("To convert to PDF, you can:")
-    print("  1. Open in a markdown viewer (e.g., VS Code)")
-    print("  2. Use pandoc: pandoc IPO_Analysis_Report_Q5_Q6.md -o report.pdf")
-    print("  3. Copy to Word/Google Docs and export as PDF")
-    print("="*80)
-else:
-    print(f"ERROR: {md_file} not found!")
-
-print("\n✓ Report generation complete!")
+if __name__ == "__main__":
+    main()